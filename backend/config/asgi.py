@@ -9,6 +9,13 @@ Em produção, pode ser usado com servidores como:
 - Uvicorn
 - Hypercorn
 
+O stream de eventos das tarefas (GET /api/tasks/events/) precisa do ASGI e
+é atendido direto por tasks.streams.events_app, fora do ASGIHandler do
+Django: cada conexão aberta é só uma corrotina, sem ocupar uma thread.
+Exemplo:
+
+    uvicorn config.asgi:application --host 0.0.0.0 --port 8000
+
 Documentação: https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
@@ -18,4 +25,26 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importado depois do setup do Django (get_asgi_application carrega os apps)
+from django.urls import reverse  # noqa: E402
+from tasks.streams import events_app  # noqa: E402
+from users.last_login import start_flusher  # noqa: E402
+from users.token_pruning import start_scheduler  # noqa: E402
+
+TASK_EVENTS_PATH = reverse('tasks:task-events')
+
+# Limpeza periódica dos tokens expirados, se TOKEN_PRUNE_INTERVAL_SECONDS
+# estiver definido (veja users/token_pruning.py), e gravação do last_login
+# em lote (users/last_login.py). As duas só são habilitadas aqui: as
+# threads sobem depois, em cada worker
+start_scheduler()
+start_flusher()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == TASK_EVENTS_PATH:
+        await events_app(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
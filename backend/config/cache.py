@@ -0,0 +1,25 @@
+"""
+Ajudantes do cache do Django (settings.CACHES).
+
+Alguns recursos usam o cache para combinar os processos: a geração de cada
+usuário (users/authentication.py), a versão do diretório
+(users/directory.py), os contadores do throttling (users/throttling.py),
+a marca de leitura no primário (config/routers.py) e o par da janela de
+tolerância do refresh (GraceTokenRefreshSerializer, users/serializers.py).
+Isso só funciona com um cache compartilhado entre os workers, como Redis
+ou Memcached. O LocMemCache (o padrão) é um por processo e o DummyCache
+não guarda nada.
+
+Sem cache compartilhado, o cache da autenticação e o do diretório se
+desligam (cache_is_shared()); os outros continuam, valendo por processo.
+"""
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def cache_is_shared(alias='default'):
+    """True se o cache `alias` é o mesmo para todos os processos."""
+    return not isinstance(caches[alias], LOCAL_BACKENDS)
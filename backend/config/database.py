@@ -0,0 +1,80 @@
+"""
+Ajudantes do banco de dados (SQLite).
+
+O perfil das conexões (WAL, synchronous, busy_timeout, cache e mmap) é
+aplicado pelo init_command de settings.DATABASES, a partir de
+settings.SQLITE_PRAGMAS. Aqui ficam:
+- retry_on_busy: repete uma escrita que esbarrou na trava do SQLite
+  ("database is locked") depois que o busy_timeout venceu
+- pragma_status: os valores em vigor numa conexão (manutenção e testes)
+"""
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PRAGMAS = ['journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size', 'auto_vacuum']
+
+
+def is_busy_error(exc):
+    """True para os erros de trava do SQLite (SQLITE_BUSY / SQLITE_LOCKED)."""
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database table is locked' in message
+
+
+def retry_on_busy(func=None, *, using=None):
+    """
+    Executa `func` numa transação e a repete se o SQLite estiver ocupado.
+
+    São até settings.SQLITE_BUSY_RETRIES tentativas a mais, com espera
+    aleatória entre 0 e SQLITE_BUSY_RETRY_DELAY * 2^tentativa segundos
+    (backoff exponencial com jitter: escritores que bateram juntos não
+    voltam juntos). Como a transação inteira foi desfeita, repetir é seguro.
+
+    A transação e a trava são as do banco `using` (o default se omitido):
+    @retry_on_busy ou @retry_on_busy(using='outro').
+
+    Dentro de uma transação já aberta não há repetição: a trava é da
+    transação de fora, e só ela pode recomeçar.
+    """
+    if func is None:
+        return functools.partial(retry_on_busy, using=using)
+    alias = using or DEFAULT_DB_ALIAS
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        conn = connections[alias]
+        if conn.vendor != 'sqlite' or conn.in_atomic_block:
+            return func(*args, **kwargs)
+        retries = getattr(settings, 'SQLITE_BUSY_RETRIES', 3)
+        delay = getattr(settings, 'SQLITE_BUSY_RETRY_DELAY', 0.05)
+        attempt = 0
+        while True:
+            try:
+                with transaction.atomic(using=alias):
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if attempt >= retries or not is_busy_error(exc):
+                    raise
+                attempt += 1
+                wait = random.uniform(0, delay * 2 ** attempt)
+                logger.info('SQLite ocupado (%s), tentativa %s em %.3fs', alias, attempt + 1, wait)
+                time.sleep(wait)
+    return wrapper
+
+
+def pragma_status(conn=connection):
+    """Valores dos PRAGMAs do perfil na conexão."""
+    with conn.cursor() as cursor:
+        status = {}
+        for name in PROFILE_PRAGMAS:
+            cursor.execute(f'PRAGMA {name}')
+            row = cursor.fetchone()
+            # mmap_size não responde em bancos em memória
+            status[name] = row[0] if row else None
+    return status
@@ -0,0 +1,145 @@
+"""
+Leituras nas réplicas do banco, com leitura das próprias escritas.
+
+As réplicas ficam em settings.DATABASE_REPLICAS (aliases de DATABASES,
+montados a partir de DATABASE_REPLICA_PATHS). O ReplicaRouter manda para
+elas só as leituras das views que pediram (ReplicaReadMixin, usado por
+TaskViewSet e UserListViewSet) em requisições GET/HEAD/OPTIONS. Todo o
+resto fica no primário: escritas, autenticação (feita antes da view
+liberar a réplica), admin, comandos.
+
+Réplica atrasa. Depois que um cliente escreve, as leituras dele ficam no
+primário por DATABASE_REPLICA_STICKY_SECONDS segundos, para que ele veja o
+que acabou de gravar. O cliente é o usuário autenticado ou, sem login, o
+IP; a marca fica no cache do Django (compartilhado entre os processos se o
+cache for).
+
+Cada requisição usa uma única réplica, escolhida ao acaso, para que as
+consultas dela (contagem, página, detalhe) vejam o mesmo estado.
+
+Para testar localmente com um arquivo fazendo papel de réplica:
+
+    DATABASE_REPLICA_PATHS=/tmp/replica.sqlite3
+    python manage.py sync_sqlite_replicas
+"""
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY = 'default'
+STICKY_KEY = 'db:sticky:{}'
+
+_state = contextvars.ContextVar('db_routing_state', default=None)
+
+
+class RoutingState:
+    """Estado do roteamento durante uma requisição."""
+    __slots__ = ('request', 'replica', 'wrote')
+
+    def __init__(self, request):
+        self.request = request
+        self.replica = None
+        self.wrote = False
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def sticky_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return STICKY_KEY.format(f'user:{user.pk}')
+    return STICKY_KEY.format(f"ip:{request.META.get('REMOTE_ADDR')}")
+
+
+def is_sticky(request):
+    """True se o cliente escreveu há pouco (e deve ler do primário)."""
+    return bool(cache.get(sticky_key(request)))
+
+
+def mark_write():
+    """Fixa o cliente da requisição atual no primário (uma vez por requisição)."""
+    state = _state.get()
+    if state is None or state.wrote:
+        return
+    state.wrote = True
+    state.replica = None
+    cache.set(sticky_key(state.request), True, getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 5))
+
+
+def use_replica_for_request(request):
+    """Libera a réplica para as leituras desta requisição, se couber."""
+    state = _state.get()
+    available = replicas()
+    if state is None or not available or state.wrote:
+        return None
+    if request.method not in SAFE_METHODS or is_sticky(request):
+        return None
+    state.replica = random.choice(available)
+    return state.replica
+
+
+def use_primary():
+    """Volta as leituras do resto da requisição para o primário."""
+    state = _state.get()
+    if state is not None:
+        state.replica = None
+
+
+class ReplicaRoutingMiddleware:
+    """Guarda a requisição atual para o roteador (depois do AuthenticationMiddleware)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _state.set(RoutingState(request))
+        try:
+            return self.get_response(request)
+        finally:
+            _state.reset(token)
+
+
+class ReplicaReadMixin:
+    """
+    Para viewsets do DRF: leituras em GET/HEAD/OPTIONS vão para a réplica.
+
+    A liberação acontece depois do initial() (autenticação, permissões e
+    limites), então o usuário sempre é carregado do primário.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        use_replica_for_request(request)
+
+
+class ReplicaRouter:
+    """Router do Django: leituras liberadas na réplica, o resto no primário."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is not None and state.replica:
+            return state.replica
+        # O Django decide (primário, ou o banco da instância relacionada)
+        return None
+
+    def db_for_write(self, model, **hints):
+        mark_write()
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas têm os mesmos dados do primário
+        databases = {PRIMARY, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Réplicas são cópias do primário, não recebem migrações
+        if db in replicas():
+            return False
+        return None
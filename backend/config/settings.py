@@ -40,6 +40,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -65,13 +66,65 @@ TEMPLATES = [
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
+# Perfil do SQLite para produção, aplicado em cada conexão nova (init_command):
+# - WAL: leitores não bloqueiam o escritor (e vice-versa)
+# - synchronous=NORMAL: com WAL, só o checkpoint faz fsync (seguro contra
+#   queda do processo; numa queda de energia perde no máximo os últimos COMMITs)
+# - busy_timeout: quanto uma escrita espera a trava antes do "database is locked"
+# - cache_size (KiB, por conexão) e mmap_size (bytes) para leituras
+# Com transaction_mode=IMMEDIATE a transação pega a trava de escrita já no
+# BEGIN, então o busy_timeout vale (numa transação DEFERRED que começa lendo,
+# a troca de trava falha na hora). Escritas que ainda assim esbarram na trava
+# são repetidas com espera aleatória crescente (config/database.py).
+# Manutenção: python manage.py sqlite_maintenance
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='wal'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='normal'),
+    'busy_timeout': config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+    'cache_size': -config('SQLITE_CACHE_SIZE_KB', default=20000, cast=int),
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=128 * 1024 * 1024, cast=int),
+}
+SQLITE_BUSY_RETRIES = config('SQLITE_BUSY_RETRIES', default=3, cast=int)
+SQLITE_BUSY_RETRY_DELAY = config('SQLITE_BUSY_RETRY_DELAY', default=0.05, cast=float)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': config('SQLITE_TRANSACTION_MODE', default='IMMEDIATE'),
+        },
     }
 }
 
+# Réplicas de leitura (config/routers.py): caminhos de arquivos SQLite
+# separados por vírgula, viram os aliases replica1, replica2...
+# Depois de escrever, o cliente lê do primário por
+# DATABASE_REPLICA_STICKY_SECONDS segundos.
+DATABASE_REPLICA_PATHS = config('DATABASE_REPLICA_PATHS', default='', cast=Csv())
+DATABASE_REPLICAS = []
+for number, path in enumerate(DATABASE_REPLICA_PATHS, start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {**DATABASES['default'], 'NAME': path, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['config.routers.ReplicaRouter']
+DATABASE_REPLICA_STICKY_SECONDS = config('DATABASE_REPLICA_STICKY_SECONDS', default=5, cast=int)
+
+# O PBKDF2 roda num pool de processos limitado (users/hashers.py). Acima de
+# PASSWORD_HASHING_MAX_PENDING pedidos, login/cadastro/troca de senha
+# respondem 503 na hora. PASSWORD_HASHING_WORKERS=0 calcula na própria thread.
+PASSWORD_HASHERS = [
+    'users.hashers.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=2, cast=int)
+PASSWORD_HASHING_MAX_PENDING = config('PASSWORD_HASHING_MAX_PENDING', default=16, cast=int)
+PASSWORD_HASHING_TIMEOUT = config('PASSWORD_HASHING_TIMEOUT', default=5, cast=float)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -93,13 +146,28 @@ TIME_ZONE = 'America/Sao_Paulo'
 USE_I18N = True
 USE_TZ = True
 
+# Cache compartilhado (diretório de usuários, cache da autenticação,
+# throttling, janela de tolerância do refresh; veja config/cache.py). O
+# padrão em memória vale só para um processo: com ele o cache da
+# autenticação e o do diretório ficam desligados, os limites de requisições
+# valem por worker e um refresh repetido só reaproveita o par no mesmo
+# worker. Com vários workers use Redis ou Memcached, ex.:
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
 STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -117,7 +185,18 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
-    'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
+    # Taxas por escopo (users/throttling.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'auth': config('THROTTLE_RATE_AUTH', default='20/min'),
+        'refresh': config('THROTTLE_RATE_REFRESH', default='30/min'),
+        'reset': config('THROTTLE_RATE_RESET', default='5/hour'),
+        'tasks_read': config('THROTTLE_RATE_TASKS_READ', default='600/min'),
+        'tasks_write': config('THROTTLE_RATE_TASKS_WRITE', default='120/min'),
+    },
+    # Proxies confiáveis na frente do servidor (0 = usa o REMOTE_ADDR)
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+    'EXCEPTION_HANDLER': 'users.exceptions.exception_handler',
+    'TEST_REQUEST_DEFAULT_FORMAT': 'json',
 }
 
 SIMPLE_JWT = {
@@ -125,14 +204,37 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(minutes=config('JWT_REFRESH_TOKEN_LIFETIME', default=1440, cast=int)),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login é gravado em lote (users/last_login.py), não a cada login
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.BufferedLastLoginTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.GraceTokenRefreshSerializer',
 }
 
+# Gravação do last_login em lote (users/last_login.py): atraso máximo no
+# banco (0 = grava a cada login), tamanho do buffer que força a gravação
+# e intervalo abaixo do qual um novo login nem é registrado
+LAST_LOGIN_FLUSH_SECONDS = config('LAST_LOGIN_FLUSH_SECONDS', default=60, cast=int)
+LAST_LOGIN_MAX_PENDING = config('LAST_LOGIN_MAX_PENDING', default=1000, cast=int)
+LAST_LOGIN_RESOLUTION_SECONDS = config('LAST_LOGIN_RESOLUTION_SECONDS', default=60, cast=int)
+
+# Janela em que o mesmo refresh token devolve o par já emitido
+# (users.serializers.GraceTokenRefreshSerializer)
+JWT_REFRESH_GRACE_SECONDS = config('JWT_REFRESH_GRACE_SECONDS', default=10, cast=int)
+
+# Sincronização (tasks/sync.py): mudanças mais novas que isso ficam para a
+# próxima chamada, para não pular uma transação ainda não confirmada
+TASK_SYNC_SETTLE_SECONDS = config('TASK_SYNC_SETTLE_SECONDS', default=2, cast=float)
+
+# Limpeza periódica dos tokens JWT expirados dentro do servidor (0 = desligada).
+# Também dá para rodar `python manage.py prune_expired_tokens` pelo cron, o
+# melhor caminho com vários workers.
+TOKEN_PRUNE_INTERVAL_SECONDS = config('TOKEN_PRUNE_INTERVAL_SECONDS', default=0, cast=int)
+
 CORS_ALLOW_ALL_ORIGINS = config('CORS_ALLOW_ALL_ORIGINS', default=True, cast=bool)
 if not CORS_ALLOW_ALL_ORIGINS:
     CORS_ALLOWED_ORIGINS = config('CORS_ALLOWED_ORIGINS', default='http://localhost:3000', cast=Csv())
@@ -19,3 +19,13 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Limpeza periódica dos tokens expirados, se TOKEN_PRUNE_INTERVAL_SECONDS
+# estiver definido (veja users/token_pruning.py), e gravação do last_login
+# em lote (users/last_login.py). As duas só são habilitadas aqui: as
+# threads sobem depois, em cada worker
+from users.last_login import start_flusher  # noqa: E402
+from users.token_pruning import start_scheduler  # noqa: E402
+
+start_scheduler()
+start_flusher()
@@ -0,0 +1,150 @@
+"""
+Backfills em lotes: correções de dados em tabelas grandes sem travar o banco.
+
+Percorrer Model.objects.all() chamando save() é uma escrita por linha e,
+numa migração, uma transação só para a tabela inteira: no SQLite o banco
+fica travado para escrita até o fim. run_backfill divide o trabalho em
+faixas da chave primária:
+
+- cada lote é uma operação por conjunto (um update()/delete() na queryset
+  do lote), com até batch_size linhas, na sua própria transação
+- com um nome, o último pk processado vai para a tabela backfill_checkpoint
+  na mesma transação do lote; se o processo cair, rodar de novo continua
+  dali, e um backfill concluído não roda de novo (reset=True recomeça)
+- pause segundos de espera entre os lotes deixam as outras escritas passarem
+- um lote que esbarra em "database is locked" é repetido (retry_on_busy)
+
+Serve para migrações (RunPython; a migração precisa de atomic = False para
+o commit por lote valer) e comandos (backfill_tasks). Só para tabelas com
+chave primária inteira.
+
+Migrações antigas importam este módulo: mudanças aqui precisam continuar
+compatíveis com elas. A tabela de checkpoints é criada pelas migrações:
+pela tasks.0004, a primeira que faz um backfill, e pela tasks.0012, para os
+bancos em que a 0004 rodou antes de a tabela existir.
+"""
+import logging
+import time
+
+from django.db import connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from config.database import retry_on_busy
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TABLE = 'backfill_checkpoint'
+
+
+class Checkpoint:
+    """Progresso salvo de um backfill: último pk processado e linhas alteradas."""
+
+    def __init__(self, name, using='default'):
+        self.name = name
+        self.connection = connections[using]
+        self.table = self.connection.ops.quote_name(CHECKPOINT_TABLE)
+
+    def load(self):
+        """Retorna (último pk, linhas alteradas, concluído)."""
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT last_pk, rows_done, finished FROM {self.table} WHERE name = %s', [self.name],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None, 0, False
+        return row[0], row[1], bool(row[2])
+
+    def save(self, last_pk, rows_done, finished=False):
+        params = [last_pk, rows_done, finished, timezone.now().isoformat()]
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {self.table} SET last_pk = %s, rows_done = %s, finished = %s, updated_at = %s '
+                'WHERE name = %s',
+                [*params, self.name],
+            )
+            if cursor.rowcount == 0:
+                cursor.execute(
+                    f'INSERT INTO {self.table} (last_pk, rows_done, finished, updated_at, name) '
+                    'VALUES (%s, %s, %s, %s, %s)',
+                    [*params, self.name],
+                )
+
+    def reset(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE name = %s', [self.name])
+
+
+def checkpoints(using='default'):
+    """Todos os checkpoints salvos: [(nome, último pk, linhas, concluído, atualizado em)]."""
+    checkpoint = Checkpoint(None, using)
+    with checkpoint.connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT name, last_pk, rows_done, finished, updated_at FROM {checkpoint.table} ORDER BY name'
+        )
+        return [(name, last_pk, rows, bool(finished), updated) for name, last_pk, rows, finished, updated in cursor]
+
+
+def run_backfill(queryset, apply, name=None, batch_size=1000, pause=0.0, using=None, reset=False, log=None):
+    """
+    Aplica `apply` às linhas de `queryset` em lotes de até `batch_size`
+    linhas, em ordem de pk.
+
+    `apply(lote)` recebe a queryset restrita a uma faixa de pk e retorna o
+    número de linhas alteradas (o retorno de update() ou delete()[0]). O
+    filtro de `queryset` deve selecionar só as linhas que ainda precisam
+    da correção.
+
+    Com `name` o progresso fica salvo (veja Checkpoint). Retorna o total
+    de linhas alteradas, incluindo as de execuções anteriores.
+    """
+    using = using or queryset.db
+    queryset = queryset.using(using).order_by()
+    log = log or (lambda message: logger.info(message))
+    label = name or queryset.model._meta.label
+
+    checkpoint = Checkpoint(name, using) if name else None
+    last_pk, total, finished = None, 0, False
+    if checkpoint:
+        if reset:
+            checkpoint.reset()
+        last_pk, total, finished = checkpoint.load()
+        if finished:
+            log(f'{label}: já concluído ({total} linhas).')
+            return total
+        if last_pk is not None:
+            log(f'{label}: continuando depois do pk {last_pk} ({total} linhas já alteradas).')
+
+    @retry_on_busy(using=using)
+    def process(last_pk, total):
+        with transaction.atomic(using=using):
+            pending = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            # Fim do lote: o pk da batch_size-ésima linha pendente, ou o
+            # maior pk no último lote
+            upper = list(pending.order_by('pk').values_list('pk', flat=True)[batch_size - 1:batch_size])
+            upper = upper[0] if upper else pending.aggregate(upper=Max('pk'))['upper']
+            if upper is None:
+                return None, 0
+            changed = apply(pending.filter(pk__lte=upper))
+            if checkpoint:
+                checkpoint.save(upper, total + changed)
+            return upper, changed
+
+    batches = 0
+    start = time.perf_counter()
+    while True:
+        upper, changed = process(last_pk, total)
+        if upper is None:
+            break
+        last_pk = upper
+        total += changed
+        batches += 1
+        log(f'{label}: lote {batches} até o pk {upper}, {changed} linhas ({total} no total)')
+        if pause:
+            time.sleep(pause)
+
+    if checkpoint:
+        checkpoint.save(last_pk, total, finished=True)
+    log(f'{label}: concluído, {total} linhas em {batches} lotes ({time.perf_counter() - start:.2f}s).')
+    return total
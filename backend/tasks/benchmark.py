@@ -0,0 +1,145 @@
+"""
+Ferramentas usadas pelos comandos de benchmark das tarefas.
+
+Os benchmarks rodam num banco de teste descartável (o mesmo que o
+`manage.py test` cria), então nunca tocam no banco configurado.
+"""
+import contextlib
+import itertools
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from .models import Task
+# vocabulary continua importável daqui (benchmark_task_search)
+from .synthetic import TASK_COLUMNS, insert_statement, text_generator, vocabulary
+
+User = get_user_model()
+
+
+@contextlib.contextmanager
+def benchmark_database(verbosity=0, on_disk=False):
+    """
+    Cria um banco de teste vazio e o destrói ao final.
+
+    on_disk=True usa um arquivo temporário em vez do banco em memória do
+    SQLite, para benchmarks com várias threads escrevendo ao mesmo tempo.
+    """
+    old_name = connection.settings_dict['NAME']
+    old_test_name = connection.settings_dict['TEST'].get('NAME')
+    directory = None
+    if on_disk and connection.vendor == 'sqlite':
+        directory = tempfile.mkdtemp(prefix='benchmark-')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        connection.settings_dict['TEST']['NAME'] = old_test_name
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def unthrottled():
+    """Desliga os limites de requisições (users/throttling.py) durante o benchmark."""
+    rates = {scope: None for scope in settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {})}
+    return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates})
+
+
+def seed_dataset(users=2000, tasks=1_000_000, seed=42, heavy_share=0.1, batch_size=5000, log=None,
+                 assignee_skew=0, log_every=None):
+    """
+    Popula o banco com usuários e tarefas sintéticos.
+
+    Uma fração `heavy_share` das tarefas é criada ou designada para o
+    primeiro usuário, imitando contas com muito volume. As datas ficam
+    espalhadas pelo último ano e os textos usam o vocabulário de
+    `vocabulary(seed)`.
+
+    Com `assignee_skew` > 0 os designados seguem uma distribuição de Zipf
+    com esse expoente (poucos usuários recebem a maior parte das tarefas);
+    com 0, todos têm a mesma chance.
+
+    `log(mensagem)` recebe o progresso ("5000/1000000 tarefas") a cada lote
+    ou, com `log_every`, a cada `log_every` tarefas e no fim.
+
+    Retorna a lista de ids dos usuários (o usuário "pesado" primeiro).
+    """
+    rng = random.Random(seed)
+    random_text = text_generator(seed)
+    User.objects.bulk_create(
+        [
+            User(username=f'bench{i}', email=f'bench{i}@example.com', password='!')
+            for i in range(users)
+        ],
+        batch_size=batch_size,
+    )
+    user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+    heavy = user_ids[0]
+    if assignee_skew:
+        assignee_weights = list(itertools.accumulate(1 / (rank + 1) ** assignee_skew for rank in range(len(user_ids))))
+
+        def pick_assignee():
+            return rng.choices(user_ids, cum_weights=assignee_weights)[0]
+    else:
+        def pick_assignee():
+            return rng.choice(user_ids)
+
+    # INSERT direto para poder espalhar created_at (auto_now_add sobrescreveria)
+    sql = insert_statement(Task._meta.db_table, TASK_COLUMNS)
+    adapt = connection.ops.adapt_datetimefield_value
+    start = timezone.now() - timedelta(days=365)
+    step = timedelta(days=365) / max(tasks, 1)
+
+    created = 0
+    while created < tasks:
+        rows = []
+        for i in range(created, min(created + batch_size, tasks)):
+            creator = heavy if rng.random() < heavy_share / 2 else rng.choice(user_ids)
+            assignee = heavy if rng.random() < heavy_share / 2 else pick_assignee()
+            created_at = start + step * i
+            updated_at = created_at + timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+            completed = rng.random() < 0.4
+            rows.append((
+                creator, assignee,
+                random_text(2, 6), random_text(5, 20),
+                'completed' if completed else 'pending',
+                adapt(created_at), adapt(updated_at),
+                adapt(updated_at) if completed else None,
+            ))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        reported = created // log_every if log_every else None
+        created += len(rows)
+        if log and (not log_every or created // log_every > reported or created == tasks):
+            log(f'{created}/{tasks} tarefas')
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return user_ids
+
+
+def measure(fn, repeat=20):
+    """Executa `fn` várias vezes e retorna média e p95 em milissegundos."""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'mean_ms': round(statistics.mean(samples), 3),
+        'p95_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+    }
@@ -0,0 +1,437 @@
+"""
+Operações em lote das tarefas.
+
+Cada item de uma operação em lote é validado com as mesmas regras dos
+endpoints individuais (TaskCreateSerializer e TaskUpdateSerializer), mas a
+escrita é feita de uma vez só:
+- criação: um INSERT com várias linhas (bulk_create)
+- edição: um UPDATE ... FROM (VALUES ...) (veja update_rows)
+- conclusão: um UPDATE ... WHERE id IN (...)
+- exclusão: um DELETE ... WHERE id IN (...)
+
+Tudo roda numa única transação, junto com os contadores por usuário.
+Itens inválidos ou não encontrados não impedem os demais: a resposta traz
+o resultado de cada item, na mesma ordem do envio.
+"""
+import sqlite3
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+from rest_framework.serializers import as_serializer_error
+from rest_framework.settings import api_settings
+
+from . import counters, events, sync
+from .models import Task
+from .serializers import TaskSerializer, TaskCreateSerializer, TaskUpdateSerializer
+
+User = get_user_model()
+
+# Campos que a edição em lote pode alterar, além das datas
+UPDATABLE_FIELDS = ['title', 'description', 'status']
+
+
+def item_error(index, code, errors, pk=None):
+    result = {'index': index, 'status': code, 'errors': errors}
+    if pk is not None:
+        result['id'] = pk
+    return result
+
+
+def validate_items(serializer, items, instances=None):
+    """
+    Valida cada item com o mesmo serializer e retorna [(dados, erros)].
+
+    Reaproveita uma instância do serializer para todos os itens, como o
+    ListSerializer do DRF faz, assim os campos não são montados de novo a
+    cada item. Em edições, `instances` traz a tarefa de cada item.
+    """
+    validated = []
+    for index, item in enumerate(items):
+        if instances is not None:
+            serializer.instance = instances[index]
+        try:
+            validated.append((serializer.run_validation(item), None))
+        except ValidationError as exc:
+            validated.append((None, as_serializer_error(exc)))
+    return validated
+
+
+def update_rows(tasks, fields):
+    """
+    Grava os campos informados de várias tarefas.
+
+    No SQLite (3.33+) usa UPDATE ... FROM (VALUES ...), um comando por
+    bloco de linhas. O bulk_update do Django monta um CASE WHEN por linha e
+    por campo, o que fica lento (em Python e no banco) com mil tarefas.
+    Nos outros bancos, usa o bulk_update.
+    """
+    if connection.vendor != 'sqlite' or sqlite3.sqlite_version_info < (3, 33):
+        Task.objects.bulk_update(tasks, fields)
+        return
+
+    qn = connection.ops.quote_name
+    model_fields = [Task._meta.get_field(name) for name in fields]
+    table = qn(Task._meta.db_table)
+    assignments = ', '.join(
+        f'{qn(field.column)} = v.column{position}'
+        for position, field in enumerate(model_fields, start=2)
+    )
+    row = '({})'.format(', '.join(['%s'] * (len(model_fields) + 1)))
+    batch_size = connection.features.max_query_params // (len(model_fields) + 1)
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(tasks), batch_size):
+            batch = tasks[start:start + batch_size]
+            params = []
+            for task in batch:
+                params.append(task.pk)
+                params.extend(
+                    field.get_db_prep_save(getattr(task, field.attname), connection)
+                    for field in model_fields
+                )
+            cursor.execute(
+                f'UPDATE {table} SET {assignments} '
+                f'FROM (VALUES {", ".join([row] * len(batch))}) AS v '
+                f'WHERE {table}.{qn("id")} = v.column1',
+                params,
+            )
+
+
+def parse_pk(value):
+    """Converte o id enviado pelo cliente, ou retorna None se for inválido."""
+    if isinstance(value, bool):
+        return None
+    try:
+        return Task._meta.pk.to_python(value)
+    except (TypeError, ValueError, DjangoValidationError):
+        return None
+
+
+class TaskBulkMixin:
+    """
+    Actions de lote do TaskViewSet.
+
+    - POST /api/tasks/bulk-create/   [{"title": ..., "assigned_to": ...}, ...]
+    - POST /api/tasks/bulk-update/   [{"id": 1, "status": "completed"}, ...]
+    - POST /api/tasks/bulk-complete/ {"ids": [1, 2, 3]}
+    - POST /api/tasks/bulk-delete/   {"ids": [1, 2, 3]}
+    - POST /api/tasks/bulk-transition/?<filtros> {"status": "completed"}
+
+    A resposta é {"results": [...]}, um resultado por item com 'index',
+    'status' (o código HTTP que o endpoint individual retornaria) e 'data'
+    ou 'errors'. O bulk-transition não trabalha com itens: responde só
+    quantas tarefas mudaram.
+    """
+    bulk_max_items = 1000
+
+    def get_bulk_items(self, request):
+        """Lê a lista de itens do corpo da requisição."""
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({'detail': 'Envie uma lista de itens.'})
+        if len(items) > self.bulk_max_items:
+            raise ValidationError({'detail': f'Envie no máximo {self.bulk_max_items} itens por vez.'})
+        return items
+
+    def get_bulk_ids(self, request):
+        """Lê a lista de ids ({"ids": [...]}) do corpo da requisição."""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list):
+            raise ValidationError({'ids': ['Envie uma lista de ids.']})
+        if len(ids) > self.bulk_max_items:
+            raise ValidationError({'ids': [f'Envie no máximo {self.bulk_max_items} ids por vez.']})
+        return ids
+
+    def get_visible_tasks(self, pks):
+        """
+        Carrega as tarefas pedidas que o usuário pode ver, numa consulta só.
+
+        Mesma regra do get_object(): admin vê tudo, usuário comum só as que
+        criou ou que foram designadas pra ele.
+        """
+        user = self.request.user
+        tasks = self.get_base_queryset().order_by().in_bulk([pk for pk in pks if pk is not None])
+        if user.is_staff or user.is_superuser:
+            return tasks
+        return {
+            pk: task for pk, task in tasks.items()
+            if task.user_id == user.id or task.assigned_to_id == user.id
+        }
+
+    def serialize_results(self, results, tasks_by_index):
+        """Preenche 'data' dos itens bem-sucedidos com o TaskSerializer."""
+        indexes = list(tasks_by_index)
+        data = TaskSerializer([tasks_by_index[i] for i in indexes], many=True).data
+        for index, item in zip(indexes, data):
+            results[index]['data'] = item
+        return Response({'results': results})
+
+    @action(detail=False, methods=['post'], url_path='bulk-create')
+    def bulk_create(self, request):
+        """Cria várias tarefas com um INSERT só."""
+        items = self.get_bulk_items(request)
+
+        # Todos os usuários designados numa consulta, para a validação
+        assignee_pks = {
+            parse_pk(item.get('assigned_to')) for item in items if isinstance(item, dict)
+        }
+        assignees = User.objects.order_by().only('id', 'username').in_bulk(
+            [pk for pk in assignee_pks if pk is not None]
+        )
+        context = {**self.get_serializer_context(), 'preloaded': {'assigned_to': assignees}}
+
+        results = [None] * len(items)
+        tasks_by_index = {}
+        validated = validate_items(TaskCreateSerializer(context=context), items)
+        for index, (data, errors) in enumerate(validated):
+            if errors:
+                results[index] = item_error(index, status.HTTP_400_BAD_REQUEST, errors)
+                continue
+            task = Task(user=request.user, **data)
+            task.sync_completed_at()
+            tasks_by_index[index] = task
+            results[index] = {'index': index, 'status': status.HTTP_201_CREATED}
+
+        tasks = list(tasks_by_index.values())
+        with transaction.atomic(), counters.batch():
+            Task.objects.bulk_create(tasks)
+            deltas = []
+            for task in tasks:
+                task._counter_state = task.counter_state()
+                deltas += counters.task_deltas(*task._counter_state)
+                events.publish_task_event('created', task)
+            counters.apply_deltas(deltas)
+
+        for index, task in tasks_by_index.items():
+            results[index]['id'] = task.pk
+        return self.serialize_results(results, tasks_by_index)
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request):
+        """
+        Edita várias tarefas com um UPDATE só.
+
+        Cada item tem o 'id' da tarefa e os campos a alterar (como no PATCH).
+        """
+        items = self.get_bulk_items(request)
+        pks = [parse_pk(item.get('id')) if isinstance(item, dict) else None for item in items]
+        tasks = self.get_visible_tasks(pks)
+
+        results = [None] * len(items)
+        found = []
+        for index, (item, pk) in enumerate(zip(items, pks)):
+            if pk is None:
+                results[index] = item_error(
+                    index, status.HTTP_400_BAD_REQUEST, {'id': ['Informe um id válido.']}
+                )
+            elif pk not in tasks:
+                results[index] = item_error(
+                    index, status.HTTP_404_NOT_FOUND, {'detail': NotFound.default_detail}, pk
+                )
+            else:
+                found.append(index)
+
+        serializer = TaskUpdateSerializer(partial=True, context=self.get_serializer_context())
+        validated = validate_items(
+            serializer,
+            [{key: value for key, value in items[index].items() if key != 'id'} for index in found],
+            [tasks[pks[index]] for index in found],
+        )
+
+        tasks_by_index = {}
+        changed_fields = set()
+        for index, (data, errors) in zip(found, validated):
+            pk = pks[index]
+            task = tasks[pk]
+            if errors:
+                results[index] = item_error(index, status.HTTP_400_BAD_REQUEST, errors, pk)
+                continue
+            for field, value in data.items():
+                setattr(task, field, value)
+                changed_fields.add(field)
+            tasks_by_index[index] = task
+            results[index] = {'index': index, 'id': pk, 'status': status.HTTP_200_OK}
+
+        # Uma instância por tarefa, mesmo que o id apareça em mais de um item
+        tasks = list({task.pk: task for task in tasks_by_index.values()}.values())
+        fields = [field for field in UPDATABLE_FIELDS if field in changed_fields]
+        with transaction.atomic(), counters.batch():
+            # Estado gravado, relido com a trava de escrita (as instâncias
+            # podem ter sido alteradas por outra requisição desde a leitura)
+            stored = {
+                pk: (user_id, assigned_to_id, task_status)
+                for pk, user_id, assigned_to_id, task_status in Task.objects.select_for_update().filter(
+                    pk__in=[task.pk for task in tasks]
+                ).values_list('pk', 'user_id', 'assigned_to_id', 'status')
+            }
+            tasks = [task for task in tasks if task.pk in stored]
+            # A data só é tirada com a trava na mão: a sincronização confia
+            # que o updated_at fica visível logo depois de gravado
+            now = timezone.now()
+            for task in tasks:
+                task._counter_state = stored[task.pk]
+                task.sync_completed_at(now)
+                task.updated_at = now
+            if tasks:
+                update_rows(tasks, fields + ['completed_at', 'updated_at'])
+            deltas = []
+            for task in tasks:
+                new_state = task.counter_state()
+                events.publish_task_event(
+                    events.status_event_type(task._counter_state[2], task.status), task
+                )
+                if new_state != task._counter_state:
+                    deltas += counters.task_deltas(*new_state)
+                    deltas += counters.task_deltas(*task._counter_state, sign=-1)
+                    task._counter_state = new_state
+            counters.apply_deltas(deltas)
+
+        # Apagadas por outra requisição depois da leitura
+        for index, task in list(tasks_by_index.items()):
+            if task.pk not in stored:
+                results[index] = item_error(
+                    index, status.HTTP_404_NOT_FOUND, {'detail': NotFound.default_detail}, task.pk
+                )
+                del tasks_by_index[index]
+        return self.serialize_results(results, tasks_by_index)
+
+    @action(detail=False, methods=['post'], url_path='bulk-complete')
+    def bulk_complete(self, request):
+        """Marca várias tarefas como concluídas com um UPDATE só."""
+        pks = [parse_pk(pk) for pk in self.get_bulk_ids(request)]
+        tasks = self.get_visible_tasks(pks)
+
+        with transaction.atomic(), counters.batch():
+            # Estado atual, lido com a trava de escrita: as instâncias foram
+            # carregadas antes e outra requisição pode ter concluído alguma
+            now = timezone.now()
+            current = Task.objects.select_for_update().filter(pk__in=list(tasks)).values_list(
+                'pk', 'user_id', 'assigned_to_id', 'status', 'completed_at', 'updated_at',
+            )
+            pending = []
+            for pk, user_id, assigned_to_id, task_status, completed_at, updated_at in current:
+                task = tasks[pk]
+                task.user_id, task.assigned_to_id, task.status = user_id, assigned_to_id, task_status
+                task.completed_at, task.updated_at = completed_at, updated_at
+                if task_status == 'pending':
+                    pending.append(task)
+            Task.objects.filter(pk__in=[task.pk for task in pending], status='pending').update(
+                status='completed', completed_at=now, updated_at=now
+            )
+            deltas = []
+            for task in pending:
+                deltas += counters.task_deltas(*task.counter_state(), sign=-1)
+                task.status = 'completed'
+                task.completed_at = now
+                task.updated_at = now
+                task._counter_state = task.counter_state()
+                deltas += counters.task_deltas(*task._counter_state)
+                events.publish_task_event('completed', task)
+            counters.apply_deltas(deltas)
+
+        results = []
+        tasks_by_index = {}
+        for index, pk in enumerate(pks):
+            if pk in tasks:
+                tasks_by_index[index] = tasks[pk]
+                results.append({'index': index, 'id': pk, 'status': status.HTTP_200_OK})
+            else:
+                results.append(item_error(
+                    index, status.HTTP_404_NOT_FOUND, {'detail': NotFound.default_detail}, pk
+                ))
+        return self.serialize_results(results, tasks_by_index)
+
+    @action(detail=False, methods=['post'], url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """Deleta várias tarefas com um DELETE só."""
+        pks = [parse_pk(pk) for pk in self.get_bulk_ids(request)]
+        tasks = self.get_visible_tasks(pks)
+
+        # O sinal post_delete desconta cada tarefa e grava o registro de
+        # exclusão; os batches juntam os UPDATEs e os INSERTs
+        with transaction.atomic(), counters.batch(), sync.batch():
+            Task.objects.filter(pk__in=list(tasks)).delete()
+
+        results = []
+        for index, pk in enumerate(pks):
+            if pk in tasks:
+                results.append({'index': index, 'id': pk, 'status': status.HTTP_204_NO_CONTENT})
+            else:
+                results.append(item_error(
+                    index, status.HTTP_404_NOT_FOUND, {'detail': NotFound.default_detail}, pk
+                ))
+        return Response({'results': results})
+
+    def get_transition_queryset(self):
+        """
+        Tarefas visíveis que batem com os filtros e a busca da URL.
+
+        Usa os mesmos filtros da listagem (TaskFilter e ?search=), sem
+        ordenação nem paginação.
+        """
+        user = self.request.user
+        queryset = Task.objects.all()
+        if not (user.is_staff or user.is_superuser):
+            queryset = queryset.filter(Q(user=user) | Q(assigned_to=user))
+        for backend in self.filter_backends:
+            if not issubclass(backend, OrderingFilter):
+                queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset.order_by()
+
+    def has_transition_filters(self, request):
+        params = set(self.filterset_class.base_filters) | {api_settings.SEARCH_PARAM}
+        return any(request.query_params.get(param) for param in params)
+
+    @action(detail=False, methods=['post'], url_path='bulk-transition')
+    def bulk_transition(self, request):
+        """
+        Muda o status de todas as tarefas que batem com os filtros da URL.
+
+        Exemplos:
+        - ?assigned_to=3&created_at_lte=2024-05-31 com {"status": "completed"}
+        - ?status=completed&completed_at_gte=2024-06-03 com {"status": "pending"}
+
+        É um UPDATE só, com a mesma regra de completed_at do Task.save():
+        ao concluir, recebe a data atual; ao reabrir, volta a ser nula.
+        Tarefas que já estão no status pedido não são alteradas. Os
+        contadores por usuário são ajustados com um GROUP BY por criador e
+        designado, sem carregar as tarefas.
+        """
+        new_status = request.data.get('status') if isinstance(request.data, dict) else None
+        if new_status not in dict(Task.STATUS_CHOICES):
+            raise ValidationError({'status': ['Informe "pending" ou "completed".']})
+        if not self.has_transition_filters(request):
+            raise ValidationError({'detail': 'Informe ao menos um filtro na URL.'})
+
+        old_status = 'pending' if new_status == 'completed' else 'completed'
+        queryset = self.get_transition_queryset().filter(status=old_status)
+
+        with transaction.atomic(), counters.batch():
+            now = timezone.now()
+            deltas = []
+            pairs = queryset.values('user_id', 'assigned_to_id').annotate(total=Count('id'))
+            affected_users = set()
+            for pair in pairs:
+                owners = (pair['user_id'], pair['assigned_to_id'])
+                deltas += counters.task_deltas(*owners, old_status, sign=-pair['total'])
+                deltas += counters.task_deltas(*owners, new_status, sign=pair['total'])
+                affected_users.update(owners)
+            counters.apply_deltas(deltas)
+
+            updated = queryset.update(
+                status=new_status,
+                completed_at=now if new_status == 'completed' else None,
+                updated_at=now,
+            )
+            # Um aviso só por usuário; o app busca as tarefas por /changes/
+            events.publish(affected_users, {'type': 'bulk_transition', 'status': new_status})
+
+        return Response({'status': new_status, 'updated': updated})
@@ -0,0 +1,74 @@
+"""
+Requisições condicionais (ETag / Last-Modified) da listagem e do detalhe.
+
+Os validadores saem de metadados baratos, não do corpo da resposta:
+- listagem: maior updated_at e total de tarefas visíveis que batem com os
+  filtros (o mesmo total que a paginação já precisava contar)
+- listagem no modo cursor (que não faz COUNT): ids e updated_at das linhas
+  da página, já buscadas; só ETag, sem Last-Modified
+- detalhe: id e updated_at da tarefa
+
+Assim um cliente que manda If-None-Match (ou If-Modified-Since) recebe
+304 antes de qualquer serialização.
+
+O ETag também leva o usuário e a URL completa (filtros, página,
+ordenação), então cada combinação tem seu próprio validador. Se uma tarefa
+some da listagem (exclusão), o total muda e o ETag muda junto; o
+Last-Modified só enxerga criações e edições, por isso o If-None-Match é o
+validador preferido.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .querysets import TaskUnion
+
+
+def list_metadata(queryset):
+    """
+    Retorna (maior updated_at, total) do queryset da listagem.
+
+    Para um TaskUnion, soma os totais e pega o maior updated_at dos ramos,
+    cada um usando seu índice (user/assigned_to, updated_at, ...).
+    """
+    branches = queryset.branches if isinstance(queryset, TaskUnion) else [queryset]
+    last_modified, total = None, 0
+    for branch in branches:
+        result = branch.order_by().aggregate(last_modified=Max('updated_at'), total=Count('pk'))
+        total += result['total']
+        if result['last_modified'] and (last_modified is None or result['last_modified'] > last_modified):
+            last_modified = result['last_modified']
+    return last_modified, total
+
+
+def make_etag(request, *parts):
+    """ETag forte a partir do usuário, da URL e das partes informadas."""
+    key = '|'.join(str(part) for part in (request.user.pk, request.get_full_path(), *parts))
+    return quote_etag(hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # A resposta depende de quem está logado
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+def not_modified_response(request, etag, last_modified):
+    """
+    Retorna a resposta 304 (ou 412) se as condições da requisição batem.
+
+    Retorna None quando a view deve montar a resposta normal.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
@@ -0,0 +1,153 @@
+"""
+Contadores de tarefas por usuário (usados em GET /api/tasks/stats/).
+
+Para cada usuário guardamos quantas tarefas ele criou e quantas foram
+designadas para ele por outras pessoas, separadas por status. As duas
+categorias não se repetem, então a soma delas é exatamente o que o
+usuário vê na listagem.
+
+Os contadores são atualizados por deltas (F() + n) na mesma transação da
+escrita da tarefa:
+- Task.save() compara o estado gravado (relido dentro da transação) com o novo
+- o sinal post_delete desconta as tarefas apagadas
+
+Cada usuário ganha sua linha (zerada) ao ser criado. Se por algum motivo a
+linha não existir, os deltas são ignorados e ela é calculada a partir da
+tabela de tarefas na primeira leitura. O comando
+`python manage.py rebuild_task_counters` recalcula tudo do zero.
+
+Operações em lote podem usar `with batch():` para juntar os deltas de
+várias tarefas e aplicar tudo no final, com um UPDATE por usuário.
+"""
+import contextlib
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.db.models import Count, F
+
+COUNTER_FIELDS = ['created_pending', 'created_completed', 'assigned_pending', 'assigned_completed']
+
+# Deltas acumulados pelo batch() em andamento (None fora de um batch)
+_pending_deltas = ContextVar('task_counter_deltas', default=None)
+
+
+def task_deltas(user_id, assigned_to_id, status, sign=1):
+    """
+    Retorna os deltas [(user_id, campo, n)] que uma tarefa representa.
+
+    sign=1 ao incluir a tarefa nos contadores, -1 ao remover. Também
+    aceita um múltiplo, para várias tarefas com o mesmo criador e designado.
+    """
+    deltas = [(user_id, f'created_{status}', sign)]
+    if assigned_to_id != user_id:
+        deltas.append((assigned_to_id, f'assigned_{status}', sign))
+    return deltas
+
+
+@contextlib.contextmanager
+def batch():
+    """
+    Acumula os deltas aplicados dentro do bloco e grava tudo no final.
+
+    Deve ser usado dentro da transação das escritas. Se o bloco levantar
+    uma exceção, nada é gravado (a transação vai ser desfeita de qualquer
+    forma).
+    """
+    if _pending_deltas.get() is not None:
+        # Já estamos dentro de outro batch, que vai aplicar os deltas
+        yield
+        return
+    deltas = []
+    token = _pending_deltas.set(deltas)
+    try:
+        yield
+    finally:
+        _pending_deltas.reset(token)
+    apply_deltas(deltas)
+
+
+def apply_deltas(deltas):
+    """
+    Aplica os deltas com um UPDATE por usuário.
+
+    Deve rodar dentro da transação que alterou as tarefas. Usuários sem
+    linha de contadores ficam de fora: get_counters() calcula a linha
+    quando ela for lida. Isso também evita recriar a linha de um usuário
+    que está sendo apagado em cascata.
+    """
+    from .models import TaskCounter
+
+    pending = _pending_deltas.get()
+    if pending is not None:
+        pending.extend(deltas)
+        return
+
+    per_user = defaultdict(lambda: defaultdict(int))
+    for user_id, field, amount in deltas:
+        if user_id is not None:
+            per_user[user_id][field] += amount
+
+    for user_id, fields in per_user.items():
+        changes = {field: F(field) + amount for field, amount in fields.items() if amount}
+        if not changes:
+            continue
+        TaskCounter.objects.filter(user_id=user_id).update(**changes)
+
+
+def count_tasks(user_ids=None):
+    """
+    Calcula os contadores a partir da tabela de tarefas.
+
+    Retorna {user_id: {campo: total}} para os usuários com alguma tarefa.
+    """
+    from .models import Task
+
+    created = Task.objects.all()
+    assigned = Task.objects.exclude(assigned_to=F('user'))
+    if user_ids is not None:
+        created = created.filter(user_id__in=user_ids)
+        assigned = assigned.filter(assigned_to_id__in=user_ids)
+
+    totals = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+    for row in created.order_by().values('user_id', 'status').annotate(total=Count('id')):
+        totals[row['user_id']][f"created_{row['status']}"] = row['total']
+    for row in assigned.order_by().values('assigned_to_id', 'status').annotate(total=Count('id')):
+        totals[row['assigned_to_id']][f"assigned_{row['status']}"] = row['total']
+    return totals
+
+
+def rebuild_counters(user_ids=None):
+    """
+    Recalcula os contadores dos usuários informados (ou de todos).
+
+    Retorna quantas linhas de contadores foram gravadas.
+    """
+    from django.contrib.auth import get_user_model
+    from .models import TaskCounter
+
+    totals = count_tasks(user_ids)
+    if user_ids is None:
+        TaskCounter.objects.all().delete()
+        user_ids = get_user_model().objects.values_list('pk', flat=True)
+    else:
+        TaskCounter.objects.filter(user_id__in=user_ids).delete()
+    # Usuários sem nenhuma tarefa também ganham uma linha (zerada)
+    for user_id in user_ids:
+        totals.setdefault(user_id, dict.fromkeys(COUNTER_FIELDS, 0))
+
+    TaskCounter.objects.bulk_create(
+        [TaskCounter(user_id=user_id, **fields) for user_id, fields in totals.items()],
+        batch_size=1000,
+    )
+    return len(totals)
+
+
+def get_counters(user_id):
+    """Retorna a linha de contadores do usuário, criando se preciso."""
+    from .models import TaskCounter
+
+    counter = TaskCounter.objects.filter(user_id=user_id).first()
+    if counter is None:
+        rebuild_counters([user_id])
+        counter = TaskCounter.objects.get(user_id=user_id)
+    return counter
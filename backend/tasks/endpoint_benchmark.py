@@ -0,0 +1,362 @@
+"""
+Benchmark de todas as rotas da API (tasks/urls.py e users/urls.py).
+
+Cada cenário é uma rota + método, com o corpo e os dados de que precisa.
+O comando `benchmark_endpoints` popula um banco descartável, roda cada
+cenário com vários clientes simultâneos (threads com o APIClient, dentro
+do processo) e mede por cenário:
+- latência p50/p95/p99 (ms)
+- requisições por segundo
+- consultas SQL por requisição
+
+O que cada requisição precisa e que não deve entrar na medida (criar a
+tarefa que vai ser apagada, gerar um refresh token novo...) roda no
+`build` do cenário, fora do cronômetro e da contagem de consultas.
+
+Rotas sem cenário quebram o teste de cobertura (tasks/tests.py): rota
+nova precisa de cenário novo, ou de um motivo em EXCLUDED_ROUTES.
+"""
+import itertools
+import random
+import statistics
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import URLResolver, resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks import urls as task_urls
+from users import urls as user_urls
+from users.models import PasswordResetToken
+
+from .models import Task
+
+User = get_user_model()
+
+PASSWORD = 'SenhaDoBenchmark123'
+OTHER_PASSWORD = 'OutraSenhaDoBenchmark456'
+BULK_SIZE = 20
+
+# Rotas que não dá para medir como requisição/resposta
+EXCLUDED_ROUTES = {
+    ('tasks:task-events', 'GET'): 'stream SSE sem fim (veja o teste de carga do tasks/streams.py)',
+    ('tasks:api-root', 'GET'): 'encoberta pela listagem (GET /api/tasks/)',
+}
+
+
+def api_routes():
+    """Pares (nome da rota, método) de tasks/urls.py e users/urls.py."""
+    routes = set()
+    for module in (task_urls, user_urls):
+        for name, callback in _walk(module.urlpatterns, module.app_name):
+            actions = getattr(callback, 'actions', None)
+            view_class = getattr(callback, 'view_class', None)
+            if actions:
+                # O DRF acrescenta 'head' ao dicionário na primeira requisição GET
+                methods = [m for m in actions if m not in ('head', 'options')]
+            elif view_class is not None:
+                methods = [m for m in view_class.http_method_names
+                           if m not in ('head', 'options') and hasattr(view_class, m)]
+            else:
+                methods = ['get']
+            routes.update((name, method.upper()) for method in methods)
+    return routes
+
+
+def _walk(patterns, namespace, prefix=''):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns, namespace, prefix + str(pattern.pattern))
+        elif 'format' not in prefix + str(pattern.pattern):  # variantes .json/.api do DRF
+            yield f'{namespace}:{pattern.name}', pattern.callback
+
+
+class Context:
+    """Dados populados compartilhados pelos cenários."""
+
+    def __init__(self, user_ids, admin, seed=42):
+        self.user_ids = user_ids
+        self.admin = admin
+        self.seed = seed
+        self.counter = itertools.count()
+        self.day = timezone.localdate() - timedelta(days=180)
+
+    def unique(self):
+        return next(self.counter)
+
+
+class ClientState:
+    """Um cliente simultâneo: usuário, APIClient e dados próprios."""
+
+    def __init__(self, index, user, context):
+        self.index = index
+        self.user = user
+        self.context = context
+        self.rng = random.Random(context.seed + index)
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+        self.password = PASSWORD
+        self.transition = 'pending'
+        self.task_ids = list(
+            Task.objects.filter(user=user).order_by('-id').values_list('id', flat=True)[:200]
+        ) or [self.new_task()]
+
+    def task_id(self):
+        return self.rng.choice(self.task_ids)
+
+    def new_task(self, title='Tarefa do benchmark'):
+        return Task.objects.create(user=self.user, assigned_to=self.user, title=title).pk
+
+    def new_tasks(self, count):
+        return [self.new_task() for _ in range(count)]
+
+
+class Scenario:
+    """
+    Uma rota medida.
+
+    `build(state)` devolve (caminho, corpo) de uma requisição e roda fora
+    da medida. `share` reduz o número de requisições de cenários caros
+    (hash de senha). `anonymous` e `admin` escolhem o cliente.
+    """
+
+    def __init__(self, name, method, build, expect=(200,), share=1.0, anonymous=False, admin=False):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.expect = expect
+        self.share = share
+        self.anonymous = anonymous
+        self.admin = admin
+
+    def route(self, state):
+        path, _ = self.build(state)
+        match = resolve(path.split('?')[0])
+        return f'{match.namespace}:{match.url_name}', self.method.upper()
+
+
+def _task_payload(state):
+    return {'title': f'Tarefa {state.context.unique()}', 'description': 'Criada pelo benchmark',
+            'assigned_to': state.rng.choice(state.context.user_ids)}
+
+
+def _new_username(state):
+    return f'bench_new_{state.index}_{state.context.unique()}'
+
+
+def _new_user_payload(state):
+    username = _new_username(state)
+    return {'username': username, 'email': f'{username}@example.com'}
+
+
+def _change_password(state):
+    old, new = state.password, (OTHER_PASSWORD if state.password == PASSWORD else PASSWORD)
+    state.password = new
+    return '/api/auth/change-password/', {
+        'old_password': old, 'new_password': new, 'new_password_confirm': new,
+    }
+
+
+def _reset_password(state):
+    token = PasswordResetToken.create_for_user(state.user)
+    state.password = PASSWORD
+    return '/api/auth/reset-password/', {
+        'token': token.token, 'new_password': PASSWORD, 'new_password_confirm': PASSWORD,
+    }
+
+
+def _deactivate_user(state):
+    username = _new_username(state)
+    user = User.objects.create(username=username, email=f'{username}@example.com', password='!')
+    return f'/api/auth/users/{user.pk}/', None
+
+
+def _bulk_transition(state):
+    state.transition = 'pending' if state.transition == 'completed' else 'completed'
+    day = state.context.day + timedelta(days=state.rng.randint(0, 30))
+    return f'/api/tasks/bulk-transition/?user={state.user.pk}&created_at={day}', {'status': state.transition}
+
+
+SCENARIOS = [
+    # Tarefas: leitura
+    Scenario('tasks-list', 'get', lambda s: ('/api/tasks/', None)),
+    Scenario('tasks-list-cursor', 'get', lambda s: ('/api/tasks/?pagination=cursor', None)),
+    Scenario('tasks-list-filtered', 'get', lambda s: (
+        f'/api/tasks/?status=pending&created_at_gte={s.context.day}&ordering=-updated_at', None)),
+    Scenario('tasks-list-search', 'get', lambda s: ('/api/tasks/?search=relatório', None)),
+    Scenario('tasks-retrieve', 'get', lambda s: (f'/api/tasks/{s.task_id()}/', None)),
+    Scenario('tasks-stats', 'get', lambda s: ('/api/tasks/stats/', None)),
+    Scenario('tasks-changes', 'get', lambda s: ('/api/tasks/changes/', None)),
+    Scenario('tasks-events-ticket', 'post', lambda s: ('/api/tasks/events/ticket/', None)),
+    Scenario('tasks-export', 'get', lambda s: ('/api/tasks/export/?output=csv&status=pending', None), share=0.1),
+    # Tarefas: escrita
+    Scenario('tasks-create', 'post', lambda s: ('/api/tasks/', _task_payload(s)), expect=(201,)),
+    Scenario('tasks-update', 'put', lambda s: (f'/api/tasks/{s.task_id()}/', _task_payload(s))),
+    Scenario('tasks-partial-update', 'patch', lambda s: (
+        f'/api/tasks/{s.task_id()}/', {'description': f'Editada {s.context.unique()}'})),
+    Scenario('tasks-delete', 'delete', lambda s: (f'/api/tasks/{s.new_task()}/', None), expect=(204,)),
+    Scenario('tasks-complete', 'post', lambda s: (f'/api/tasks/{s.task_id()}/complete/', None)),
+    Scenario('tasks-reopen', 'post', lambda s: (f'/api/tasks/{s.task_id()}/reopen/', None)),
+    Scenario('tasks-bulk-create', 'post', lambda s: (
+        '/api/tasks/bulk-create/', [_task_payload(s) for _ in range(BULK_SIZE)]), expect=(200, 201, 207)),
+    Scenario('tasks-bulk-update', 'post', lambda s: ('/api/tasks/bulk-update/', [
+        {'id': pk, 'description': f'Lote {s.context.unique()}'}
+        for pk in s.rng.sample(s.task_ids, min(BULK_SIZE, len(s.task_ids)))
+    ]), expect=(200, 207)),
+    Scenario('tasks-bulk-complete', 'post', lambda s: (
+        '/api/tasks/bulk-complete/', {'ids': s.rng.sample(s.task_ids, min(BULK_SIZE, len(s.task_ids)))}),
+        expect=(200, 207)),
+    Scenario('tasks-bulk-delete', 'post', lambda s: (
+        '/api/tasks/bulk-delete/', {'ids': s.new_tasks(BULK_SIZE)}), expect=(200, 207)),
+    Scenario('tasks-bulk-transition', 'post', _bulk_transition),
+    # Usuários
+    Scenario('users-root', 'get', lambda s: ('/api/auth/', None)),
+    Scenario('users-list', 'get', lambda s: ('/api/auth/users/', None)),
+    Scenario('users-picker', 'get', lambda s: (f'/api/auth/users/picker/?q=bench{s.rng.randint(1, 99)}', None)),
+    Scenario('users-retrieve', 'get', lambda s: (f'/api/auth/users/{s.rng.choice(s.context.user_ids)}/', None)),
+    Scenario('users-create', 'post', lambda s: ('/api/auth/users/', _new_user_payload(s)), expect=(201,)),
+    Scenario('users-update', 'put', lambda s: (f'/api/auth/users/{s.user.pk}/', {
+        'username': s.user.username, 'email': s.user.email, 'first_name': f'Nome {s.context.unique()}'})),
+    Scenario('users-partial-update', 'patch', lambda s: (
+        f'/api/auth/users/{s.user.pk}/', {'last_name': f'Sobrenome {s.context.unique()}'})),
+    Scenario('users-deactivate', 'delete', _deactivate_user, admin=True),
+    Scenario('profile', 'get', lambda s: ('/api/auth/profile/', None)),
+    Scenario('profile-update', 'put', lambda s: ('/api/auth/profile/', {
+        'username': s.user.username, 'email': s.user.email, 'first_name': f'Nome {s.context.unique()}'})),
+    Scenario('profile-partial-update', 'patch', lambda s: (
+        '/api/auth/profile/', {'last_name': f'Sobrenome {s.context.unique()}'})),
+    Scenario('hashing-metrics', 'get', lambda s: ('/api/auth/hashing-metrics/', None), admin=True),
+    # Autenticação (hash de senha: poucas requisições)
+    Scenario('login', 'post', lambda s: (
+        '/api/auth/login/', {'username': s.user.username, 'password': s.password}),
+        share=0.1, anonymous=True),
+    Scenario('token-refresh', 'post', lambda s: (
+        '/api/auth/token/refresh/', {'refresh': str(RefreshToken.for_user(s.user))}), anonymous=True),
+    Scenario('register', 'post', lambda s: ('/api/auth/register/', {
+        **_new_user_payload(s), 'password': PASSWORD, 'password_confirm': PASSWORD,
+    }), expect=(201,), share=0.1, anonymous=True),
+    Scenario('change-password', 'post', _change_password, share=0.1),
+    Scenario('request-password-reset', 'post', lambda s: (
+        '/api/auth/request-password-reset/', {'email': s.user.email}), anonymous=True),
+    Scenario('reset-password', 'post', _reset_password, share=0.1, anonymous=True),
+]
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+def run_scenario(scenario, states, requests, warmup=2):
+    """
+    Roda `requests` requisições do cenário divididas entre os clientes.
+
+    Retorna as métricas do cenário (latências em ms).
+    """
+    per_client = max(1, round(requests * scenario.share / len(states)))
+    latencies, queries, errors = [], [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(len(states))
+
+    def worker(state):
+        client = APIClient() if scenario.anonymous else state.client
+        if scenario.admin:
+            client = APIClient()
+            client.force_authenticate(user=state.context.admin)
+        method = getattr(client, scenario.method)
+        own_latencies, own_queries, own_errors = [], [], []
+        count = [0]
+
+        def counter(execute, sql, params, many, context):
+            count[0] += 1
+            return execute(sql, params, many, context)
+
+        try:
+            for number in range(warmup + per_client):
+                if number == warmup:
+                    barrier.wait()
+                path, data = scenario.build(state)
+                count[0] = 0
+                with connection.execute_wrapper(counter):
+                    start = time.perf_counter()
+                    try:
+                        response = method(path, data, format='json') if data is not None else method(path)
+                        if response.streaming:
+                            # Exportação: mede até o último byte
+                            for _ in response.streaming_content:
+                                pass
+                        status = response.status_code
+                    except Exception:
+                        # O APIClient repassa as exceções da view: seria um 500
+                        status = 500
+                    elapsed = (time.perf_counter() - start) * 1000
+                if number < warmup:
+                    continue
+                own_latencies.append(elapsed)
+                own_queries.append(count[0])
+                if status not in scenario.expect:
+                    own_errors.append(status)
+        except Exception:
+            # Falha no build: libera os outros clientes presos na barreira
+            barrier.abort()
+            raise
+        finally:
+            connection.close()
+            with lock:
+                latencies.extend(own_latencies)
+                queries.extend(own_queries)
+                errors.extend(own_errors)
+
+    threads = [threading.Thread(target=worker, args=(state,)) for state in states]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_statuses': sorted(set(errors)),
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        # Inclui o build e o aquecimento: é a vazão vista pelos clientes
+        'rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else 0.0,
+    }
+
+
+def compare(baseline, current, threshold=0.25, min_ms=2.0):
+    """
+    Compara duas execuções (o dict 'results' do JSON).
+
+    Regressão: p50 ou p95 acima de (1 + threshold) vezes a base (ignorando
+    diferenças menores que `min_ms`), vazão abaixo de (1 - threshold) vezes
+    a base, ou mais consultas por requisição. O p99 aparece no relatório
+    mas não conta: com poucas centenas de amostras é quase o máximo, e
+    varia demais entre execuções. Tempo depende da máquina; consultas por
+    requisição não, então são o sinal mais confiável.
+
+    Retorna uma lista de (cenário, métrica, base, atual).
+    """
+    regressions = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            if result[metric] > base[metric] * (1 + threshold) and result[metric] - base[metric] >= min_ms:
+                regressions.append((name, metric, base[metric], result[metric]))
+        if result['rps'] < base['rps'] * (1 - threshold):
+            regressions.append((name, 'rps', base['rps'], result['rps']))
+        if result['queries_per_request'] > base['queries_per_request'] + 0.5:
+            regressions.append((name, 'queries_per_request', base['queries_per_request'], result['queries_per_request']))
+    return regressions
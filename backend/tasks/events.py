@@ -0,0 +1,184 @@
+"""
+Notificações em tempo real das mudanças de tarefas.
+
+Quando uma tarefa é criada, editada, concluída, reaberta ou apagada, o
+criador e o designado recebem um evento pelo stream
+GET /api/tasks/events/ (Server-Sent Events, veja views.task_events).
+
+Os eventos passam por um broker:
+- publish(user_ids, event): chamado pelo código síncrono (sinais, views),
+  depois do COMMIT da transação
+- subscribe(user_id): chamado pelo stream, devolve uma Subscription com
+  uma fila asyncio
+
+O broker padrão (InProcessBroker) entrega só para as conexões do próprio
+processo. Com mais de um processo, configure em settings.TASK_EVENTS_BROKER
+um backend que repasse os eventos entre eles (ex.: Redis pub/sub) com a
+mesma interface.
+
+Cada conexão é uma corrotina esperando na sua fila, sem thread própria,
+então um processo ASGI (uvicorn, daphne) segura milhares de conexões
+paradas.
+"""
+import asyncio
+import functools
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ['created', 'updated', 'completed', 'reopened', 'deleted', 'bulk_transition']
+
+
+class Subscription:
+    """
+    Conexão de um usuário com o broker.
+
+    Os eventos chegam numa fila asyncio do loop da conexão. Se a fila
+    encher (cliente lento), os eventos seguintes são descartados e
+    `overflowed` fica True: o cliente deve sincronizar por /changes/.
+    """
+
+    def __init__(self, broker, user_id, loop, max_queue):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def deliver(self, event):
+        """Entrega um evento; pode ser chamado de qualquer thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # Loop já fechado: a conexão acabou
+            self.close()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout=None):
+        """Espera o próximo evento; retorna None se passar do timeout."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker:
+    """Interface dos brokers de eventos."""
+
+    def publish(self, user_ids, event):
+        raise NotImplementedError
+
+    def subscribe(self, user_id):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """Entrega os eventos para as conexões abertas neste processo."""
+    max_queue = 100
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_ids, event):
+        with self._lock:
+            targets = [
+                subscription
+                for user_id in set(user_ids)
+                for subscription in self._subscriptions.get(user_id, ())
+            ]
+        for subscription in targets:
+            subscription.deliver(event)
+
+    def subscribe(self, user_id):
+        """Abre uma Subscription; deve ser chamado dentro do loop da conexão."""
+        subscription = Subscription(self, user_id, asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+@functools.lru_cache(maxsize=None)
+def get_broker():
+    """Broker configurado em settings.TASK_EVENTS_BROKER (um por processo)."""
+    path = getattr(settings, 'TASK_EVENTS_BROKER', 'tasks.events.InProcessBroker')
+    return import_string(path)()
+
+
+@receiver(setting_changed)
+def reset_broker(setting, **kwargs):
+    if setting == 'TASK_EVENTS_BROKER':
+        get_broker.cache_clear()
+
+
+def task_payload(task):
+    """Dados da tarefa que vão no evento (sem consultas extras)."""
+    return {
+        'id': task.pk,
+        'user': task.user_id,
+        'assigned_to': task.assigned_to_id,
+        'title': task.title,
+        'status': task.status,
+        'updated_at': task.updated_at.isoformat() if task.updated_at else None,
+    }
+
+
+def publish(user_ids, event):
+    """Publica o evento depois do COMMIT da transação atual."""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    def send():
+        try:
+            get_broker().publish(user_ids, event)
+        except Exception:
+            # Notificação é "melhor esforço": nunca derruba a escrita
+            logger.exception('Erro ao publicar evento de tarefa')
+    transaction.on_commit(send)
+
+
+def publish_task_event(event_type, task):
+    """Avisa o criador e o designado de uma mudança na tarefa."""
+    publish(
+        {task.user_id, task.assigned_to_id},
+        {'type': event_type, 'task': task_payload(task)},
+    )
+
+
+def status_event_type(old_status, new_status):
+    """Tipo do evento de uma edição: completed/reopened se o status mudou."""
+    if old_status != new_status:
+        return 'completed' if new_status == 'completed' else 'reopened'
+    return 'updated'
@@ -0,0 +1,123 @@
+"""
+Exportação das tarefas em CSV ou NDJSON (GET /api/tasks/export/).
+
+A resposta é um StreamingHttpResponse. As tarefas são lidas com
+iterator(chunk_size=EXPORT_CHUNK_SIZE): no PostgreSQL é um cursor do lado
+do servidor, no SQLite o cursor é lido aos poucos (fetchmany). As linhas
+são escritas em blocos à medida que chegam, então a memória não depende do
+tamanho do resultado e o primeiro byte sai sem esperar a consulta inteira.
+
+As colunas são as do TaskSerializer, com os mesmos valores; cada linha é
+montada direto de uma tupla (values_list), sem instanciar a tarefa nem o
+serializer (que custariam mais que a leitura da linha).
+"""
+import csv
+import io
+import json
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from .querysets import TaskUnion, ordering_keys
+from .serializers import TaskSerializer
+
+EXPORT_FIELDS = TaskSerializer.Meta.fields
+EXPORT_CHUNK_SIZE = 2000
+# Linhas acumuladas antes de cada envio
+LINES_PER_WRITE = 500
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+# Textos começando com estes caracteres viram fórmulas no Excel/LibreOffice
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Colunas lidas do banco, na ordem de EXPORT_FIELDS (sem o 'completed',
+# calculado pelo status)
+VALUE_FIELDS = [
+    'id', 'user__username', 'assigned_to', 'assigned_to__username', 'title', 'description',
+    'status', 'created_at', 'updated_at', 'completed_at',
+]
+
+
+def export_values(queryset):
+    """
+    Troca as instâncias por tuplas (values_list), bem mais baratas de montar.
+
+    As colunas da ordenação que não estão em VALUE_FIELDS (ex.: search_rank)
+    vão no fim da tupla: o UNION ALL dos ramos só ordena por colunas
+    selecionadas.
+    """
+    source = queryset.branches[0] if isinstance(queryset, TaskUnion) else queryset
+    extra = [name for name, _ in ordering_keys(source) if name not in VALUE_FIELDS]
+    return queryset.values_list(*VALUE_FIELDS, *extra)
+
+
+def iterate(queryset, tz, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Linhas com os valores do TaskSerializer, lidas em blocos de `chunk_size`
+    tarefas. As datas saem no fuso `tz`, como no serializer.
+    """
+    to_representation = serializers.DateTimeField(default_timezone=tz).to_representation
+    rows = export_values(queryset).iterator(chunk_size=chunk_size)
+    for (pk, username, assigned_to, assigned_to_username, title, description,
+         status, created_at, updated_at, completed_at, *_) in rows:
+        yield [
+            pk, username, assigned_to, assigned_to_username, title, description, status,
+            status == 'completed',
+            to_representation(created_at),
+            to_representation(updated_at),
+            to_representation(completed_at) if completed_at else None,
+        ]
+
+
+def safe_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_stream(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    # O cabeçalho sai antes da consulta, para o cliente começar a receber
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    pending = 0
+    for row in rows:
+        writer.writerow([safe_cell(value) for value in row])
+        pending += 1
+        if pending == LINES_PER_WRITE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue()
+
+
+def ndjson_stream(rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False))
+        if len(lines) == LINES_PER_WRITE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+STREAMS = {
+    'csv': csv_stream,
+    'ndjson': ndjson_stream,
+}
+
+
+def export_stream(queryset, output):
+    """Conteúdo da exportação no formato `output` ('csv' ou 'ndjson')."""
+    # O gerador roda depois da view: o fuso da requisição é lido agora
+    return STREAMS[output](iterate(queryset, timezone.get_current_timezone()))
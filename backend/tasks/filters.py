@@ -1,5 +1,48 @@
+from datetime import datetime, time, timedelta
+
 import django_filters
+from django.utils import timezone
+from django_filters.constants import EMPTY_VALUES
+from rest_framework import filters
+from rest_framework.settings import api_settings
 from .models import Task
+from .search import get_search_backend
+
+
+class LocalDateFilter(django_filters.DateFilter):
+    """
+    Filtra um DateTimeField por data (YYYY-MM-DD) no fuso local.
+    
+    Em vez de usar __date (que no SQLite chama uma função Python em cada
+    linha e não usa índice), converte a data num intervalo meio-aberto de
+    datetimes [início do dia, início do dia seguinte) na coluna original.
+    
+    lookup_expr define o tipo de comparação:
+    - 'exact': só o dia informado
+    - 'gte': a partir do dia informado
+    - 'lte': até o fim do dia informado
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        
+        start = self.start_of_day(value)
+        end = self.start_of_day(value + timedelta(days=1))
+        
+        if self.lookup_expr == 'gte':
+            lookups = {f'{self.field_name}__gte': start}
+        elif self.lookup_expr == 'lte':
+            lookups = {f'{self.field_name}__lt': end}
+        else:
+            lookups = {f'{self.field_name}__gte': start, f'{self.field_name}__lt': end}
+        
+        qs = self.get_method(qs)(**lookups)
+        return qs.distinct() if self.distinct else qs
+
+    @staticmethod
+    def start_of_day(value):
+        return timezone.make_aware(datetime.combine(value, time.min))
 
 
 class TaskFilter(django_filters.FilterSet):
@@ -11,16 +54,69 @@ class TaskFilter(django_filters.FilterSet):
     - created_at: data exata de criação (formato: YYYY-MM-DD)
     - created_at_gte: tarefas criadas a partir desta data
     - created_at_lte: tarefas criadas até esta data
+    - completed_at_gte / completed_at_lte: intervalo da data de conclusão
+    - updated_at_gte: tarefas alteradas a partir deste momento (ISO 8601)
+    - assigned_to: id do usuário designado
+    - user: id do criador
+    
+    Todos os filtros usam as colunas originais, então aproveitam os índices.
     
     Exemplos de uso:
     - /api/tasks/?status=pending
     - /api/tasks/?created_at_gte=2024-01-01&created_at_lte=2024-12-31
+    - /api/tasks/?assigned_to=3&completed_at_gte=2024-06-01
     """
     status = django_filters.ChoiceFilter(choices=Task.STATUS_CHOICES)
-    created_at = django_filters.DateFilter(field_name='created_at', lookup_expr='date')
-    created_at_gte = django_filters.DateFilter(field_name='created_at', lookup_expr='date__gte')
-    created_at_lte = django_filters.DateFilter(field_name='created_at', lookup_expr='date__lte')
+    created_at = LocalDateFilter(field_name='created_at', lookup_expr='exact')
+    created_at_gte = LocalDateFilter(field_name='created_at', lookup_expr='gte')
+    created_at_lte = LocalDateFilter(field_name='created_at', lookup_expr='lte')
+    completed_at_gte = LocalDateFilter(field_name='completed_at', lookup_expr='gte')
+    completed_at_lte = LocalDateFilter(field_name='completed_at', lookup_expr='lte')
+    updated_at_gte = django_filters.IsoDateTimeFilter(field_name='updated_at', lookup_expr='gte')
+    assigned_to = django_filters.NumberFilter(field_name='assigned_to')
+    user = django_filters.NumberFilter(field_name='user')
 
     class Meta:
         model = Task
-        fields = ['status', 'created_at', 'created_at_gte', 'created_at_lte']
+        fields = [
+            'status', 'created_at', 'created_at_gte', 'created_at_lte',
+            'completed_at_gte', 'completed_at_lte', 'updated_at_gte',
+            'assigned_to', 'user',
+        ]
+
+
+class TaskSearchFilter(filters.SearchFilter):
+    """
+    Busca por título e descrição usando o índice full-text (veja tasks/search.py).
+    
+    Quando o índice não está disponível, usa o SearchFilter padrão (LIKE).
+    Sem ?ordering=, os resultados vêm ordenados por relevância.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        backend = get_search_backend() if terms else None
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+        
+        queryset = backend.filter(queryset, terms)
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = backend.annotate_rank(queryset, terms)
+        return queryset
+
+
+class TaskOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter que ordena por relevância quando há uma busca ativa
+    e o cliente não escolheu outra ordenação.
+    """
+
+    def get_default_ordering(self, view):
+        ordering = super().get_default_ordering(view)
+        if getattr(self, 'ranked', False):
+            return ['search_rank', *(ordering or [])]
+        return ordering
+
+    def filter_queryset(self, request, queryset, view):
+        self.ranked = 'search_rank' in queryset.query.annotations
+        return super().filter_queryset(request, queryset, view)
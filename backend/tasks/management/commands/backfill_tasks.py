@@ -0,0 +1,79 @@
+"""
+Correções de dados nas tarefas, em lotes e retomáveis (tasks/backfill.py).
+
+Backfills disponíveis:
+- completed_at: concluídas sem data ganham a data da última atualização e
+  pendentes perdem a data (a regra do Task.sync_completed_at, para tarefas
+  gravadas por fora do save()). O updated_at é renovado para a mudança
+  chegar ao app pela sincronização
+
+Cada lote é um UPDATE com commit próprio; o progresso fica salvo e, se o
+comando for interrompido, rodar de novo continua de onde parou. Um
+backfill concluído só roda de novo com --reset.
+
+Execute com: python manage.py backfill_tasks completed_at --batch-size 5000 --pause 0.1
+Para ver o progresso salvo: python manage.py backfill_tasks --status
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Q
+from django.utils import timezone
+
+from tasks.backfill import checkpoints, run_backfill
+from tasks.models import Task
+
+
+def completed_at_backfill():
+    missing = Q(status='completed', completed_at__isnull=True)
+    stale = Q(status='pending', completed_at__isnull=False)
+
+    def apply(tasks):
+        now = timezone.now()
+        # No SET, updated_at do lado direito ainda é o valor antigo
+        return (
+            tasks.filter(missing).update(completed_at=F('updated_at'), updated_at=now)
+            + tasks.filter(stale).update(completed_at=None, updated_at=now)
+        )
+    return Task.objects.filter(missing | stale), apply
+
+
+BACKFILLS = {
+    'completed_at': completed_at_backfill,
+}
+
+
+class Command(BaseCommand):
+    help = 'Executa correções de dados nas tarefas em lotes, com checkpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('backfill', nargs='?', choices=sorted(BACKFILLS))
+        parser.add_argument('--batch-size', type=int, default=1000, help='Linhas por lote (um commit cada)')
+        parser.add_argument('--pause', type=float, default=0.0, help='Segundos de espera entre os lotes')
+        parser.add_argument('--reset', action='store_true', help='Ignora o progresso salvo e começa do zero')
+        parser.add_argument('--status', action='store_true', help='Mostra o progresso salvo dos backfills')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            return self.show_status()
+        if not options['backfill']:
+            raise CommandError(f"Informe o backfill: {', '.join(sorted(BACKFILLS))}.")
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size precisa ser maior que zero.')
+
+        queryset, apply = BACKFILLS[options['backfill']]()
+        total = run_backfill(
+            queryset, apply,
+            name=f"tasks.{options['backfill']}",
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            reset=options['reset'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f'{total} tarefas corrigidas.'))
+
+    def show_status(self):
+        saved = checkpoints()
+        if not saved:
+            self.stdout.write('Nenhum backfill registrado.')
+        for name, last_pk, rows, finished, updated_at in saved:
+            state = 'concluído' if finished else f'parado depois do pk {last_pk}'
+            self.stdout.write(f'{name}: {state}, {rows} linhas, atualizado em {updated_at}')
@@ -0,0 +1,133 @@
+"""
+Mede todas as rotas da API com clientes simultâneos e compara com uma base.
+
+Num banco de teste descartável, popula --users usuários e --tasks tarefas
+(designados com distribuição de Zipf, --skew) e roda cada cenário de
+tasks/endpoint_benchmark.py com --clients threads. Mostra p50/p95/p99,
+requisições por segundo e consultas por requisição.
+
+--output grava o resultado em JSON (a base); --compare lê uma base e
+falha (código de saída 1) se algum cenário piorou mais que --threshold.
+Os tempos só são comparáveis na mesma máquina, parada e com os mesmos
+parâmetros; consultas por requisição são exatas em qualquer lugar.
+
+Execute com: python manage.py benchmark_endpoints --users 10000 --tasks 1000000 --output base.json
+Depois de uma mudança: python manage.py benchmark_endpoints --users 10000 --tasks 1000000 --compare base.json
+"""
+import json
+import logging
+import platform
+import sqlite3
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from tasks.benchmark import benchmark_database, seed_dataset, unthrottled
+from tasks.endpoint_benchmark import (
+    EXCLUDED_ROUTES, PASSWORD, SCENARIOS, ClientState, Context, api_routes, compare, run_scenario,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Mede latência, vazão e consultas de todas as rotas da API (com comparação com uma base).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--tasks', type=int, default=1_000_000)
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='Expoente de Zipf dos designados (0 = uniforme)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--clients', type=int, default=4, help='Clientes simultâneos (threads)')
+        parser.add_argument('--requests', type=int, default=200, help='Requisições por cenário')
+        parser.add_argument('--only', default='',
+                            help='Só os cenários com estes prefixos, separados por vírgula')
+        parser.add_argument('--output', help='Grava o resultado neste arquivo JSON')
+        parser.add_argument('--compare', help='Compara com a base deste arquivo JSON')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Piora tolerada na comparação (0.25 = 25%%)')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as file:
+                baseline = json.load(file)
+
+        missing = api_routes() - {route for route in EXCLUDED_ROUTES}
+        prefixes = [p for p in options['only'].split(',') if p]
+        scenarios = [s for s in SCENARIOS if not prefixes or s.name.startswith(tuple(prefixes))]
+
+        with benchmark_database(on_disk=True), override_settings(ALLOWED_HOSTS=['*']), unthrottled():
+            start = time.perf_counter()
+            user_ids = seed_dataset(
+                users=options['users'], tasks=options['tasks'], seed=options['seed'],
+                assignee_skew=options['skew'],
+                log=lambda msg: self.stdout.write(f'  {msg}'), log_every=100_000,
+            )
+            # Um hash só para todos: o login dos cenários usa PASSWORD
+            User.objects.update(password=make_password(PASSWORD))
+            admin = User.objects.create_superuser('bench_admin', 'admin@example.com', PASSWORD)
+            self.stdout.write(f'Banco populado em {time.perf_counter() - start:.1f}s.')
+
+            context = Context(user_ids, admin, options['seed'])
+            # O primeiro cliente é o usuário "pesado" do seed_dataset
+            users = User.objects.in_bulk(user_ids[:options['clients']])
+            states = [ClientState(i, users[pk], context) for i, pk in enumerate(user_ids[:options['clients']])]
+            connection.close()
+
+            results = {}
+            # Os logs das views (4xx, tokens gerados...) atrapalham a tabela
+            logging.disable(logging.WARNING)
+            try:
+                for scenario in scenarios:
+                    missing.discard(scenario.route(states[0]))
+                    results[scenario.name] = run_scenario(scenario, states, options['requests'])
+                    self.report(scenario.name, results[scenario.name])
+            finally:
+                logging.disable(logging.NOTSET)
+
+        for route, method in sorted(missing if not prefixes else ()):
+            self.stdout.write(self.style.WARNING(f'Rota sem cenário: {method} {route}'))
+
+        data = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'users': options['users'], 'tasks': options['tasks'], 'skew': options['skew'],
+                'seed': options['seed'], 'clients': options['clients'], 'requests': options['requests'],
+                'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version,
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Resultado gravado em {options['output']}."))
+
+        if baseline is not None:
+            self.compare(baseline, data, options['threshold'])
+
+    def report(self, name, result):
+        errors = f", {result['errors']} erros {result['error_statuses']}" if result['errors'] else ''
+        self.stdout.write(
+            f"{name:<26} {result['requests']:>5} req  p50 {result['p50_ms']:>8.1f}ms  "
+            f"p95 {result['p95_ms']:>8.1f}ms  p99 {result['p99_ms']:>8.1f}ms  "
+            f"{result['rps']:>7.1f} req/s  {result['queries_per_request']:>5.1f} consultas{errors}"
+        )
+
+    def compare(self, baseline, data, threshold):
+        meta = baseline.get('meta', {})
+        if any(meta.get(key) != data['meta'][key] for key in ('users', 'tasks', 'skew', 'clients')):
+            self.stdout.write(self.style.WARNING('A base foi medida com outros volumes ou clientes.'))
+        regressions = compare(baseline['results'], data['results'], threshold)
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f'Nenhuma regressão acima de {threshold:.0%}.'))
+            return
+        for name, metric, base, current in regressions:
+            self.stdout.write(self.style.ERROR(f'{name}: {metric} {base} -> {current}'))
+        raise CommandError(f'{len(regressions)} regressões acima de {threshold:.0%}.')
@@ -0,0 +1,169 @@
+"""
+Mede escritas e leituras simultâneas na API de tarefas com dois perfis do
+SQLite, num banco de teste descartável em disco:
+- padrao: journal_mode=DELETE, transações DEFERRED, sem repetição
+  (a configuração antiga do DATABASES)
+- perfil: settings.SQLITE_PRAGMAS, transaction_mode e repetição com backoff
+  (config/database.py)
+
+Cada rodada dura --seconds segundos com --writers threads alternando
+complete/reopen (e criando uma tarefa a cada 10 escritas) e --readers
+threads lendo a listagem e o detalhe. Mostra por rodada as requisições,
+erros ("database is locked"), p50/p95/p99 e requisições por segundo.
+
+Execute com: python manage.py benchmark_sqlite_concurrency --writers 4 --readers 4
+"""
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from config.database import is_busy_error, pragma_status
+from tasks.benchmark import benchmark_database, seed_dataset, unthrottled
+from tasks.models import Task
+
+User = get_user_model()
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+class Command(BaseCommand):
+    help = 'Mede escritas e leituras simultâneas nas tarefas com e sem o perfil do SQLite.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--writers', type=int, default=4, help='Threads fazendo complete/reopen')
+        parser.add_argument('--readers', type=int, default=4, help='Threads lendo as tarefas')
+        parser.add_argument('--tasks', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Este benchmark compara perfis do SQLite.')
+
+        profile_options = dict(settings.DATABASES['default'].get('OPTIONS', {}))
+        rounds = [
+            ('padrao', {'init_command': 'PRAGMA journal_mode=DELETE'}, 0),
+            ('perfil', profile_options, getattr(settings, 'SQLITE_BUSY_RETRIES', 3)),
+        ]
+        with benchmark_database(on_disk=True), override_settings(ALLOWED_HOSTS=['*']), unthrottled():
+            user_ids = seed_dataset(users=200, tasks=options['tasks'])
+            users = list(User.objects.filter(id__in=user_ids[1:options['writers'] + options['readers'] + 1]))
+            writers, readers = users[:options['writers']], users[options['writers']:]
+            task_ids = {
+                user.pk: list(Task.objects.filter(user=user).values_list('id', flat=True)[:50])
+                for user in writers
+            }
+            readable = list(Task.objects.filter(user__in=readers).values_list('id', 'user_id')[:500])
+
+            original = connection.settings_dict['OPTIONS']
+            # Os erros esperados da rodada padrao são contados, não logados
+            request_logger = logging.getLogger('django.request')
+            request_logger.disabled = True
+            try:
+                for label, db_options, retries in rounds:
+                    # As threads abrem conexões novas com estas opções
+                    connection.close()
+                    connection.settings_dict['OPTIONS'] = db_options
+                    status = pragma_status()
+                    connection.close()
+                    with override_settings(SQLITE_BUSY_RETRIES=retries):
+                        result = self.run_round(writers, readers, task_ids, readable, options['seconds'])
+                    self.report(label, status, result, options['seconds'])
+            finally:
+                request_logger.disabled = False
+                connection.close()
+                connection.settings_dict['OPTIONS'] = original
+
+    def run_round(self, writers, readers, task_ids, readable, seconds):
+        stop = threading.Event()
+        lock = threading.Lock()
+        result = {
+            'write': [], 'read': [],
+            'errors': {'write': 0, 'read': 0}, 'locked': {'write': 0, 'read': 0},
+        }
+
+        def record(kind, started, ok, locked=False):
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                if ok:
+                    result[kind].append(elapsed)
+                else:
+                    result['errors'][kind] += 1
+                    result['locked'][kind] += locked
+
+        def call(kind, request):
+            started = time.perf_counter()
+            try:
+                response = request()
+            except OperationalError as exc:
+                record(kind, started, False, is_busy_error(exc))
+            else:
+                record(kind, started, response.status_code < 400)
+
+        def write(user, rng):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            ids = task_ids[user.pk]
+            count = 0
+            try:
+                while not stop.is_set():
+                    count += 1
+                    if count % 10 == 0:
+                        call('write', lambda: client.post('/api/tasks/', {
+                            'title': 'Tarefa do benchmark', 'assigned_to': user.pk,
+                        }))
+                        continue
+                    action = 'complete' if count % 2 else 'reopen'
+                    call('write', lambda: client.post(f'/api/tasks/{rng.choice(ids)}/{action}/'))
+            finally:
+                connection.close()
+
+        def read(user, rng):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            own = [pk for pk, owner in readable if owner == user.pk] or [pk for pk, _ in readable]
+            count = 0
+            try:
+                while not stop.is_set():
+                    count += 1
+                    if count % 2:
+                        call('read', lambda: client.get('/api/tasks/'))
+                    else:
+                        call('read', lambda: client.get(f'/api/tasks/{rng.choice(own)}/'))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=write, args=(user, random.Random(i))) for i, user in enumerate(writers)]
+        threads += [threading.Thread(target=read, args=(user, random.Random(100 + i))) for i, user in enumerate(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return result
+
+    def report(self, label, status, result, seconds):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+        self.stdout.write(
+            f"  journal_mode={status['journal_mode']} synchronous={status['synchronous']} "
+            f"busy_timeout={status['busy_timeout']}ms cache_size={status['cache_size']} "
+            f"mmap_size={status['mmap_size']}"
+        )
+        for kind, name in [('write', 'escritas'), ('read', 'leituras')]:
+            samples = sorted(result[kind])
+            self.stdout.write(
+                f"  {name}: {len(samples)} ok ({len(samples) / seconds:.0f}/s), "
+                f"{result['errors'][kind]} erros ({result['locked'][kind]} database is locked), "
+                f"p50 {percentile(samples, 0.50):.1f}ms, p95 {percentile(samples, 0.95):.1f}ms, "
+                f"p99 {percentile(samples, 0.99):.1f}ms"
+            )
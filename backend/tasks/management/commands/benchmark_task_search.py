@@ -0,0 +1,76 @@
+"""
+Compara a busca de tarefas com LIKE (SearchFilter padrão) e com FTS5.
+
+Para cada tamanho pedido, cria um banco de teste descartável, popula com
+dados sintéticos e mede a primeira página + COUNT de algumas buscas.
+
+Execute com: python manage.py benchmark_task_search --sizes 100000,1000000
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from tasks.benchmark import benchmark_database, measure, seed_dataset, vocabulary
+from tasks.querysets import TaskUnion, visibility_branches
+from tasks.search import get_search_backend
+from tasks.views import TaskViewSet
+
+
+def build_queries(seed):
+    """Buscas com palavras comuns, médias e raras do vocabulário sintético."""
+    words = vocabulary(seed)
+    return [
+        words[0],
+        words[100],
+        words[100][:4],
+        words[3000],
+        f'{words[10]} {words[200]}',
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Mede a latência da busca de tarefas com LIKE vs FTS5.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100000,1000000',
+                            help='Quantidades de tarefas, separadas por vírgula')
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        for size in sizes:
+            with benchmark_database():
+                backend = get_search_backend()
+                if backend is None:
+                    raise CommandError('Nenhum backend de busca full-text disponível neste banco.')
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{size} tarefas'))
+                user_ids = seed_dataset(users=options['users'], tasks=size, seed=options['seed'])
+                base = TaskViewSet().get_base_queryset()
+                typical = user_ids[len(user_ids) // 2]
+
+                for query in build_queries(options['seed']):
+                    terms = query.split()
+                    self.stdout.write(f'\n-- search="{query}"')
+                    for label, make in [
+                        ('admin ', lambda: base.all()),
+                        ('comum ', lambda: TaskUnion(visibility_branches(base, typical))),
+                    ]:
+                        like = self.like_queryset(make(), terms)
+                        fts = backend.annotate_rank(backend.filter(make(), terms), terms)
+                        like_time = measure(lambda: (like.count(), list(like.order_by('-created_at')[:20])),
+                                            options['repeat'])
+                        fts_time = measure(lambda: (fts.count(), list(fts.order_by('search_rank', '-created_at')[:20])),
+                                           options['repeat'])
+                        self.stdout.write(
+                            f"   {label} LIKE: média {like_time['mean_ms']} ms, p95 {like_time['p95_ms']} ms"
+                            f" | FTS5: média {fts_time['mean_ms']} ms, p95 {fts_time['p95_ms']} ms"
+                            f" ({like.count()} resultados)"
+                        )
+
+    def like_queryset(self, queryset, terms):
+        """Mesmo filtro que o SearchFilter do DRF gera para title e description."""
+        for term in terms:
+            queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+        return queryset
@@ -0,0 +1,139 @@
+"""
+Compara o filtro de visibilidade com OR (antes) e com UNION ALL (depois).
+
+Roda num banco de teste descartável, populado com dados sintéticos. Cada
+lado roda com os seus índices: o "antes" com os da migração 0006, (user,
+status) e (assigned_to, status), no lugar dos índices de visibilidade da
+0007; o "depois" com o esquema atual. Os demais índices da tabela ficam
+nos dois.
+
+Execute com: python manage.py benchmark_task_visibility --tasks 1000000
+"""
+import contextlib
+
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+from django.db.models import Q
+
+from tasks.benchmark import benchmark_database, measure, seed_dataset
+from tasks.models import Task
+from tasks.querysets import TaskUnion, visibility_branches
+from tasks.views import TaskViewSet
+
+SCENARIOS = [
+    (status, ordering)
+    for status in (None, 'pending')
+    for ordering in ('-created_at', '-updated_at', 'status')
+]
+
+# Índices da visibilidade antes da migração 0007
+BASELINE_INDEXES = [
+    models.Index(fields=['user', 'status'], name='tasks_task_user_id_c0fce1_idx'),
+    models.Index(fields=['assigned_to', 'status'], name='tasks_task_assigne_b3b2bc_idx'),
+]
+
+
+def visibility_indexes():
+    """Índices de Task.Meta criados pela 0007 (começam pelo usuário)."""
+    return [index for index in Task._meta.indexes if index.fields[0] in ('user', 'assigned_to')]
+
+
+@contextlib.contextmanager
+def baseline_indexes():
+    """Troca os índices de visibilidade pelos de antes da 0007 durante o bloco."""
+    swap_indexes(visibility_indexes(), BASELINE_INDEXES)
+    try:
+        yield
+    finally:
+        swap_indexes(BASELINE_INDEXES, visibility_indexes())
+
+
+def swap_indexes(remove, add):
+    with connection.schema_editor() as editor:
+        for index in remove:
+            editor.remove_index(Task, index)
+        for index in add:
+            editor.add_index(Task, index)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+class Command(BaseCommand):
+    help = 'Mede o plano e a latência da listagem de tarefas com OR vs UNION ALL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--tasks', type=int, default=1_000_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            self.stdout.write(f"Populando {options['users']} usuários e {options['tasks']} tarefas...")
+            user_ids = seed_dataset(
+                users=options['users'],
+                tasks=options['tasks'],
+                seed=options['seed'],
+                log=lambda msg: self.stdout.write(f'  {msg}'),
+                log_every=100_000,
+            )
+            targets = [('pesado', user_ids[0]), ('típico', user_ids[len(user_ids) // 2])]
+            base = TaskViewSet().get_base_queryset()
+            size = options['page_size']
+            cases = [
+                (label, user_id, status, ordering)
+                for label, user_id in targets
+                for status, ordering in SCENARIOS
+            ]
+
+            self.stdout.write('Medindo o antes (OR, índices da 0006)...')
+            with baseline_indexes():
+                before = [
+                    self.run_query(self.before_query(base, user_id, status, ordering), size, options['repeat'])
+                    for _, user_id, status, ordering in cases
+                ]
+            self.stdout.write('Medindo o depois (UNION ALL, índices atuais)...')
+            after = [
+                self.run_query(self.after_query(base, user_id, status, ordering), size, options['repeat'])
+                for _, user_id, status, ordering in cases
+            ]
+
+            current = None
+            for (label, user_id, status, ordering), before_result, after_result in zip(cases, before, after):
+                if label != current:
+                    current = label
+                    self.stdout.write('')
+                    self.stdout.write(self.style.MIGRATE_HEADING(f'Usuário {label} (id={user_id})'))
+                self.report(status, ordering, before_result, after_result)
+
+    def before_query(self, base, user_id, status, ordering):
+        filters = {'status': status} if status else {}
+        return base.filter(Q(user=user_id) | Q(assigned_to=user_id), **filters).order_by(ordering)
+
+    def after_query(self, base, user_id, status, ordering):
+        filters = {'status': status} if status else {}
+        return TaskUnion([
+            branch.filter(**filters).order_by(ordering)
+            for branch in visibility_branches(base, user_id)
+        ])
+
+    def run_query(self, queryset, size, repeat):
+        """Plano e tempos da primeira página."""
+        plan_source = queryset.combined() if isinstance(queryset, TaskUnion) else queryset
+        plan = plan_source[:size].explain()
+        return plan, measure(lambda: list(queryset[:size]), repeat)
+
+    def report(self, status, ordering, before, after):
+        (before_plan, before_time), (after_plan, after_time) = before, after
+        self.stdout.write(f"\n-- status={status or '*'} ordering={ordering}")
+        self.stdout.write(f"   antes (OR):   média {before_time['mean_ms']} ms, p95 {before_time['p95_ms']} ms")
+        self.stdout.write(f"   depois (UNION): média {after_time['mean_ms']} ms, p95 {after_time['p95_ms']} ms")
+        self.stdout.write('   plano antes:')
+        for line in before_plan.splitlines():
+            self.stdout.write(f'     {line}')
+        self.stdout.write('   plano depois:')
+        for line in after_plan.splitlines():
+            self.stdout.write(f'     {line}')
+        if 'TEMP B-TREE' in after_plan or ' SCAN ' in f' {after_plan} ':
+            self.stdout.write(self.style.WARNING('   aviso: o plano depois ainda ordena ou varre a tabela'))
@@ -0,0 +1,151 @@
+"""
+Gera dados para desenvolvimento e testes de carga.
+
+Presets:
+- demo: só o fixture de demonstração (admin, joao e maria com suas
+  tarefas), o mesmo do populate_data.py
+- small: 1.000 usuários e 100 mil tarefas
+- large: 5.000 usuários e 5 milhões de tarefas
+
+--users e --tasks substituem os números do preset. O fixture de
+demonstração entra em todos (--no-demo para pular).
+
+Os usuários sintéticos se chamam <prefix>0, <prefix>1, ... e têm todos a
+senha --password. A mesma --seed (com o mesmo --until) gera os mesmos
+usuários e tarefas. A carga soma ao que já existe no banco; para começar
+do zero rode antes `python manage.py flush`.
+
+As tarefas entram em lotes de --chunk-size linhas, com os índices de
+tasks_task e o índice de busca desligados; no fim eles são recriados, os
+contadores (TaskCounter) recalculados e o ANALYZE atualiza as estatísticas
+(veja tasks/synthetic.py).
+
+Execute com: python manage.py generate_data --preset large --seed 42
+"""
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from tasks.counters import rebuild_counters
+from tasks.models import Task
+from tasks.synthetic import (
+    DEMO_ADMIN, DEMO_USERS, deferred_indexes, deferred_search_index, generate_tasks, generate_users,
+    load_demo,
+)
+
+PRESETS = {
+    'demo': {'users': 0, 'tasks': 0},
+    'small': {'users': 1000, 'tasks': 100_000},
+    'large': {'users': 5000, 'tasks': 5_000_000},
+}
+PROGRESS_INTERVAL = 1.0
+
+
+class Command(BaseCommand):
+    help = 'Gera o fixture de demonstração e usuários e tarefas sintéticos a partir de uma semente.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', choices=sorted(PRESETS), default='demo')
+        parser.add_argument('--users', type=int, default=None, help='Usuários sintéticos (substitui o preset)')
+        parser.add_argument('--tasks', type=int, default=None, help='Tarefas sintéticas (substitui o preset)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Tarefas por INSERT/commit')
+        parser.add_argument('--prefix', default='user', help='Prefixo dos usernames sintéticos')
+        parser.add_argument('--password', default='senha123', help='Senha de todos os usuários sintéticos')
+        parser.add_argument('--until', default=None,
+                            help='Data (AAAA-MM-DD) da tarefa mais nova; padrão: hoje')
+        parser.add_argument('--no-demo', action='store_true', help='Não cria o fixture de demonstração')
+
+    def handle(self, *args, **options):
+        users = options['users'] if options['users'] is not None else PRESETS[options['preset']]['users']
+        tasks = options['tasks'] if options['tasks'] is not None else PRESETS[options['preset']]['tasks']
+        if tasks and not users:
+            raise CommandError('Tarefas sintéticas precisam de usuários sintéticos (--users).')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size precisa ser maior que zero.')
+        end = self.parse_until(options['until'])
+
+        if not options['no_demo']:
+            self.stdout.write(self.style.MIGRATE_HEADING('Fixture de demonstração'))
+            with transaction.atomic():
+                load_demo(log=self.stdout.write)
+
+        if users:
+            self.generate(users, tasks, end, options)
+
+        if not options['no_demo'] or users:
+            self.stdout.write('\nCredenciais de acesso:')
+        if not options['no_demo']:
+            self.stdout.write(f"  Superusuário: {DEMO_ADMIN['username']} | Password: {DEMO_ADMIN['password']}")
+            for user in DEMO_USERS:
+                self.stdout.write(f"  Username: {user['username']} | Password: {user['password']}")
+        if users:
+            self.stdout.write(
+                f"  Sintéticos: {options['prefix']}0 a {options['prefix']}{users - 1} | Password: {options['password']}"
+            )
+
+    def parse_until(self, value):
+        if value is None:
+            now = timezone.now()
+            return now.replace(hour=0, minute=0, second=0, microsecond=0)
+        try:
+            day = datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            raise CommandError('--until precisa estar no formato AAAA-MM-DD.')
+        return timezone.make_aware(day, timezone.get_default_timezone())
+
+    def generate(self, users, tasks, end, options):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{users} usuários sintéticos'))
+        start = time.perf_counter()
+        try:
+            user_ids = generate_users(users, seed=options['seed'], password=options['password'],
+                                      prefix=options['prefix'])
+        except IntegrityError:
+            raise CommandError(
+                f"Já existem usuários com o prefixo '{options['prefix']}'. "
+                'Use outro --prefix ou limpe o banco (python manage.py flush).'
+            )
+        self.stdout.write(f'  {len(user_ids)} usuários em {time.perf_counter() - start:.2f}s')
+
+        if tasks:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{tasks} tarefas sintéticas'))
+            with deferred_indexes(Task._meta.db_table) as indexes, deferred_search_index() as search:
+                start = time.perf_counter()
+                generate_tasks(user_ids, tasks, seed=options['seed'], end=end,
+                               batch_size=options['chunk_size'], progress=self.progress_reporter(start))
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f'  {tasks} tarefas em {elapsed:.2f}s ({tasks / elapsed:.0f} linhas/s)')
+                self.stdout.write(
+                    f"  Recriando {len(indexes)} índices{' e o índice de busca' if search else ''}..."
+                )
+                start = time.perf_counter()
+            self.stdout.write(f'  Índices recriados em {time.perf_counter() - start:.2f}s')
+
+        start = time.perf_counter()
+        with transaction.atomic():
+            rows = rebuild_counters()
+        self.stdout.write(f'  Contadores de {rows} usuários recalculados em {time.perf_counter() - start:.2f}s')
+
+        start = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(f'  ANALYZE em {time.perf_counter() - start:.2f}s')
+        self.stdout.write(self.style.SUCCESS('Dados sintéticos gerados.'))
+
+    def progress_reporter(self, start):
+        """Mostra o andamento no máximo uma vez por PROGRESS_INTERVAL segundos."""
+        last = [start]
+
+        def report(created, total):
+            now = time.perf_counter()
+            if created < total and now - last[0] < PROGRESS_INTERVAL:
+                return
+            last[0] = now
+            self.stdout.write(
+                f'  {created}/{total} tarefas ({created / total:.0%}), '
+                f'{created / max(now - start, 1e-9):.0f} linhas/s'
+            )
+        return report
@@ -0,0 +1,24 @@
+"""
+Apaga os registros de exclusão de tarefas mais antigos que a retenção.
+
+A sincronização incremental (GET /api/tasks/changes/) usa esses registros
+para avisar o app que uma tarefa foi apagada. Tokens mais antigos que a
+retenção (settings.TASK_TOMBSTONE_RETENTION_DAYS, padrão 30 dias) já
+recebem 410, então os registros podem ir embora.
+
+Execute com: python manage.py prune_task_tombstones
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.models import TaskTombstone
+from tasks.sync import tombstone_retention
+
+
+class Command(BaseCommand):
+    help = 'Apaga os registros de exclusão de tarefas mais antigos que a retenção.'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - tombstone_retention()
+        deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} registros de exclusão apagados.'))
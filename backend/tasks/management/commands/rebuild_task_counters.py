@@ -0,0 +1,29 @@
+"""
+Recalcula os contadores de tarefas por usuário (TaskCounter).
+
+Os contadores são mantidos a cada escrita de tarefa, mas escritas feitas
+por fora do ORM (SQL direto, QuerySet.update) não passam por eles. Este
+comando recalcula tudo a partir da tabela de tarefas.
+
+Execute com: python manage.py rebuild_task_counters
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tasks.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os contadores de tarefas por usuário.'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            rows = rebuild_counters()
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Contadores recalculados ({rows} usuários em {elapsed:.2f}s).'
+        ))
@@ -0,0 +1,29 @@
+"""
+Recria o índice full-text das tarefas (tabela FTS5 e triggers).
+
+Útil se uma migração recriou a tabela tasks_task e os triggers sumiram,
+ou para reconstruir o índice do zero.
+
+Execute com: python manage.py rebuild_task_search_index
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from tasks.search import install_sqlite_fts, uninstall_sqlite_fts
+
+
+class Command(BaseCommand):
+    help = 'Recria o índice full-text (FTS5) das tarefas.'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('O índice FTS5 só existe no SQLite.')
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            uninstall_sqlite_fts(cursor)
+            install_sqlite_fts(cursor)
+            cursor.execute('SELECT COUNT(*) FROM tasks_task')
+            total = cursor.fetchone()[0]
+        connection._tasks_fts_available = None
+
+        self.stdout.write(self.style.SUCCESS(f'Índice de busca recriado ({total} tarefas).'))
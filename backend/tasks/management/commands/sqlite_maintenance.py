@@ -0,0 +1,99 @@
+"""
+Manutenção do banco SQLite: estatísticas, espaço livre e checkpoint do WAL.
+
+- ANALYZE: atualiza as estatísticas que o planejador usa para escolher
+  índices (depois de cargas grandes ou mudanças de distribuição)
+- VACUUM incremental: devolve ao sistema até --vacuum-pages páginas livres,
+  sem reescrever o arquivo inteiro. Exige auto_vacuum=INCREMENTAL, que só
+  vale para o banco depois de um VACUUM completo (--enable-incremental-vacuum,
+  uma vez; trava o banco enquanto roda)
+- checkpoint do WAL: copia o WAL para o banco e, no modo TRUNCATE, zera o
+  arquivo -wal (que só cresce enquanto houver leitores ocupando o checkpoint)
+
+Execute com: python manage.py sqlite_maintenance
+Para repetir a cada hora: python manage.py sqlite_maintenance --every 3600
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+
+from config.database import pragma_status
+
+CHECKPOINT_MODES = ['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE']
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class Command(BaseCommand):
+    help = 'ANALYZE, VACUUM incremental e checkpoint do WAL no banco SQLite.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-analyze', action='store_true')
+        parser.add_argument('--vacuum-pages', type=int, default=1000,
+                            help='Páginas livres devolvidas por execução (0 = não faz VACUUM)')
+        parser.add_argument('--checkpoint', choices=CHECKPOINT_MODES, default='TRUNCATE',
+                            help='Modo do checkpoint do WAL')
+        parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                            help='Liga auto_vacuum=INCREMENTAL com um VACUUM completo')
+        parser.add_argument('--every', type=float, default=None,
+                            help='Repete a manutenção a cada N segundos (até ser interrompido)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Este comando só serve para o SQLite.')
+
+        if options['enable_incremental_vacuum']:
+            self.enable_incremental_vacuum()
+        while True:
+            self.maintain(options)
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+            close_old_connections()
+
+    def enable_incremental_vacuum(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            start = time.perf_counter()
+            cursor.execute('VACUUM')
+        self.stdout.write(f'auto_vacuum=INCREMENTAL ligado (VACUUM completo em {time.perf_counter() - start:.2f}s).')
+
+    def maintain(self, options):
+        status = pragma_status()
+        with connection.cursor() as cursor:
+            if not options['skip_analyze']:
+                start = time.perf_counter()
+                cursor.execute('ANALYZE')
+                self.stdout.write(f'ANALYZE em {(time.perf_counter() - start) * 1000:.1f}ms')
+
+            if options['vacuum_pages']:
+                if status['auto_vacuum'] != AUTO_VACUUM_INCREMENTAL:
+                    self.stdout.write(self.style.WARNING(
+                        'VACUUM incremental ignorado: auto_vacuum não é INCREMENTAL '
+                        '(rode uma vez com --enable-incremental-vacuum).'
+                    ))
+                else:
+                    cursor.execute('PRAGMA freelist_count')
+                    before = cursor.fetchone()[0]
+                    start = time.perf_counter()
+                    cursor.execute(f"PRAGMA incremental_vacuum({int(options['vacuum_pages'])})")
+                    cursor.fetchall()
+                    cursor.execute('PRAGMA freelist_count')
+                    after = cursor.fetchone()[0]
+                    self.stdout.write(
+                        f'VACUUM incremental: {before - after} páginas devolvidas, {after} livres '
+                        f'({(time.perf_counter() - start) * 1000:.1f}ms)'
+                    )
+
+            if status['journal_mode'] == 'wal':
+                cursor.execute(f"PRAGMA wal_checkpoint({options['checkpoint']})")
+                busy, log_frames, checkpointed = cursor.fetchone()
+                message = f"Checkpoint {options['checkpoint']}: {checkpointed}/{log_frames} páginas do WAL copiadas"
+                if busy:
+                    self.stdout.write(self.style.WARNING(message + ' (leitores ou escritores impediram o fim)'))
+                else:
+                    self.stdout.write(message)
+            else:
+                self.stdout.write(f"Checkpoint ignorado: journal_mode={status['journal_mode']}.")
+
+        self.stdout.write(self.style.SUCCESS('Manutenção concluída.'))
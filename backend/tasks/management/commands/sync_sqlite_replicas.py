@@ -0,0 +1,53 @@
+"""
+Copia o banco primário (SQLite) para os arquivos das réplicas.
+
+Serve para testar o roteamento de leituras (config/routers.py) sem um
+servidor de banco com replicação: cada arquivo de DATABASE_REPLICA_PATHS
+recebe uma cópia consistente do primário pela API de backup do SQLite,
+que não bloqueia as escritas por muito tempo. Rodar de novo atualiza as
+cópias (o intervalo entre execuções é o "atraso" da réplica).
+
+Execute com: DATABASE_REPLICA_PATHS=/tmp/replica.sqlite3 python manage.py sync_sqlite_replicas
+Para repetir a cada 5 segundos: python manage.py sync_sqlite_replicas --every 5
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Copia o banco SQLite primário para as réplicas de DATABASE_REPLICA_PATHS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=1024,
+                            help='Páginas copiadas por passo do backup (-1 = tudo de uma vez)')
+        parser.add_argument('--every', type=float, default=None,
+                            help='Repete a cópia a cada N segundos (até ser interrompido)')
+
+    def handle(self, *args, **options):
+        aliases = list(getattr(settings, 'DATABASE_REPLICAS', []))
+        if not aliases:
+            raise CommandError('Nenhuma réplica configurada (DATABASE_REPLICA_PATHS).')
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('A cópia por backup só serve para o SQLite.')
+
+        while True:
+            for alias in aliases:
+                self.sync(primary, connections[alias], options['pages'])
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+
+    def sync(self, primary, replica, pages):
+        start = time.perf_counter()
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection, pages=pages)
+        replica.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Réplica {replica.alias} ({replica.settings_dict['NAME']}) atualizada "
+            f'em {(time.perf_counter() - start) * 1000:.1f}ms.'
+        ))
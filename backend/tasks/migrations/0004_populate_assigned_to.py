@@ -1,33 +1,61 @@
 # Generated manually
 
 from django.db import migrations
+from django.db.models import F
+
+from tasks.backfill import Checkpoint, run_backfill
+
+CHECKPOINT = 'tasks.0004_populate_assigned_to'
+
+# Tabela de checkpoints de tasks/backfill.py; a 0012 cria a mesma tabela
+# nos bancos em que esta migração rodou antes dela existir
+CREATE_CHECKPOINT_TABLE = (
+    'CREATE TABLE IF NOT EXISTS backfill_checkpoint ('
+    'name VARCHAR(200) NOT NULL PRIMARY KEY, '
+    'last_pk BIGINT NULL, '
+    'rows_done BIGINT NOT NULL, '
+    'finished BOOLEAN NOT NULL, '
+    'updated_at VARCHAR(40) NOT NULL)'
+)
 
 
 def populate_assigned_to(apps, schema_editor):
     """
     Popula o campo assigned_to com o mesmo valor de user para tarefas existentes.
+
+    Um UPDATE por lote de pk, com commit e checkpoint por lote
+    (tasks/backfill.py): se a migração for interrompida, rodar o migrate de
+    novo continua de onde parou.
     """
     Task = apps.get_model('tasks', 'Task')
-    for task in Task.objects.all():
-        if not task.assigned_to:
-            task.assigned_to = task.user
-            task.save(update_fields=['assigned_to'])
+    run_backfill(
+        Task.objects.filter(assigned_to__isnull=True),
+        lambda tasks: tasks.update(assigned_to=F('user')),
+        name=CHECKPOINT,
+        batch_size=5000,
+        using=schema_editor.connection.alias,
+        # Sem progresso no console a cada migrate e criação do banco de testes
+        log=lambda message: None,
+    )
 
 
 def reverse_populate_assigned_to(apps, schema_editor):
     """
-    Operação reversa não necessária.
+    Nada a desfazer nos dados; só esquece o checkpoint, para a migração
+    rodar de novo se for reaplicada.
     """
-    pass
+    Checkpoint(CHECKPOINT, schema_editor.connection.alias).reset()
 
 
 class Migration(migrations.Migration):
+    # Commit por lote do backfill
+    atomic = False
 
     dependencies = [
         ('tasks', '0003_remove_task_tasks_task_user_id_f0f56f_idx_and_more'),
     ]
 
     operations = [
+        migrations.RunSQL(CREATE_CHECKPOINT_TABLE, 'DROP TABLE IF EXISTS backfill_checkpoint'),
         migrations.RunPython(populate_assigned_to, reverse_populate_assigned_to),
     ]
-
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_make_assigned_to_required'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_created_be1ba2_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at', 'id'], name='tasks_task_created_5b4d0b_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_created_at_id_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_user_id_c0fce1_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='tasks_task_assigne_b3b2bc_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='tasks_task_user_id_7e4d64_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'updated_at', 'created_at', 'id'], name='tasks_task_user_id_63f5c0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'status', 'created_at', 'id'], name='tasks_task_user_id_156b60_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'status', 'updated_at', 'created_at', 'id'], name='tasks_task_user_id_506c1c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'created_at', 'id'], name='tasks_task_assigne_badde0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'updated_at', 'created_at', 'id'], name='tasks_task_assigne_d537fb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'status', 'created_at', 'id'], name='tasks_task_assigne_bcb3db_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'status', 'updated_at', 'created_at', 'id'], name='tasks_task_assigne_584965_idx'),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated manually
+
+import warnings
+
+import django.db.models.deletion
+import tasks.models
+from django.db import migrations, models
+
+
+# Cópia congelada do SQL de tasks.search (SQLITE_FTS_SQL e
+# SQLITE_FTS_DROP_SQL, com o rank de install_sqlite_fts): a migração não
+# pode mudar junto com o código da aplicação
+FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_task_fts USING fts5(
+        title, description,
+        content='tasks_task', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_ad AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_au AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_task_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO tasks_task_fts(tasks_task_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+    "INSERT INTO tasks_task_fts(tasks_task_fts) VALUES ('rebuild')",
+]
+
+FTS_DROP_SQL = [
+    'DROP TRIGGER IF EXISTS tasks_task_fts_ai',
+    'DROP TRIGGER IF EXISTS tasks_task_fts_ad',
+    'DROP TRIGGER IF EXISTS tasks_task_fts_au',
+    'DROP TABLE IF EXISTS tasks_task_fts',
+]
+
+
+def fts5_available(cursor):
+    cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+    return bool(cursor.fetchone()[0])
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Cria o índice full-text (FTS5) das tarefas no SQLite.
+
+    Em outros bancos não faz nada. Num SQLite compilado sem FTS5 avisa e
+    segue: a busca continua usando o SearchFilter padrão, e o índice pode
+    ser criado depois com `python manage.py rebuild_task_search_index`.
+    Qualquer outro erro interrompe a migração.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if not fts5_available(cursor):
+            warnings.warn(
+                'SQLite sem FTS5: o índice de busca das tarefas não foi criado e a busca '
+                'vai usar LIKE. Depois de trocar o SQLite, rode '
+                '`python manage.py rebuild_task_search_index`.',
+                RuntimeWarning,
+            )
+            return
+        for sql in FTS_SQL:
+            cursor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in FTS_DROP_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_visibility_indexes'),
+    ]
+
+    operations = [
+        # Model não gerenciado: a tabela é criada pelo RunPython abaixo
+        migrations.CreateModel(
+            name='TaskSearchIndex',
+            fields=[
+                ('task', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='tasks.task')),
+                ('title', models.TextField()),
+                ('description', models.TextField(null=True)),
+                ('document', tasks.models.SearchDocumentField(db_column='tasks_task_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'tasks_task_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
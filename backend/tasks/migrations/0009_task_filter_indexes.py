@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_task_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['updated_at', 'created_at', 'id'], name='tasks_task_updated_ccd119_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='tasks_task_status_c0ceb9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['completed_at'], name='tasks_task_complet_b3d8de_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+COUNTER_FIELDS = ['created_pending', 'created_completed', 'assigned_pending', 'assigned_completed']
+
+
+def populate_counters(apps, schema_editor):
+    """Calcula os contadores de todos os usuários existentes."""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Task = apps.get_model('tasks', 'Task')
+    TaskCounter = apps.get_model('tasks', 'TaskCounter')
+
+    totals = {
+        user_id: dict.fromkeys(COUNTER_FIELDS, 0)
+        for user_id in User.objects.values_list('pk', flat=True)
+    }
+    created = Task.objects.order_by().values('user_id', 'status').annotate(total=models.Count('id'))
+    for row in created:
+        totals[row['user_id']][f"created_{row['status']}"] = row['total']
+    assigned = (
+        Task.objects.exclude(assigned_to=models.F('user')).order_by()
+        .values('assigned_to_id', 'status').annotate(total=models.Count('id'))
+    )
+    for row in assigned:
+        totals[row['assigned_to_id']][f"assigned_{row['status']}"] = row['total']
+
+    TaskCounter.objects.bulk_create(
+        [TaskCounter(user_id=user_id, **fields) for user_id, fields in totals.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_filter_indexes'),
+        ('users', '0002_passwordresettoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+                ('created_pending', models.IntegerField(default=0, verbose_name='Criadas pendentes')),
+                ('created_completed', models.IntegerField(default=0, verbose_name='Criadas concluídas')),
+                ('assigned_pending', models.IntegerField(default=0, verbose_name='Designadas pendentes')),
+                ('assigned_completed', models.IntegerField(default=0, verbose_name='Designadas concluídas')),
+            ],
+            options={
+                'verbose_name': 'Contador de Tarefas',
+                'verbose_name_plural': 'Contadores de Tarefas',
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
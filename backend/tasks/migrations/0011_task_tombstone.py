@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_counter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField(verbose_name='Tarefa')),
+                ('user_id', models.BigIntegerField(verbose_name='Criador')),
+                ('assigned_to_id', models.BigIntegerField(verbose_name='Usuário Designado')),
+                ('deleted_at', models.DateTimeField(verbose_name='Data de Exclusão')),
+            ],
+            options={
+                'verbose_name': 'Tarefa Apagada',
+                'verbose_name_plural': 'Tarefas Apagadas',
+                'indexes': [models.Index(fields=['user_id', 'deleted_at', 'id'], name='tasks_taskt_user_id_a82be4_idx'), models.Index(fields=['assigned_to_id', 'deleted_at', 'id'], name='tasks_taskt_assigne_983f5e_idx'), models.Index(fields=['deleted_at', 'id'], name='tasks_taskt_deleted_376c9b_idx')],
+            },
+        ),
+    ]
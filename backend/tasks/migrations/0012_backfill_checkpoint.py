@@ -0,0 +1,29 @@
+# Generated manually
+
+from django.db import migrations
+
+# Mesma DDL da tasks.0004, congelada aqui
+CREATE_CHECKPOINT_TABLE = (
+    'CREATE TABLE IF NOT EXISTS backfill_checkpoint ('
+    'name VARCHAR(200) NOT NULL PRIMARY KEY, '
+    'last_pk BIGINT NULL, '
+    'rows_done BIGINT NOT NULL, '
+    'finished BOOLEAN NOT NULL, '
+    'updated_at VARCHAR(40) NOT NULL)'
+)
+
+
+class Migration(migrations.Migration):
+    """
+    Cria a tabela de checkpoints dos backfills (tasks/backfill.py) nos
+    bancos em que a tasks.0004 rodou antes de criá-la. Nos outros ela já
+    existe; desfazer fica com a 0004.
+    """
+
+    dependencies = [
+        ('tasks', '0011_task_tombstone'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_CHECKPOINT_TABLE, migrations.RunSQL.noop),
+    ]
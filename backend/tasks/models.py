@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.conf import settings
 from django.core.validators import MaxLengthValidator
+from .counters import apply_deltas, task_deltas
 
 
 class Task(models.Model):
@@ -59,21 +60,187 @@ class Task(models.Model):
         verbose_name_plural = 'Tarefas'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', 'status']),
-            models.Index(fields=['assigned_to', 'status']),
-            models.Index(fields=['created_at']),
+            # Ramos da visibilidade (criadas por / designadas para), um índice
+            # por combinação de filtro de status e ordenação da listagem.
+            # Veja tasks/querysets.py.
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['user', 'updated_at', 'created_at', 'id']),
+            models.Index(fields=['user', 'status', 'created_at', 'id']),
+            models.Index(fields=['user', 'status', 'updated_at', 'created_at', 'id']),
+            models.Index(fields=['assigned_to', 'created_at', 'id']),
+            models.Index(fields=['assigned_to', 'updated_at', 'created_at', 'id']),
+            models.Index(fields=['assigned_to', 'status', 'created_at', 'id']),
+            models.Index(fields=['assigned_to', 'status', 'updated_at', 'created_at', 'id']),
+            # Sustenta a ordenação padrão e a paginação por cursor (created_at, id)
+            models.Index(fields=['created_at', 'id']),
+            # Listagem completa (admin) ordenada por updated_at/status e
+            # filtros por intervalo de updated_at/completed_at
+            models.Index(fields=['updated_at', 'created_at', 'id']),
+            models.Index(fields=['status', 'created_at', 'id']),
+            models.Index(fields=['completed_at']),
         ]
 
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
 
-    def save(self, *args, **kwargs):
+    @classmethod
+    def from_db(cls, db, field_names, values):
         """
-        Atualiza automaticamente a data de conclusão quando o status muda.
+        Guarda o estado carregado do banco para calcular os deltas dos contadores.
+        """
+        instance = super().from_db(db, field_names, values)
+        if not {'user_id', 'assigned_to_id', 'status'} & instance.get_deferred_fields():
+            instance._counter_state = instance.counter_state()
+        return instance
+
+    def counter_state(self):
+        """Campos que definem em quais contadores a tarefa entra."""
+        return (self.user_id, self.assigned_to_id, self.status)
+
+    def sync_completed_at(self, now=None):
+        """
+        Ajusta a data de conclusão conforme o status.
+        
+        Concluída sem data ganha a data atual; pendente perde a data.
+        Também usado pelas operações em lote, que não passam pelo save().
         """
         from django.utils import timezone
         if self.status == 'completed' and not self.completed_at:
-            self.completed_at = timezone.now()
+            self.completed_at = now or timezone.now()
         elif self.status == 'pending':
             self.completed_at = None
-        super().save(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        """
+        Atualiza automaticamente a data de conclusão quando o status muda.
+        
+        Também atualiza os contadores por usuário (TaskCounter) na mesma
+        transação, se o criador, o designado ou o status mudaram.
+        
+        O estado antigo é relido do banco dentro da transação, depois da
+        trava de escrita (transaction_mode=IMMEDIATE no SQLite,
+        select_for_update nos outros): o estado carregado pela instância
+        pode já ter sido alterado por outra requisição.
+        """
+        self.sync_completed_at()
+        
+        new_state = self.counter_state()
+        using = kwargs.get('using') or router.db_for_write(Task, instance=self)
+        
+        with transaction.atomic(using=using):
+            if self.pk is None:
+                old_state = None
+            else:
+                old_state = (
+                    Task.objects.using(using).select_for_update().filter(pk=self.pk)
+                    .values_list('user_id', 'assigned_to_id', 'status').order_by().first()
+                )
+            if old_state is not None:
+                # Estado gravado no banco; o sinal post_save usa para
+                # saber se a tarefa foi concluída ou reaberta
+                self._counter_state = old_state
+            super().save(*args, **kwargs)
+            if old_state != new_state:
+                deltas = task_deltas(*new_state)
+                if old_state is not None:
+                    deltas += task_deltas(*old_state, sign=-1)
+                apply_deltas(deltas)
+        self._counter_state = new_state
+
+
+class SearchDocumentField(models.TextField):
+    """
+    Coluna oculta de uma tabela FTS5 com o mesmo nome da tabela.
+    
+    É o lado esquerdo do MATCH que busca em todas as colunas indexadas.
+    """
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class TaskSearchIndex(models.Model):
+    """
+    Índice full-text das tarefas (tabela virtual FTS5 no SQLite).
+    
+    Não é gerenciado pelo Django: a tabela e os triggers que a mantêm em dia
+    são criados na migração 0008 (veja tasks/search.py). Existe só para
+    permitir o JOIN com Task e ordenar pelo rank (bm25) nas consultas.
+    """
+    task = models.OneToOneField(
+        Task,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index'
+    )
+    title = models.TextField()
+    description = models.TextField(null=True)
+    document = SearchDocumentField(db_column='tasks_task_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'tasks_task_fts'
+
+
+class TaskCounter(models.Model):
+    """
+    Contadores de tarefas de um usuário, mantidos a cada escrita.
+    
+    - created_*: tarefas que o usuário criou
+    - assigned_*: tarefas designadas para ele por outras pessoas
+    
+    Permite mostrar os totais sem contar as tarefas. Veja tasks/counters.py.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_counter',
+        verbose_name='Usuário'
+    )
+    created_pending = models.IntegerField(default=0, verbose_name='Criadas pendentes')
+    created_completed = models.IntegerField(default=0, verbose_name='Criadas concluídas')
+    assigned_pending = models.IntegerField(default=0, verbose_name='Designadas pendentes')
+    assigned_completed = models.IntegerField(default=0, verbose_name='Designadas concluídas')
+
+    class Meta:
+        verbose_name = 'Contador de Tarefas'
+        verbose_name_plural = 'Contadores de Tarefas'
+
+    def __str__(self):
+        return f"Contadores de {self.user_id}"
+
+
+class TaskTombstone(models.Model):
+    """
+    Registro de uma tarefa apagada, usado pela sincronização incremental
+    (GET /api/tasks/changes/). Veja tasks/sync.py.
+    
+    Guarda os ids do criador e do designado sem chave estrangeira, para o
+    registro continuar existindo quando o usuário é apagado.
+    """
+    task_id = models.BigIntegerField(verbose_name='Tarefa')
+    user_id = models.BigIntegerField(verbose_name='Criador')
+    assigned_to_id = models.BigIntegerField(verbose_name='Usuário Designado')
+    deleted_at = models.DateTimeField(verbose_name='Data de Exclusão')
+
+    class Meta:
+        verbose_name = 'Tarefa Apagada'
+        verbose_name_plural = 'Tarefas Apagadas'
+        indexes = [
+            models.Index(fields=['user_id', 'deleted_at', 'id']),
+            models.Index(fields=['assigned_to_id', 'deleted_at', 'id']),
+            models.Index(fields=['deleted_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"Tarefa {self.task_id} apagada"
@@ -0,0 +1,190 @@
+"""
+Paginação da listagem de tarefas.
+
+Além da paginação por número de página (padrão do projeto), oferece um modo
+por cursor (keyset), ativado com ?pagination=cursor. Nesse modo:
+- Não existe COUNT(*) nem OFFSET, então páginas profundas custam o mesmo
+  que a primeira
+- A posição é guardada num cursor opaco com os valores da última linha
+- O desempate é sempre feito por (created_at, id), então a ordem é estável
+  para qualquer campo de ordenação permitido
+"""
+import base64
+import binascii
+import functools
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import models
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .querysets import keyset_filter, ordering_keys
+
+
+def cursor_value_matches(field, value):
+    """
+    Se o valor do cursor tem o tipo que a chave guarda no JSON: texto ISO
+    para datas, inteiro para ids, número para anotações (ex.: search_rank)
+    e texto para o resto. Nulo nunca vale (o keyset não compara com NULL).
+    """
+    if value is None or isinstance(value, bool):
+        return False
+    if field is None:
+        return isinstance(value, (int, float))
+    if isinstance(field, (models.DateTimeField, models.DateField)):
+        return isinstance(value, str)
+    if isinstance(field, (models.IntegerField, models.AutoField, models.ForeignKey)):
+        return isinstance(value, int)
+    return isinstance(value, str)
+
+
+class CountedPaginator(Paginator):
+    """Paginator que aceita o total já calculado, sem repetir o COUNT."""
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.__dict__['count'] = count
+
+
+class TaskPagination(PageNumberPagination):
+    """
+    Paginação por número de página com modo cursor opcional.
+
+    Exemplos de uso:
+    - /api/tasks/?page=3 (modo antigo, com count)
+    - /api/tasks/?pagination=cursor&ordering=-updated_at
+    - /api/tasks/?cursor=<token> (links next/previous retornados pela API)
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido.'
+    # Total já calculado pela view (ex.: junto com o ETag), ou None
+    known_count = None
+
+    @property
+    def django_paginator_class(self):
+        return functools.partial(CountedPaginator, count=self.known_count)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.is_cursor_mode(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.keys = ordering_keys(queryset)
+        self.ordering_signature = ','.join(
+            f"{'-' if desc else ''}{name}" for name, desc in self.keys
+        )
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = cursor['r'] if cursor else False
+
+        if cursor:
+            queryset = queryset.filter(self.build_keyset_filter(cursor['v'], reverse))
+
+        order_by = [
+            f"{'-' if desc != reverse else ''}{name}" for name, desc in self.keys
+        ]
+        rows = list(queryset.order_by(*order_by)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = cursor is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page_rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next or not self.page_rows:
+            return None
+        return self.build_link(self.page_rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_rows:
+            return None
+        return self.build_link(self.page_rows[0], reverse=True)
+
+    def is_cursor_mode(self, request):
+        """O modo cursor é opcional: só vale quando o cliente pede."""
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def build_keyset_filter(self, values, reverse):
+        """Condição "linhas depois do cursor" para a ordenação atual."""
+        return keyset_filter(self.keys, values, reverse)
+
+    def build_link(self, row, reverse):
+        values = []
+        for name, _ in self.keys:
+            value = getattr(row, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = {'o': self.ordering_signature, 'v': values, 'r': reverse}
+        token = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        """
+        Lê e valida o cursor recebido.
+
+        O cursor só vale para a mesma ordenação em que foi gerado.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = payload['v']
+            reverse = bool(payload['r'])
+            ordering = payload['o']
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if (ordering != self.ordering_signature or not isinstance(values, list)
+                or len(values) != len(self.keys)):
+            raise NotFound(self.invalid_cursor_message)
+
+        fields = {field.name: field for field in model._meta.concrete_fields}
+        if not all(cursor_value_matches(fields.get(name), value) for (name, _), value in zip(self.keys, values)):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            # Valores de anotações (ex.: search_rank) ficam como vieram no JSON
+            values = [
+                fields[name].to_python(value) if name in fields else value
+                for (name, _), value in zip(self.keys, values)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+        return {'v': values, 'r': reverse}
@@ -0,0 +1,129 @@
+"""
+Consultas de visibilidade das tarefas.
+
+Um usuário comum vê as tarefas que criou OU que foram designadas para ele.
+Com um OR no WHERE o banco precisa juntar as duas buscas e ordenar tudo
+numa tabela temporária, o que fica caro para quem tem muitas tarefas.
+
+Aqui a listagem é montada como dois ramos separados, cada um usando seu
+próprio índice composto já na ordem certa:
+- tarefas criadas pelo usuário (user = X)
+- tarefas designadas para ele e criadas por outra pessoa (assigned_to = X AND user <> X)
+
+Os ramos são juntos com UNION ALL. Como já vêm ordenados, o SQLite faz um
+merge (MERGE (UNION ALL)) e para assim que tem as linhas da página.
+"""
+from django.db.models import Q
+
+# Campos usados para desempate, nessa ordem
+TIEBREAK_FIELDS = ['created_at', 'id']
+
+
+def ordering_keys(queryset):
+    """
+    Retorna a ordenação do queryset como lista de (campo, descendente).
+
+    Começa pela ordenação pedida (ou a padrão do model) e completa com
+    created_at e id, na direção do último campo, para que cada linha
+    tenha uma posição única e a ordem bata com os índices compostos.
+    """
+    ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+    keys = []
+    for item in ordering:
+        if not isinstance(item, str):
+            continue
+        desc = item.startswith('-')
+        name = item.lstrip('-')
+        if name == 'pk':
+            name = 'id'
+        if name not in [k[0] for k in keys]:
+            keys.append((name, desc))
+
+    last_desc = keys[-1][1] if keys else True
+    for name in TIEBREAK_FIELDS:
+        if name not in [k[0] for k in keys]:
+            keys.append((name, last_desc))
+    return keys
+
+
+def keyset_filter(keys, values, reverse=False):
+    """
+    Gera a condição "linhas depois da posição `values`" para a ordenação `keys`:
+    (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+    """
+    condition = Q()
+    equal = Q()
+    for (name, desc), value in zip(keys, values):
+        lookup = 'lt' if desc != reverse else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def visibility_branches(queryset, user):
+    """
+    Divide a visibilidade de um usuário comum em dois ramos sem interseção.
+    """
+    return [
+        queryset.filter(user=user),
+        queryset.filter(assigned_to=user).exclude(user=user),
+    ]
+
+
+class TaskUnion:
+    """
+    Une os ramos de visibilidade com UNION ALL.
+
+    Implementa só o que a paginação e a exportação usam de um QuerySet
+    (filter, annotate, order_by, values_list, using, count, fatiamento e
+    iterator). Filtros e ordenação são aplicados em cada ramo,
+    assim cada um continua usando seu índice.
+    """
+    ordered = True
+
+    def __init__(self, branches):
+        self.branches = branches
+        self.model = branches[0].model
+
+    @property
+    def query(self):
+        return self.branches[0].query
+
+    def filter(self, *args, **kwargs):
+        return TaskUnion([branch.filter(*args, **kwargs) for branch in self.branches])
+
+    def annotate(self, *args, **kwargs):
+        return TaskUnion([branch.annotate(*args, **kwargs) for branch in self.branches])
+
+    def order_by(self, *fields):
+        return TaskUnion([branch.order_by(*fields) for branch in self.branches])
+
+    def values_list(self, *fields):
+        return TaskUnion([branch.values_list(*fields) for branch in self.branches])
+
+    def using(self, alias):
+        return TaskUnion([branch.using(alias) for branch in self.branches])
+
+    def count(self):
+        # Os ramos não se repetem, então o total é a soma dos dois COUNTs
+        return sum(branch.count() for branch in self.branches)
+
+    def combined(self):
+        """Monta o UNION ALL ordenado pela ordenação estável dos ramos."""
+        order_by = [
+            f"{'-' if desc else ''}{name}" for name, desc in ordering_keys(self.branches[0])
+        ]
+        first, *rest = [branch.order_by() for branch in self.branches]
+        return first.union(*rest, all=True).order_by(*order_by)
+
+    def iterator(self, chunk_size=None):
+        return self.combined().iterator(chunk_size=chunk_size)
+
+    def __getitem__(self, k):
+        return self.combined()[k]
+
+    def __iter__(self):
+        return iter(self.combined())
+
+    def __len__(self):
+        return self.count()
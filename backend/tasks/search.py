@@ -0,0 +1,161 @@
+"""
+Busca textual das tarefas (parâmetro ?search=).
+
+O SearchFilter do DRF vira um LIKE '%termo%' em título e descrição, o que
+varre a tabela inteira a cada busca. Aqui a busca usa um índice full-text:
+
+- SQLiteFTS5Backend: tabela virtual FTS5 (tasks_task_fts) mantida em dia
+  por triggers no INSERT, UPDATE e DELETE de tasks_task
+- Outros bancos podem ter seu próprio backend, configurado em
+  settings.TASK_SEARCH_BACKEND (caminho pontuado da classe)
+
+Quando nenhum backend está disponível, a busca cai no SearchFilter padrão.
+
+Se uma migração futura recriar a tabela tasks_task no SQLite (o que
+acontece em alguns AlterField), os triggers somem junto. Nesse caso rode
+`python manage.py rebuild_task_search_index`.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+FTS_TABLE = 'tasks_task_fts'
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+# A migração 0008 tem uma cópia congelada deste SQL; uma mudança aqui
+# precisa de uma migração nova
+SQLITE_FTS_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='tasks_task', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+SQLITE_FTS_DROP_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def install_sqlite_fts(cursor, rebuild=True):
+    """Cria a tabela FTS5 e os triggers, e indexa as tarefas existentes."""
+    for sql in SQLITE_FTS_SQL:
+        cursor.execute(sql)
+    # Coluna 'rank' = bm25 com o título pesando mais que a descrição
+    cursor.execute(
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', %s)",
+        [f'bm25({TITLE_WEIGHT}, {DESCRIPTION_WEIGHT})'],
+    )
+    if rebuild:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_sqlite_fts(cursor):
+    for sql in SQLITE_FTS_DROP_SQL:
+        cursor.execute(sql)
+
+
+class BaseSearchBackend:
+    """
+    Interface dos backends de busca.
+
+    - is_available(): se o índice existe no banco atual
+    - filter(queryset, terms): mantém só as tarefas que batem com os termos
+    - annotate_rank(queryset, terms): adiciona o campo 'search_rank'
+      (quanto menor, mais relevante); chamado depois de filter()
+    """
+
+    def is_available(self):
+        raise NotImplementedError
+
+    def filter(self, queryset, terms):
+        raise NotImplementedError
+
+    def annotate_rank(self, queryset, terms):
+        return queryset
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    Busca com FTS5 do SQLite.
+
+    Cada termo vira um prefixo ("reun"* acha "reunião"), todos os termos
+    precisam aparecer (em título ou descrição) e acentos são ignorados.
+    A relevância é a coluna rank do FTS5 (bm25, título pesando mais).
+    """
+
+    def is_available(self):
+        if connection.vendor != 'sqlite':
+            return False
+        # Guarda o resultado na própria conexão para não consultar o
+        # sqlite_master a cada busca
+        available = getattr(connection, '_tasks_fts_available', None)
+        if available is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s, %s)",
+                    [FTS_TABLE, f'{FTS_TABLE}_ai'],
+                )
+                available = cursor.fetchone()[0] == 2
+            connection._tasks_fts_available = available
+        return available
+
+    def build_match(self, terms):
+        """Transforma os termos digitados numa expressão MATCH segura."""
+        tokens = re.findall(r'\w+', ' '.join(terms))
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def filter(self, queryset, terms):
+        match = self.build_match(terms)
+        if not match:
+            return queryset
+        # JOIN com a tabela FTS pela rowid (= id da tarefa)
+        return queryset.filter(search_index__document__match=match)
+
+    def annotate_rank(self, queryset, terms):
+        if not self.build_match(terms):
+            return queryset
+        return queryset.annotate(search_rank=F('search_index__rank'))
+
+
+def get_search_backend():
+    """
+    Retorna o backend de busca disponível, ou None.
+
+    Usa settings.TASK_SEARCH_BACKEND se estiver definido; senão, o FTS5.
+    """
+    path = getattr(settings, 'TASK_SEARCH_BACKEND', 'tasks.search.SQLiteFTS5Backend')
+    if not path:
+        return None
+    backend = import_string(path)()
+    return backend if backend.is_available() else None
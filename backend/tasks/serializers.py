@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
 from .models import Task
 
@@ -65,6 +66,30 @@ class TaskSerializer(serializers.ModelSerializer):
         return value
 
 
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que aceita objetos já carregados pela view.
+    
+    Nas operações em lote a view busca todos os usuários citados numa
+    consulta só e passa no contexto: {'preloaded': {'assigned_to': {id: user}}}.
+    Sem isso no contexto, funciona igual ao campo padrão (um SELECT por valor).
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded', {}).get(self.field_name)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in preloaded:
+            self.fail('does_not_exist', pk_value=data)
+        return preloaded[pk]
+
+
 class TaskCreateSerializer(serializers.ModelSerializer):
     """
     Serializer usado APENAS ao criar uma nova tarefa.
@@ -74,6 +99,8 @@ class TaskCreateSerializer(serializers.ModelSerializer):
     - Não inclui campos calculados como 'completed' (ainda não existem)
     - O 'user' (criador) é definido automaticamente no backend
     """
+    serializer_related_field = PreloadedPrimaryKeyRelatedField
+
     class Meta:
         model = Task
         fields = ['title', 'description', 'assigned_to']
@@ -0,0 +1,74 @@
+"""
+Sinais do app de tarefas.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .counters import apply_deltas, task_deltas
+from .events import publish_task_event, status_event_type
+from .models import Task, TaskCounter
+from .sync import record_deletions
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_task_counter(sender, instance, created, raw=False, **kwargs):
+    """Todo usuário novo começa com a linha de contadores zerada."""
+    if created and not raw:
+        TaskCounter.objects.get_or_create(user_id=instance.pk)
+
+
+@receiver(pre_delete, sender=Task)
+def load_deleted_task_state(sender, instance, using, **kwargs):
+    """
+    Relê do banco o criador, o designado e o status da tarefa que vai ser
+    apagada.
+
+    Como no Task.save(): roda na transação do delete, depois da trava de
+    escrita, e o estado carregado pela instância pode já ter sido alterado
+    por outra requisição (no QuerySet.delete() as instâncias são lidas
+    antes da transação).
+    """
+    instance._deleted_counter_state = (
+        Task.objects.using(using).select_for_update().filter(pk=instance.pk)
+        .values_list('user_id', 'assigned_to_id', 'status').order_by().first()
+    )
+
+
+@receiver(post_delete, sender=Task)
+def discount_deleted_task(sender, instance, **kwargs):
+    """
+    Desconta a tarefa apagada dos contadores por usuário, pelo estado
+    relido em load_deleted_task_state.
+
+    Roda dentro da transação do delete, inclusive em QuerySet.delete() e
+    em exclusões em cascata (ex.: quando um usuário é apagado).
+    """
+    state = getattr(instance, '_deleted_counter_state', None)
+    if state is not None:
+        # Sem estado a linha já tinha sido apagada por outra requisição
+        apply_deltas(task_deltas(*state, sign=-1))
+
+
+@receiver(post_delete, sender=Task)
+def record_deleted_task(sender, instance, **kwargs):
+    """Grava o registro de exclusão usado pela sincronização (tasks/sync.py)."""
+    record_deletions([instance])
+
+
+@receiver(post_save, sender=Task)
+def notify_saved_task(sender, instance, created, raw=False, **kwargs):
+    """Avisa o criador e o designado (tasks/events.py)."""
+    if raw:
+        return
+    if created:
+        publish_task_event('created', instance)
+    else:
+        old_state = getattr(instance, '_counter_state', None)
+        old_status = old_state[2] if old_state else instance.status
+        publish_task_event(status_event_type(old_status, instance.status), instance)
+
+
+@receiver(post_delete, sender=Task)
+def notify_deleted_task(sender, instance, **kwargs):
+    publish_task_event('deleted', instance)
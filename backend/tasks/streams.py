@@ -0,0 +1,235 @@
+"""
+Stream de eventos das tarefas (GET /api/tasks/events/, Server-Sent Events).
+
+O stream é servido de dois jeitos, com o mesmo núcleo (authenticate +
+event_stream):
+- events_app: aplicação ASGI pura, ligada na rota em config/asgi.py. É o
+  caminho de produção: a conexão aberta é só uma corrotina. O ASGIHandler
+  do Django roda cada requisição dentro de um ThreadSensitiveContext, que
+  segura uma thread própria até a resposta terminar; num stream que fica
+  aberto por minutos isso daria uma thread por conexão.
+- views.task_events: view do Django, para o ASGIHandler e os testes. No
+  WSGI (runserver, gunicorn) responde 501: lá o StreamingHttpResponse
+  consome o iterador assíncrono inteiro antes de enviar qualquer coisa.
+
+O token de acesso vai no cabeçalho (Authorization: Bearer <token>). Os
+clientes EventSource, que não enviam cabeçalhos, pedem antes um ticket em
+POST /api/tasks/events/ticket/ e abrem ?ticket=<ticket>: o ticket vale
+TASK_EVENTS_TICKET_SECONDS segundos (padrão 30) para abrir o stream, que
+dura até a expiração do token de acesso que o pediu. ?token=<token> ainda
+é aceito, mas a URL vai para os logs de acesso do servidor e dos proxies
+com o token de acesso inteiro; prefira o ticket.
+"""
+import asyncio
+import json
+import logging
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import close_old_connections
+from rest_framework.exceptions import AuthenticationFailed
+from users.authentication import CachedJWTAuthentication
+
+from .events import get_broker
+
+logger = logging.getLogger(__name__)
+
+RETRY_MILLISECONDS = 5000
+TICKET_SALT = 'tasks.events.ticket'
+
+
+def heartbeat_seconds():
+    return getattr(settings, 'TASK_EVENTS_HEARTBEAT_SECONDS', 25)
+
+
+def ticket_seconds():
+    return getattr(settings, 'TASK_EVENTS_TICKET_SECONDS', 30)
+
+
+def issue_ticket(user_id, expires_at):
+    """Ticket assinado para abrir o stream; o stream termina em `expires_at`."""
+    return signing.dumps({'user': user_id, 'exp': expires_at}, salt=TICKET_SALT)
+
+
+def _load_user(authentication, token):
+    # Fora do ciclo de requisição do Django ninguém fecha conexões velhas
+    close_old_connections()
+    return authentication.get_user(token)
+
+
+def _load_ticket_user(user_id):
+    close_old_connections()
+    user = get_user_model().objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        raise AuthenticationFailed('Usuário não encontrado ou inativo.')
+    return user
+
+
+async def authenticate(raw_token, ticket=None):
+    """
+    Valida o token de acesso (ou o ticket) e retorna (usuário, expiração
+    em epoch).
+
+    Levanta AuthenticationFailed se faltarem credenciais ou forem
+    inválidas. A busca do usuário roda na thread compartilhada do
+    sync_to_async.
+    """
+    if not raw_token and ticket:
+        try:
+            payload = signing.loads(ticket, salt=TICKET_SALT, max_age=ticket_seconds())
+        except signing.BadSignature:
+            raise AuthenticationFailed('Ticket inválido ou expirado.')
+        user = await sync_to_async(_load_ticket_user)(payload['user'])
+        return user, payload['exp']
+    if not raw_token:
+        raise AuthenticationFailed('As credenciais de autenticação não foram fornecidas.')
+    authentication = CachedJWTAuthentication()
+    token = authentication.get_validated_token(raw_token)
+    user = await sync_to_async(_load_user)(authentication, token)
+    return user, token['exp']
+
+
+def raw_token_from(header, query_token):
+    """Token do cabeçalho Authorization (bytes) ou do ?token=."""
+    if header:
+        return CachedJWTAuthentication().get_raw_token(header)
+    return query_token
+
+
+def error_detail(exc):
+    detail = exc.detail.get('detail', exc.detail) if isinstance(exc.detail, dict) else exc.detail
+    return {'detail': str(detail)}
+
+
+async def event_stream(user_id, expires_at):
+    """
+    Gera os blocos SSE das mudanças nas tarefas do usuário.
+
+    Termina quando o token expira; o cliente reconecta com um token novo.
+    Se eventos forem descartados (cliente lento), manda um evento 'resync'
+    e o cliente deve sincronizar por /api/tasks/changes/.
+    """
+    subscription = get_broker().subscribe(user_id)
+    heartbeat = heartbeat_seconds()
+    try:
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        while time.time() < expires_at:
+            timeout = min(heartbeat, max(expires_at - time.time(), 0))
+            event = await subscription.get(timeout)
+            if subscription.overflowed:
+                subscription.overflowed = False
+                yield 'event: resync\ndata: {"type": "resync"}\n\n'
+            if event is None:
+                # Comentário SSE: mantém a conexão viva em proxies
+                yield ': ping\n\n'
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        subscription.close()
+
+
+def stream_headers():
+    return [
+        ('Content-Type', 'text/event-stream'),
+        ('Cache-Control', 'no-cache'),
+        # Desliga o buffer do nginx, senão os eventos chegam atrasados
+        ('X-Accel-Buffering', 'no'),
+    ]
+
+
+def cors_headers(origin):
+    """
+    Cabeçalhos CORS para a origem, seguindo as configurações do corsheaders
+    (o middleware não passa por aqui).
+    """
+    if not origin:
+        return []
+    allowed = getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False) or (
+        origin in getattr(settings, 'CORS_ALLOWED_ORIGINS', [])
+    )
+    if not allowed:
+        return []
+    headers = [('Access-Control-Allow-Origin', origin), ('Vary', 'Origin')]
+    if getattr(settings, 'CORS_ALLOW_CREDENTIALS', False):
+        headers.append(('Access-Control-Allow-Credentials', 'true'))
+    return headers
+
+
+async def _send_json(send, status_code, data, headers):
+    body = json.dumps(data).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status_code,
+        'headers': [(b'content-type', b'application/json')] + headers,
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _wait_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def events_app(scope, receive, send):
+    """Aplicação ASGI do stream de eventos (veja config/asgi.py)."""
+    headers = dict(scope.get('headers', []))
+    origin = headers.get(b'origin', b'').decode('latin-1')
+    extra_headers = [
+        (name.lower().encode('latin-1'), value.encode('latin-1'))
+        for name, value in cors_headers(origin)
+    ]
+
+    if scope['method'] != 'GET':
+        await _send_json(send, 405, {'detail': f"Método \"{scope['method']}\" não permitido."},
+                         extra_headers + [(b'allow', b'GET')])
+        return
+
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    try:
+        raw_token = raw_token_from(headers.get(b'authorization'), query.get('token', [None])[0])
+        user, expires_at = await authenticate(raw_token, query.get('ticket', [None])[0])
+    except AuthenticationFailed as exc:
+        await _send_json(send, 401, error_detail(exc), extra_headers)
+        return
+    except Exception:
+        # Fora do ASGIHandler ninguém responde por nós: sem isto o cliente
+        # ficaria sem resposta (ex.: banco travado ao buscar o usuário)
+        logger.exception('Falha ao abrir o stream de eventos')
+        await _send_json(send, 503, {'detail': 'Stream de eventos indisponível. Tente novamente.'},
+                         extra_headers + [(b'retry-after', str(RETRY_MILLISECONDS // 1000).encode())])
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in stream_headers()
+        ] + extra_headers,
+    })
+
+    stream = event_stream(user.pk, expires_at)
+
+    async def pump():
+        async for chunk in stream:
+            await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+
+    pump_task = asyncio.ensure_future(pump())
+    disconnect_task = asyncio.ensure_future(_wait_disconnect(receive))
+    try:
+        done, _ = await asyncio.wait({pump_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (pump_task, disconnect_task):
+            task.cancel()
+        await asyncio.gather(pump_task, disconnect_task, return_exceptions=True)
+        await stream.aclose()
+
+    # Token expirou: fecha a resposta. Se o cliente saiu, não há para quem mandar
+    if pump_task in done and pump_task.exception() is None:
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
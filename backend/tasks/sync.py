@@ -0,0 +1,201 @@
+"""
+Sincronização incremental das tarefas (GET /api/tasks/changes/).
+
+O app guarda as tarefas localmente e pede só o que mudou desde a última
+sincronização, identificada por um token opaco (?since=<token>). A
+resposta traz:
+- changed: tarefas visíveis criadas ou editadas depois da posição do token,
+  em ordem de (updated_at, created_at, id), usando os índices da listagem
+- deleted: ids das tarefas apagadas, lidos dos registros de exclusão
+  (TaskTombstone), gravados pelo sinal post_delete
+- since: o token para a próxima chamada
+- has_more: se ainda há mudanças (o cliente chama de novo na hora)
+
+Sem ?since= a resposta traz todas as tarefas visíveis (sincronização
+inicial), em blocos.
+
+Para não pular uma escrita que ainda não foi confirmada (o updated_at é
+calculado antes do COMMIT), só entram mudanças com mais de
+TASK_SYNC_SETTLE_SECONDS segundos. As escritas tiram a data já dentro da
+transação, com a trava na mão: a espera pela trava fica antes da data, e
+a janela só precisa cobrir a duração de uma transação (padrão: 2s). Os registros de exclusão são apagados
+depois de TASK_TOMBSTONE_RETENTION_DAYS dias
+(`python manage.py prune_task_tombstones`); um token mais antigo que isso
+recebe 410 e o app precisa sincronizar do zero.
+"""
+import base64
+import binascii
+import contextlib
+import json
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .querysets import TaskUnion, keyset_filter, visibility_branches
+
+# Ordem das mudanças: a mesma dos índices (..., updated_at, created_at, id)
+CHANGED_KEYS = [('updated_at', False), ('created_at', False), ('id', False)]
+DELETED_KEYS = [('deleted_at', False), ('id', False)]
+
+# Registros de exclusão acumulados pelo batch() em andamento
+_pending_tombstones = ContextVar('task_tombstones', default=None)
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'Token de sincronização expirado. Sincronize do zero (sem ?since=).'
+    default_code = 'sync_token_expired'
+
+
+def settle_seconds():
+    return getattr(settings, 'TASK_SYNC_SETTLE_SECONDS', 2)
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, 'TASK_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+@contextlib.contextmanager
+def batch():
+    """
+    Junta os registros de exclusão gravados dentro do bloco num INSERT só.
+
+    Deve ser usado dentro da transação do delete.
+    """
+    if _pending_tombstones.get() is not None:
+        yield
+        return
+    tombstones = []
+    token = _pending_tombstones.set(tombstones)
+    try:
+        yield
+    finally:
+        _pending_tombstones.reset(token)
+    if tombstones:
+        from .models import TaskTombstone
+        TaskTombstone.objects.bulk_create(tombstones)
+
+
+def record_deletions(tasks):
+    """Grava um registro de exclusão para cada tarefa apagada."""
+    from .models import TaskTombstone
+
+    now = timezone.now()
+    tombstones = [
+        TaskTombstone(
+            task_id=task.pk, user_id=task.user_id,
+            assigned_to_id=task.assigned_to_id, deleted_at=now,
+        )
+        for task in tasks
+    ]
+    pending = _pending_tombstones.get()
+    if pending is not None:
+        pending.extend(tombstones)
+    else:
+        TaskTombstone.objects.bulk_create(tombstones)
+
+
+def encode_token(changed, deleted):
+    payload = {'c': changed, 'd': deleted}
+    return base64.urlsafe_b64encode(
+        json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    ).decode('ascii')
+
+
+def decode_token(encoded):
+    """
+    Lê as posições (changed, deleted) do token.
+
+    Levanta ValueError se o token for inválido.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        changed, deleted = payload['c'], payload['d']
+    except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error):
+        raise ValueError('token inválido')
+
+    def parse(position, keys, required=False):
+        if position is None and not required:
+            return None
+        if not isinstance(position, list) or len(position) != len(keys):
+            raise ValueError('token inválido')
+        *dates, pk = position
+        dates = [parse_datetime(value) if isinstance(value, str) else None for value in dates]
+        if None in dates or not isinstance(pk, int):
+            raise ValueError('token inválido')
+        return [*dates, pk]
+
+    # A posição das exclusões sempre existe (a sincronização inicial já
+    # começa de uma data)
+    return parse(changed, CHANGED_KEYS), parse(deleted, DELETED_KEYS, required=True)
+
+
+def dump_position(values):
+    """Valores de uma posição como vão no token (datas em ISO 8601)."""
+    return [value.isoformat() if hasattr(value, 'isoformat') else value for value in values]
+
+
+def row_position(row, keys):
+    return [getattr(row, name) for name, _ in keys]
+
+
+def get_changes(queryset, user, since=None, limit=500):
+    """
+    Monta a resposta da sincronização para o usuário.
+
+    `queryset` é o queryset base das tarefas (sem visibilidade). Retorna um
+    dict com changed (tarefas), deleted (ids), since (novo token) e has_more.
+    """
+    from .models import TaskTombstone
+
+    until = timezone.now() - timedelta(seconds=settle_seconds())
+    if since is None:
+        # Sincronização inicial: todas as tarefas e nenhuma exclusão
+        changed_from, deleted_from = None, [until, 0]
+    else:
+        changed_from, deleted_from = since
+        if deleted_from[0] < timezone.now() - tombstone_retention():
+            raise SyncTokenExpired()
+
+    is_admin = user.is_staff or user.is_superuser
+    if is_admin:
+        tasks = queryset
+        tombstones = TaskTombstone.objects.all()
+    else:
+        tasks = TaskUnion(visibility_branches(queryset, user))
+        tombstones = TaskTombstone.objects.filter(Q(user_id=user.pk) | Q(assigned_to_id=user.pk))
+
+    tasks = tasks.filter(updated_at__lte=until)
+    if changed_from is not None:
+        tasks = tasks.filter(keyset_filter(CHANGED_KEYS, changed_from))
+    changed = list(tasks.order_by(*(name for name, _ in CHANGED_KEYS))[:limit + 1])
+
+    tombstones = tombstones.filter(deleted_at__lte=until).filter(keyset_filter(DELETED_KEYS, deleted_from))
+    deleted = list(tombstones.order_by('deleted_at', 'id').only('id', 'task_id', 'deleted_at')[:limit + 1])
+
+    more_changed, more_deleted = len(changed) > limit, len(deleted) > limit
+    changed, deleted = changed[:limit], deleted[:limit]
+
+    # A posição das tarefas só avança até a última linha entregue
+    next_changed = row_position(changed[-1], CHANGED_KEYS) if changed else changed_from
+    # Sem mais exclusões até `until`, a posição pula para `until`; assim um
+    # cliente sem exclusões novas não fica com um token "velho" e expira
+    next_deleted = row_position(deleted[-1], DELETED_KEYS) if deleted else deleted_from
+    if not more_deleted:
+        next_deleted = max(next_deleted, [until, 0])
+
+    return {
+        'changed': changed,
+        'deleted': [tombstone.task_id for tombstone in deleted],
+        'since': encode_token(
+            dump_position(next_changed) if next_changed else None,
+            dump_position(next_deleted),
+        ),
+        'has_more': more_changed or more_deleted,
+    }
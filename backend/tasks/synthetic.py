@@ -0,0 +1,286 @@
+"""
+Dados sintéticos: o fixture de demonstração e cargas grandes de usuários e
+tarefas geradas a partir de uma semente.
+
+Usado pelo comando generate_data (e pelo populate_data.py) e pelos
+benchmarks (tasks/benchmark.py).
+
+A carga em volume evita o caminho do ORM linha a linha:
+- um único hash de senha, calculado antes, para todos os usuários
+- tarefas com INSERTs em lote (executemany), um commit por lote
+- índices secundários de tasks_task e triggers da busca desligados
+  durante a carga e recriados no fim (deferred_indexes,
+  deferred_search_index): montar um índice de uma vez é bem mais rápido
+  que atualizá-lo a cada linha
+"""
+import contextlib
+import itertools
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+
+from .models import Task
+from .search import SQLiteFTS5Backend, install_sqlite_fts, uninstall_sqlite_fts
+
+User = get_user_model()
+
+WORDS = [
+    'relatório', 'reunião', 'cliente', 'contrato', 'revisar', 'enviar', 'atualizar',
+    'planilha', 'orçamento', 'projeto', 'entrega', 'fornecedor', 'pagamento', 'backup',
+    'servidor', 'deploy', 'testes', 'documentação', 'treinamento', 'suporte', 'marketing',
+    'campanha', 'estoque', 'inventário', 'auditoria', 'contabilidade', 'agenda', 'ligação',
+]
+SYLLABLES = ['ca', 'de', 'fi', 'lo', 'mu', 'ra', 'se', 'ti', 'vo', 'za', 'pro', 'tra', 'men', 'cio', 'dor', 'gem']
+FIRST_NAMES = [
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela',
+    'João', 'Juliana', 'Lucas', 'Mariana', 'Pedro', 'Rafaela', 'Rodrigo', 'Sofia', 'Thiago',
+]
+LAST_NAMES = [
+    'Almeida', 'Barbosa', 'Cardoso', 'Costa', 'Ferreira', 'Gomes', 'Lima', 'Martins',
+    'Oliveira', 'Pereira', 'Ribeiro', 'Rocha', 'Santos', 'Silva', 'Souza',
+]
+
+TASK_COLUMNS = ['user_id', 'assigned_to_id', 'title', 'description', 'status',
+                'created_at', 'updated_at', 'completed_at']
+
+DEMO_ADMIN = {
+    'username': 'admin',
+    'email': 'admin@example.com',
+    'password': 'admin123',
+    'first_name': 'Admin',
+    'last_name': 'User',
+}
+DEMO_USERS = [
+    {
+        'username': 'joao',
+        'email': 'joao@example.com',
+        'password': 'senha123',
+        'first_name': 'João',
+        'last_name': 'Silva',
+    },
+    {
+        'username': 'maria',
+        'email': 'maria@example.com',
+        'password': 'senha123',
+        'first_name': 'Maria',
+        'last_name': 'Santos',
+    },
+]
+DEMO_TASKS = {
+    'joao': [
+        {'title': 'Estudar Django REST Framework', 'description': 'Completar tutorial oficial do DRF', 'status': 'pending'},
+        {'title': 'Implementar autenticação JWT', 'description': 'Configurar SimpleJWT no projeto', 'status': 'completed'},
+        {'title': 'Criar testes unitários', 'description': 'Escrever testes para todas as views', 'status': 'pending'},
+        {'title': 'Documentar API', 'description': 'Usar drf-spectacular para documentação', 'status': 'completed'},
+        {'title': 'Deploy no servidor', 'description': 'Configurar deploy em produção', 'status': 'pending'},
+    ],
+    'maria': [
+        {'title': 'Aprender React Native', 'description': 'Estudar componentes e navegação', 'status': 'pending'},
+        {'title': 'Integrar com API', 'description': 'Conectar app mobile com backend', 'status': 'pending'},
+        {'title': 'Implementar AsyncStorage', 'description': 'Armazenar tokens localmente', 'status': 'completed'},
+        {'title': 'Criar telas de autenticação', 'description': 'Login, registro e recuperação de senha', 'status': 'completed'},
+    ],
+}
+
+
+def vocabulary(seed=42, size=5000):
+    """
+    Vocabulário sintético para títulos e descrições.
+
+    A posição de cada palavra define sua frequência (distribuição de Zipf):
+    as primeiras aparecem em muitas tarefas, as últimas em poucas.
+    """
+    rng = random.Random(seed)
+    words = set(WORDS)
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    return words
+
+
+def text_generator(seed=42):
+    """Retorna uma função que gera textos aleatórios com o vocabulário."""
+    words = vocabulary(seed)
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    rng = random.Random(seed)
+
+    def generate(min_words, max_words):
+        return ' '.join(rng.choices(words, cum_weights=weights, k=rng.randint(min_words, max_words)))
+    return generate
+
+
+def insert_statement(table, columns):
+    """INSERT com um placeholder por coluna, para o executemany."""
+    return 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(table),
+        ', '.join(connection.ops.quote_name(c) for c in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+
+
+def load_demo(log=None):
+    """
+    Cria o fixture de demonstração (admin, joao e maria com suas tarefas).
+
+    Pode rodar mais de uma vez: o que já existe não é duplicado.
+    """
+    log = log or (lambda message: None)
+
+    admin = User.objects.filter(username=DEMO_ADMIN['username']).first()
+    if admin is None:
+        admin = User.objects.create_superuser(**DEMO_ADMIN)
+        log(f'[OK] Superusuario criado: {admin.username}')
+    else:
+        log(f'[OK] Superusuario ja existe: {admin.username}')
+
+    for user_data in DEMO_USERS:
+        user = User.objects.filter(username=user_data['username']).first()
+        if user is None:
+            user = User.objects.create_user(**user_data)
+            log(f'[OK] Usuario criado: {user.username}')
+        else:
+            log(f'[OK] Usuario ja existe: {user.username}')
+
+        for task_data in DEMO_TASKS.get(user.username, []):
+            if Task.objects.filter(user=user, title=task_data['title']).exists():
+                log(f"  [OK] Tarefa ja existe para {user.username}: {task_data['title']}")
+            else:
+                task = Task.objects.create(user=user, assigned_to=user, **task_data)
+                log(f'  [OK] Tarefa criada para {user.username}: {task.title}')
+
+
+def generate_users(count, seed=42, password='senha123', prefix='user', batch_size=1000):
+    """
+    Cria `count` usuários <prefix>0, <prefix>1, ... com nomes sorteados
+    pela semente.
+
+    A senha é transformada em hash uma única vez e o mesmo hash vai para
+    todos (o PBKDF2 de cada um levaria horas em milhares de usuários).
+    Retorna a lista de ids, na ordem dos usernames.
+    """
+    rng = random.Random(seed)
+    password_hash = make_password(password)
+    users = [
+        User(
+            username=f'{prefix}{i}',
+            email=f'{prefix}{i}@example.com',
+            first_name=rng.choice(FIRST_NAMES),
+            last_name=rng.choice(LAST_NAMES),
+            password=password_hash,
+        )
+        for i in range(count)
+    ]
+    with transaction.atomic():
+        users = User.objects.bulk_create(users, batch_size=batch_size)
+    if users and users[0].pk is None:
+        # Banco sem RETURNING no INSERT em lote
+        ids = dict(User.objects.filter(username__startswith=prefix).values_list('username', 'id'))
+        return [ids[user.username] for user in users]
+    return [user.pk for user in users]
+
+
+def generate_tasks(user_ids, count, seed=42, end=None, days=365, assignee_skew=1.0,
+                   self_assigned_share=0.5, completed_share=0.4, batch_size=10000, progress=None):
+    """
+    Cria `count` tarefas entre os usuários `user_ids`, em lotes de
+    `batch_size` linhas (um INSERT executemany e um commit por lote).
+
+    Os criadores são sorteados com a mesma chance; uma fração
+    `self_assigned_share` das tarefas fica com o próprio criador e as
+    outras vão para designados com distribuição de Zipf (expoente
+    `assignee_skew`). As datas de criação ficam espalhadas pelos `days`
+    dias antes de `end`.
+
+    Com a mesma semente, os mesmos usuários e o mesmo `end`, as tarefas
+    geradas são as mesmas. `progress(criadas, total)` é chamado a cada lote.
+    """
+    rng = random.Random(seed)
+    random_text = text_generator(seed)
+    assignee_weights = list(itertools.accumulate(
+        1 / (rank + 1) ** assignee_skew for rank in range(len(user_ids))
+    ))
+
+    sql = insert_statement(Task._meta.db_table, TASK_COLUMNS)
+    adapt = connection.ops.adapt_datetimefield_value
+    start = end - timedelta(days=days)
+    step = timedelta(days=days) / max(count, 1)
+
+    created = 0
+    while created < count:
+        rows = []
+        for i in range(created, min(created + batch_size, count)):
+            creator = rng.choice(user_ids)
+            if rng.random() < self_assigned_share:
+                assignee = creator
+            else:
+                assignee = rng.choices(user_ids, cum_weights=assignee_weights)[0]
+            created_at = start + step * i
+            updated_at = min(created_at + timedelta(minutes=rng.randint(0, 60 * 24 * 30)), end)
+            completed = rng.random() < completed_share
+            rows.append((
+                creator, assignee,
+                random_text(2, 6), random_text(5, 20),
+                'completed' if completed else 'pending',
+                adapt(created_at), adapt(updated_at),
+                adapt(updated_at) if completed else None,
+            ))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        created += len(rows)
+        if progress:
+            progress(created, count)
+    return created
+
+
+@contextlib.contextmanager
+def deferred_indexes(table):
+    """
+    Remove os índices secundários de `table` e os recria na saída (mesmo
+    se a carga falhar). Entrega a lista com os nomes dos índices.
+
+    Só no SQLite, onde o sqlite_master guarda o CREATE INDEX de cada um.
+    Os índices das restrições UNIQUE (sem SQL próprio) ficam.
+    """
+    indexes = []
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master "
+                "WHERE type = 'index' AND tbl_name = %s AND sql IS NOT NULL",
+                [table],
+            )
+            indexes = cursor.fetchall()
+            for name, _ in indexes:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield [name for name, _ in indexes]
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+
+
+@contextlib.contextmanager
+def deferred_search_index():
+    """
+    Desliga os triggers do índice full-text (tasks/search.py) durante a
+    carga e reindexa todas as tarefas de uma vez na saída.
+
+    Entrega True se o índice existia (e vai ser recriado).
+    """
+    backend = SQLiteFTS5Backend()
+    installed = backend.is_available()
+    if installed:
+        with connection.cursor() as cursor:
+            uninstall_sqlite_fts(cursor)
+    try:
+        yield installed
+    finally:
+        if installed:
+            with connection.cursor() as cursor:
+                install_sqlite_fts(cursor)
+        connection._tasks_fts_available = None
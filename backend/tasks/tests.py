@@ -1,8 +1,14 @@
-from django.test import TestCase
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Task
+from .counters import count_tasks
+from .models import Task, TaskCounter
+from .serializers import TaskSerializer
 
 User = get_user_model()
 
@@ -148,3 +154,1660 @@ class TaskAPITestCase(TestCase):
         """
         response = self.client.get('/api/tasks/')
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class TaskQueryCountTestCase(TestCase):
+    """
+    Garante que os endpoints de tarefas fazem um número fixo de consultas,
+    independente de quantas tarefas são retornadas.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        # Tarefas criadas pelos dois usuários, designadas para o outro
+        for i in range(15):
+            Task.objects.create(user=self.user1, assigned_to=self.user2, title=f'Tarefa A{i}')
+            Task.objects.create(user=self.user2, assigned_to=self.user1, title=f'Tarefa B{i}')
+        self.task = Task.objects.filter(user=self.user1).first()
+        self.client.force_authenticate(user=self.user1)
+
+    def test_list_query_count(self):
+        """Listagem: um COUNT por ramo de visibilidade + SELECT com os usernames."""
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['user'], 'testuser2')
+        self.assertEqual(response.data['results'][0]['assigned_to_username'], 'testuser1')
+
+    def test_list_query_count_for_admin(self):
+        """Admin vê todas as tarefas com o mesmo número de consultas."""
+        admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='admin123'
+        )
+        self.client.force_authenticate(user=admin)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 30)
+
+    def test_retrieve_query_count(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/tasks/{self.task.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user'], 'testuser1')
+        self.assertEqual(response.data['assigned_to_username'], 'testuser2')
+
+    def test_complete_query_count(self):
+        """
+        SELECT + releitura do estado na transação + UPDATE da tarefa + um
+        UPDATE de contador por usuário (e o savepoint).
+        """
+        with self.assertNumQueries(7):
+            response = self.client.post(f'/api/tasks/{self.task.id}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['completed'])
+        self.assertEqual(response.data['assigned_to_username'], 'testuser2')
+
+    def test_reopen_query_count(self):
+        self.task.status = 'completed'
+        self.task.save()
+        with self.assertNumQueries(7):
+            response = self.client.post(f'/api/tasks/{self.task.id}/reopen/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['completed'])
+        self.assertIsNone(response.data['completed_at'])
+
+
+class TaskCursorPaginationTestCase(TestCase):
+    """
+    Testes para a paginação por cursor da listagem de tarefas.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        for i in range(45):
+            Task.objects.create(
+                user=self.user,
+                assigned_to=self.user,
+                title=f'Tarefa {i}',
+                status='completed' if i % 3 == 0 else 'pending'
+            )
+        self.client.force_authenticate(user=self.user)
+
+    def collect_pages(self, url):
+        """Segue os links 'next' e retorna os ids na ordem recebida."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get('/api/tasks/?page=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 45)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_cursor_mode_walks_every_ordering(self):
+        """Para cada ordenação permitida, o cursor percorre tudo sem repetir nem pular."""
+        for ordering in ['-created_at', 'created_at', 'updated_at', '-updated_at', 'status', '-status']:
+            ids = self.collect_pages(f'/api/tasks/?pagination=cursor&ordering={ordering}')
+            self.assertEqual(len(ids), 45)
+            self.assertEqual(len(set(ids)), 45)
+            if ordering.lstrip('-') == 'status':
+                by_id = dict(Task.objects.values_list('id', 'status'))
+                ordered_statuses = [by_id[i] for i in ids]
+                self.assertEqual(ordered_statuses, sorted(ordered_statuses, reverse=ordering.startswith('-')))
+
+    def test_cursor_mode_without_count_or_offset(self):
+        from django.test.utils import CaptureQueriesContext
+
+        response = self.client.get('/api/tasks/?pagination=cursor')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(response.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        sql = ctx.captured_queries[0]['sql'].upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_previous_link_returns_same_page(self):
+        first = self.client.get('/api/tasks/?pagination=cursor')
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(
+            [item['id'] for item in back.data['results']],
+            [item['id'] for item in first.data['results']]
+        )
+
+    def test_cursor_keeps_filters(self):
+        ids = self.collect_pages('/api/tasks/?pagination=cursor&status=completed')
+        self.assertEqual(len(ids), 15)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/tasks/?cursor=invalido')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_malformed_cursor_values(self):
+        import base64
+        import json
+        from urllib.parse import parse_qs, urlsplit
+
+        response = self.client.get('/api/tasks/?pagination=cursor')
+        cursor = parse_qs(urlsplit(response.data['next']).query)['cursor'][0]
+        signature = json.loads(base64.urlsafe_b64decode(cursor))['o']
+        for values in (7, [None, None], ['x', 'y'], [1, 2]):
+            payload = json.dumps({'o': signature, 'v': values, 'r': False}).encode('utf-8')
+            cursor = base64.urlsafe_b64encode(payload).decode('ascii')
+            response = self.client.get('/api/tasks/', {'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, values)
+
+    def test_cursor_from_other_ordering_is_rejected(self):
+        response = self.client.get('/api/tasks/?pagination=cursor')
+        next_url = response.data['next'] + '&ordering=status'
+        response = self.client.get(next_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskVisibilityTestCase(TestCase):
+    """
+    Testes da listagem por ramos de visibilidade (UNION ALL).
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        self.user3 = User.objects.create_user(
+            username='testuser3',
+            email='test3@example.com',
+            password='testpass123'
+        )
+        self.own = Task.objects.create(user=self.user1, assigned_to=self.user1, title='Própria')
+        self.created = Task.objects.create(user=self.user1, assigned_to=self.user2, title='Criada')
+        self.assigned = Task.objects.create(
+            user=self.user2, assigned_to=self.user1, title='Designada', status='completed'
+        )
+        self.other = Task.objects.create(user=self.user2, assigned_to=self.user3, title='Outra')
+        self.client.force_authenticate(user=self.user1)
+
+    def test_list_has_each_visible_task_once(self):
+        response = self.client.get('/api/tasks/')
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [self.assigned.id, self.created.id, self.own.id]
+        )
+
+    def test_filters_search_and_ordering_apply_to_both_branches(self):
+        response = self.client.get('/api/tasks/?status=pending&ordering=created_at')
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [self.own.id, self.created.id]
+        )
+        response = self.client.get('/api/tasks/?search=Designada')
+        self.assertEqual([item['id'] for item in response.data['results']], [self.assigned.id])
+
+    def test_retrieve_invisible_task_returns_404(self):
+        response = self.client.get(f'/api/tasks/{self.other.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.post(f'/api/tasks/{self.other.id}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_assigned_task(self):
+        response = self.client.get(f'/api/tasks/{self.assigned.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user'], 'testuser2')
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plano de consulta específico do SQLite')
+    def test_list_plan_uses_branch_indexes(self):
+        from .querysets import TaskUnion, visibility_branches
+
+        union = TaskUnion(visibility_branches(Task.objects.order_by('-created_at'), self.user1))
+        plan = union.combined()[:20].explain()
+        self.assertIn('UNION ALL', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class TaskSearchTestCase(TestCase):
+    """
+    Testes da busca full-text de tarefas.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.report = Task.objects.create(
+            user=self.user, assigned_to=self.user,
+            title='Relatório mensal', description='Enviar para o financeiro'
+        )
+        self.meeting = Task.objects.create(
+            user=self.user, assigned_to=self.user,
+            title='Reunião com cliente', description='Levar o relatório impresso'
+        )
+        self.other = Task.objects.create(
+            user=self.user, assigned_to=self.user,
+            title='Backup do servidor', description=None
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def search(self, query, extra=''):
+        response = self.client.get(f'/api/tasks/?search={query}{extra}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_prefix_and_accent_insensitive(self):
+        self.assertEqual(self.search('reun'), [self.meeting.id])
+        self.assertEqual(self.search('relatorio'), [self.report.id, self.meeting.id])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('relat impresso'), [self.meeting.id])
+        self.assertEqual(self.search('relat backup'), [])
+
+    def test_ranked_by_relevance_unless_ordering_given(self):
+        """Título pesa mais que a descrição."""
+        self.assertEqual(self.search('relatorio'), [self.report.id, self.meeting.id])
+        self.assertEqual(
+            self.search('relatorio', '&ordering=-created_at'),
+            [self.meeting.id, self.report.id]
+        )
+
+    def test_index_follows_updates_and_deletes(self):
+        self.other.title = 'Auditoria anual'
+        self.other.save()
+        self.assertEqual(self.search('backup'), [])
+        self.assertEqual(self.search('audit'), [self.other.id])
+
+        self.other.delete()
+        self.assertEqual(self.search('audit'), [])
+
+    def test_search_with_cursor_pagination(self):
+        from unittest import mock
+        from .pagination import TaskPagination
+
+        ids = []
+        url = '/api/tasks/?search=relatorio&pagination=cursor'
+        with mock.patch.object(TaskPagination, 'page_size', 1):
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                ids.extend(item['id'] for item in response.data['results'])
+                url = response.data['next']
+        self.assertEqual(ids, [self.report.id, self.meeting.id])
+
+    def test_fallback_without_backend(self):
+        from django.test import override_settings
+
+        with override_settings(TASK_SEARCH_BACKEND=None):
+            self.assertEqual(self.search('Reunião'), [self.meeting.id])
+            self.assertEqual(self.search('ório'), [self.meeting.id, self.report.id])
+
+
+class TaskFilterTestCase(TestCase):
+    """
+    Testes dos filtros de data (no fuso local) e dos filtros por usuário.
+    """
+
+    def setUp(self):
+        from datetime import datetime
+        from django.utils import timezone
+
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='admin123'
+        )
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        # 23:30 em São Paulo já é o dia seguinte em UTC
+        self.late = Task.objects.create(user=self.user1, assigned_to=self.user1, title='Tarde')
+        self.next_day = Task.objects.create(user=self.admin, assigned_to=self.user1, title='Dia seguinte')
+        Task.objects.filter(pk=self.late.pk).update(
+            created_at=timezone.make_aware(datetime(2024, 5, 10, 23, 30)),
+            completed_at=timezone.make_aware(datetime(2024, 5, 12, 8, 0)),
+            status='completed'
+        )
+        Task.objects.filter(pk=self.next_day.pk).update(
+            created_at=timezone.make_aware(datetime(2024, 5, 11, 0, 30))
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def ids(self, query):
+        response = self.client.get(f'/api/tasks/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(item['id'] for item in response.data['results'])
+
+    def test_created_at_uses_local_day(self):
+        self.assertEqual(self.ids('created_at=2024-05-10'), [self.late.id])
+        self.assertEqual(self.ids('created_at=2024-05-11'), [self.next_day.id])
+        self.assertEqual(self.ids('created_at_lte=2024-05-10'), [self.late.id])
+        self.assertEqual(self.ids('created_at_gte=2024-05-11'), [self.next_day.id])
+        self.assertEqual(
+            self.ids('created_at_gte=2024-05-10&created_at_lte=2024-05-11'),
+            [self.late.id, self.next_day.id]
+        )
+
+    def test_completed_and_updated_ranges(self):
+        self.assertEqual(self.ids('completed_at_gte=2024-05-12'), [self.late.id])
+        self.assertEqual(self.ids('completed_at_lte=2024-05-11'), [])
+        self.assertEqual(
+            self.ids('updated_at_gte=2000-01-01T00:00:00Z'),
+            [self.late.id, self.next_day.id]
+        )
+        self.assertEqual(self.ids('updated_at_gte=2999-01-01T00:00:00Z'), [])
+
+    def test_user_and_assigned_to(self):
+        self.assertEqual(self.ids(f'user={self.admin.id}'), [self.next_day.id])
+        self.assertEqual(self.ids(f'assigned_to={self.user1.id}'), [self.late.id, self.next_day.id])
+        self.assertEqual(self.ids(f'assigned_to={self.admin.id}'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plano de consulta específico do SQLite')
+    def test_every_filter_and_ordering_uses_an_index(self):
+        """Nenhuma combinação de filtro e ordenação faz full scan em tasks_task."""
+        from django.test.utils import CaptureQueriesContext
+
+        filters = [
+            '', 'status=pending', 'created_at=2024-05-10', 'created_at_gte=2024-05-10',
+            'created_at_lte=2024-05-10', 'completed_at_gte=2024-05-10', 'completed_at_lte=2024-05-10',
+            'updated_at_gte=2024-05-10T00:00:00Z', f'assigned_to={self.user1.id}', f'user={self.user1.id}',
+        ]
+        orderings = ['', 'created_at', '-created_at', 'updated_at', '-updated_at', 'status', '-status']
+
+        for user in (self.admin, self.user1):
+            self.client.force_authenticate(user=user)
+            for query_filter in filters:
+                for ordering in orderings:
+                    query = f'{query_filter}&ordering={ordering}' if ordering else query_filter
+                    with CaptureQueriesContext(connection) as ctx:
+                        response = self.client.get(f'/api/tasks/?{query}')
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    for captured in ctx.captured_queries:
+                        if 'tasks_task' not in captured['sql']:
+                            continue
+                        with connection.cursor() as cursor:
+                            cursor.execute('EXPLAIN QUERY PLAN ' + captured['sql'])
+                            plan = [row[-1] for row in cursor.fetchall()]
+                        full_scans = [
+                            line for line in plan
+                            if line.startswith('SCAN tasks_task') and 'USING' not in line
+                        ]
+                        self.assertEqual(full_scans, [], f'{user.username} ?{query}: {plan}')
+
+
+class TaskCounterTestCase(TestCase):
+    """
+    Testes dos contadores por usuário e do endpoint /api/tasks/stats/.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user1)
+
+    def assertCountersMatch(self):
+        """Os contadores mantidos por delta batem com a contagem real."""
+        expected = count_tasks()
+        for counter in TaskCounter.objects.all():
+            totals = expected.get(counter.user_id, {})
+            for field in ['created_pending', 'created_completed', 'assigned_pending', 'assigned_completed']:
+                self.assertEqual(getattr(counter, field), totals.get(field, 0), field)
+
+    def test_counters_follow_writes(self):
+        self.client.post('/api/tasks/', {'title': 'Minha', 'assigned_to': self.user1.id})
+        self.client.post('/api/tasks/', {'title': 'Para o outro', 'assigned_to': self.user2.id})
+        task_id = Task.objects.get(title='Para o outro').id
+        self.assertCountersMatch()
+
+        self.client.post(f'/api/tasks/{task_id}/complete/')
+        self.assertCountersMatch()
+        self.client.patch(f'/api/tasks/{task_id}/', {'status': 'pending'})
+        self.assertCountersMatch()
+        self.client.patch(f'/api/tasks/{task_id}/', {'status': 'completed'})
+        self.assertCountersMatch()
+        self.client.post(f'/api/tasks/{task_id}/reopen/')
+        self.assertCountersMatch()
+        self.client.delete(f'/api/tasks/{task_id}/')
+        self.assertCountersMatch()
+
+        Task.objects.filter(user=self.user1).delete()
+        self.assertCountersMatch()
+        counter = TaskCounter.objects.get(user=self.user2)
+        self.assertEqual(counter.assigned_pending, 0)
+
+    def test_deleting_stale_instance_discounts_stored_state(self):
+        task = Task.objects.create(user=self.user1, assigned_to=self.user2, title='Disputada')
+        stale = Task.objects.get(pk=task.pk)
+        gone = Task.objects.get(pk=task.pk)
+
+        task.status = 'completed'
+        task.assigned_to = self.user1
+        task.save()
+        # Carregada antes do save: ainda acha que está pendente e com o user2
+        stale.delete()
+        self.assertCountersMatch()
+        counter = TaskCounter.objects.get(user=self.user1)
+        self.assertEqual((counter.created_completed, counter.assigned_completed), (0, 0))
+
+        # Já apagada por outra requisição: nada a descontar
+        gone.delete()
+        self.assertCountersMatch()
+        counter = TaskCounter.objects.get(user=self.user2)
+        self.assertEqual(counter.assigned_pending, 0)
+
+    def test_stale_instances_do_not_double_count(self):
+        task = Task.objects.create(user=self.user1, assigned_to=self.user2, title='Disputada')
+        first = Task.objects.get(pk=task.pk)
+        second = Task.objects.get(pk=task.pk)
+
+        first.status = 'completed'
+        first.save()
+        # Carregada antes do primeiro save: ainda acha que está pendente
+        second.status = 'completed'
+        second.save()
+        self.assertCountersMatch()
+        counter = TaskCounter.objects.get(user=self.user1)
+        self.assertEqual((counter.created_pending, counter.created_completed), (0, 1))
+
+        first.status = 'pending'
+        first.assigned_to = self.user1
+        first.save()
+        second.status = 'pending'
+        second.save()
+        self.assertCountersMatch()
+
+    def test_counters_follow_user_cascade(self):
+        Task.objects.create(user=self.user2, assigned_to=self.user1, title='Tarefa')
+        self.user2.delete()
+        self.assertEqual(TaskCounter.objects.get(user=self.user1).assigned_pending, 0)
+
+    def test_stats(self):
+        Task.objects.create(user=self.user1, assigned_to=self.user1, title='Minha')
+        Task.objects.create(user=self.user1, assigned_to=self.user2, title='Para o outro', status='completed')
+        Task.objects.create(user=self.user2, assigned_to=self.user1, title='Recebida')
+        Task.objects.create(user=self.user2, assigned_to=self.user2, title='Invisível')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/tasks/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], {'pending': 1, 'completed': 1})
+        self.assertEqual(response.data['assigned'], {'pending': 1, 'completed': 0})
+        self.assertEqual(response.data['visible'], {'pending': 2, 'completed': 1, 'total': 3})
+
+        admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='admin123'
+        )
+        self.client.force_authenticate(user=admin)
+        response = self.client.get('/api/tasks/stats/')
+        self.assertEqual(response.data['created'], {'pending': 0, 'completed': 0})
+        self.assertEqual(response.data['visible'], {'pending': 3, 'completed': 1, 'total': 4})
+
+    def test_rebuild_command(self):
+        from django.core.management import call_command
+        from io import StringIO
+
+        Task.objects.create(user=self.user1, assigned_to=self.user2, title='Tarefa')
+        # QuerySet.update não passa pelos contadores
+        Task.objects.all().update(status='completed')
+        call_command('rebuild_task_counters', stdout=StringIO())
+        self.assertCountersMatch()
+        self.assertEqual(TaskCounter.objects.get(user=self.user1).created_completed, 1)
+
+
+class TaskBulkTestCase(TestCase):
+    """
+    Testes das operações em lote (bulk-create/update/complete/delete).
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        self.other = Task.objects.create(user=self.user2, assigned_to=self.user2, title='Alheia')
+        self.client.force_authenticate(user=self.user1)
+
+    def assertCountersMatch(self):
+        expected = count_tasks()
+        for counter in TaskCounter.objects.all():
+            totals = expected.get(counter.user_id, {})
+            for field in ['created_pending', 'created_completed', 'assigned_pending', 'assigned_completed']:
+                self.assertEqual(getattr(counter, field), totals.get(field, 0), field)
+
+    def test_bulk_create(self):
+        items = [{'title': f'Tarefa {i}', 'assigned_to': self.user2.id} for i in range(1000)]
+        items[1] = {'title': '', 'assigned_to': self.user2.id}
+        items[2] = {'title': 'Sem usuário', 'assigned_to': 9999}
+
+        # Usuários numa consulta só, INSERTs de várias linhas (o SQLite limita
+        # os parâmetros por comando) e um UPDATE de contador por usuário
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/tasks/bulk-create/', items)
+        self.assertLess(len(queries), 20)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(len(results), 1000)
+        self.assertEqual(results[0]['status'], 201)
+        self.assertEqual(results[0]['data']['user'], 'testuser1')
+        self.assertEqual(results[0]['data']['assigned_to_username'], 'testuser2')
+        self.assertEqual(results[0]['id'], results[0]['data']['id'])
+        self.assertEqual(results[1]['status'], 400)
+        self.assertIn('title', results[1]['errors'])
+        self.assertIn('assigned_to', results[2]['errors'])
+        self.assertEqual(Task.objects.filter(user=self.user1).count(), 998)
+        self.assertCountersMatch()
+
+    def test_bulk_create_rejects_oversized_batch(self):
+        items = [{'title': 'Tarefa', 'assigned_to': self.user2.id}] * 1001
+        response = self.client.post('/api/tasks/bulk-create/', items)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Task.objects.filter(user=self.user1).exists())
+
+    def test_bulk_update_keeps_completed_at_semantics(self):
+        tasks = [
+            Task.objects.create(user=self.user1, assigned_to=self.user2, title=f'Tarefa {i}')
+            for i in range(3)
+        ]
+        response = self.client.post('/api/tasks/bulk-update/', [
+            {'id': tasks[0].id, 'status': 'completed'},
+            {'id': tasks[1].id, 'title': 'Novo título'},
+            {'id': tasks[2].id, 'status': 'invalido'},
+            {'id': self.other.id, 'status': 'completed'},
+            {'title': 'Sem id'},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in response.data['results']], [200, 200, 400, 404, 400])
+        self.assertIsNotNone(response.data['results'][0]['data']['completed_at'])
+
+        tasks[0].refresh_from_db()
+        tasks[1].refresh_from_db()
+        self.assertEqual(tasks[0].status, 'completed')
+        self.assertIsNotNone(tasks[0].completed_at)
+        self.assertEqual(tasks[1].title, 'Novo título')
+        self.assertIsNone(tasks[1].completed_at)
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.status, 'pending')
+        self.assertCountersMatch()
+
+        response = self.client.post('/api/tasks/bulk-update/', [{'id': tasks[0].id, 'status': 'pending'}])
+        tasks[0].refresh_from_db()
+        self.assertIsNone(tasks[0].completed_at)
+        self.assertCountersMatch()
+
+    def test_bulk_complete(self):
+        tasks = [
+            Task.objects.create(user=self.user2, assigned_to=self.user1, title=f'Tarefa {i}')
+            for i in range(5)
+        ]
+        tasks[0].status = 'completed'
+        tasks[0].save()
+        completed_at = Task.objects.get(pk=tasks[0].pk).completed_at
+
+        ids = [task.id for task in tasks] + [self.other.id]
+        response = self.client.post('/api/tasks/bulk-complete/', {'ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in response.data['results']], [200] * 5 + [404])
+        self.assertTrue(all(r['data']['completed'] for r in response.data['results'][:5]))
+        self.assertEqual(Task.objects.filter(assigned_to=self.user1, status='completed').count(), 5)
+        # Tarefa que já estava concluída mantém a data original
+        self.assertEqual(Task.objects.get(pk=tasks[0].pk).completed_at, completed_at)
+        self.assertCountersMatch()
+
+    def test_bulk_delete(self):
+        tasks = [
+            Task.objects.create(user=self.user1, assigned_to=self.user2, title=f'Tarefa {i}')
+            for i in range(5)
+        ]
+        ids = [task.id for task in tasks] + [self.other.id, 'abc']
+        response = self.client.post('/api/tasks/bulk-delete/', {'ids': ids})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['status'] for r in response.data['results']], [204] * 5 + [404, 404])
+        self.assertFalse(Task.objects.filter(user=self.user1).exists())
+        self.assertTrue(Task.objects.filter(pk=self.other.pk).exists())
+        self.assertCountersMatch()
+
+
+    def stale_read(self):
+        """
+        Simula outra requisição concluindo a primeira tarefa logo depois
+        que a operação em lote carregou as instâncias.
+        """
+        from unittest import mock
+        from tasks.bulk import TaskBulkMixin
+
+        original = TaskBulkMixin.get_visible_tasks
+
+        def get_visible_tasks(view, pks):
+            tasks = original(view, pks)
+            concurrent = Task.objects.get(pk=pks[0])
+            concurrent.status = 'completed'
+            concurrent.save()
+            return tasks
+        return mock.patch.object(TaskBulkMixin, 'get_visible_tasks', get_visible_tasks)
+
+    def test_bulk_complete_with_stale_read(self):
+        tasks = [Task.objects.create(user=self.user1, assigned_to=self.user2, title=f'T{i}') for i in range(3)]
+        with self.stale_read():
+            response = self.client.post('/api/tasks/bulk-complete/', {'ids': [t.id for t in tasks]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountersMatch()
+        self.assertEqual(TaskCounter.objects.get(user=self.user1).created_completed, 3)
+        self.assertEqual([item['data']['completed'] for item in response.data['results']], [True] * 3)
+
+    def test_bulk_update_with_stale_read(self):
+        tasks = [Task.objects.create(user=self.user1, assigned_to=self.user2, title=f'T{i}') for i in range(2)]
+        items = [{'id': t.id, 'status': 'completed'} for t in tasks]
+        with self.stale_read():
+            response = self.client.post('/api/tasks/bulk-update/', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountersMatch()
+
+
+class TaskBulkTransitionTestCase(TestCase):
+    """
+    Testes do bulk-transition (mudança de status pelos filtros da URL).
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            username='admin',
+            email='admin@example.com',
+            password='admin123'
+        )
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        for i in range(3):
+            Task.objects.create(user=self.admin, assigned_to=self.user1, title=f'Para user1 {i}')
+            Task.objects.create(user=self.admin, assigned_to=self.user2, title=f'Para user2 {i}')
+        self.client.force_authenticate(user=self.admin)
+
+    def assertCountersMatch(self):
+        expected = count_tasks()
+        for counter in TaskCounter.objects.all():
+            totals = expected.get(counter.user_id, {})
+            for field in ['created_pending', 'created_completed', 'assigned_pending', 'assigned_completed']:
+                self.assertEqual(getattr(counter, field), totals.get(field, 0), field)
+
+    def test_complete_by_filter(self):
+        # GROUP BY dos contadores + UPDATEs dos contadores + UPDATE das tarefas
+        with self.assertNumQueries(6):
+            response = self.client.post(
+                f'/api/tasks/bulk-transition/?assigned_to={self.user1.id}', {'status': 'completed'}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'status': 'completed', 'updated': 3})
+        self.assertFalse(Task.objects.filter(assigned_to=self.user1, completed_at__isnull=True).exists())
+        self.assertFalse(Task.objects.filter(assigned_to=self.user2, status='completed').exists())
+        self.assertCountersMatch()
+
+        # Reabrir limpa completed_at
+        response = self.client.post('/api/tasks/bulk-transition/?status=completed', {'status': 'pending'})
+        self.assertEqual(response.data['updated'], 3)
+        self.assertFalse(Task.objects.filter(completed_at__isnull=False).exists())
+        self.assertCountersMatch()
+
+    def test_respects_visibility(self):
+        Task.objects.create(user=self.user2, assigned_to=self.user2, title='Só do user2')
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.post('/api/tasks/bulk-transition/?status=pending', {'status': 'completed'})
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(Task.objects.filter(status='completed').count(), 3)
+        self.assertCountersMatch()
+
+    def test_requires_filter_and_valid_status(self):
+        response = self.client.post('/api/tasks/bulk-transition/', {'status': 'completed'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/tasks/bulk-transition/?status=pending', {'status': 'done'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Task.objects.filter(status='completed').exists())
+
+    @skipUnless(connection.vendor == 'sqlite', 'índice FTS5 só existe no SQLite')
+    def test_search_filter(self):
+        response = self.client.post('/api/tasks/bulk-transition/?search=user2', {'status': 'completed'})
+        self.assertEqual(response.data['updated'], 3)
+        self.assertCountersMatch()
+
+
+class TaskConditionalGetTestCase(TestCase):
+    """
+    Testes de ETag/Last-Modified na listagem e no detalhe.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        self.tasks = [
+            Task.objects.create(user=self.user1, assigned_to=self.user2, title=f'Tarefa {i}')
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.user1)
+
+    def test_list_not_modified(self):
+        response = self.client.get('/api/tasks/')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+        # Só as consultas dos metadados (uma por ramo de visibilidade)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get('/api/tasks/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Filtros diferentes, ETag diferente
+        response = self.client.get('/api/tasks/?status=pending', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_changes_on_update_and_delete(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        self.client.post(f'/api/tasks/{self.tasks[0].id}/complete/')
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response['ETag']
+        self.client.delete(f'/api/tasks/{self.tasks[1].id}/')
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_list_etag_depends_on_user(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cursor_page_not_modified(self):
+        response = self.client.get('/api/tasks/?pagination=cursor')
+        etag = response['ETag']
+        response = self.client.get('/api/tasks/?pagination=cursor', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Task.objects.create(user=self.user1, assigned_to=self.user1, title='Nova')
+        response = self.client.get('/api/tasks/?pagination=cursor', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_not_modified(self):
+        url = f'/api/tasks/{self.tasks[0].id}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.patch(url, {'title': 'Outro título'})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], 'Outro título')
+
+
+@override_settings(TASK_SYNC_SETTLE_SECONDS=0)
+class TaskChangesTestCase(TestCase):
+    """
+    Testes da sincronização incremental (/api/tasks/changes/).
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        self.mine = Task.objects.create(user=self.user1, assigned_to=self.user1, title='Minha')
+        self.received = Task.objects.create(user=self.user2, assigned_to=self.user1, title='Recebida')
+        self.hidden = Task.objects.create(user=self.user2, assigned_to=self.user2, title='Invisível')
+        self.client.force_authenticate(user=self.user1)
+
+    def sync(self, since=None, **params):
+        if since:
+            params['since'] = since
+        response = self.client.get('/api/tasks/changes/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_initial_then_incremental(self):
+        data = self.sync()
+        self.assertEqual(
+            sorted(item['id'] for item in data['changed']), sorted([self.mine.id, self.received.id])
+        )
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['has_more'])
+
+        # Nada mudou
+        data = self.sync(data['since'])
+        self.assertEqual(data['changed'], [])
+
+        self.client.post(f'/api/tasks/{self.received.id}/complete/')
+        Task.objects.filter(pk=self.hidden.pk).update(title='Ainda invisível')
+        data = self.sync(data['since'])
+        self.assertEqual([item['id'] for item in data['changed']], [self.received.id])
+        self.assertTrue(data['changed'][0]['completed'])
+
+    def test_deletions_are_reported_to_visible_users(self):
+        since = self.sync()['since']
+        expected = sorted([self.mine.id, self.received.id])
+        self.client.delete(f'/api/tasks/{self.mine.id}/')
+        self.received.delete()
+        self.hidden.delete()
+
+        data = self.sync(since)
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(sorted(data['deleted']), expected)
+
+        data = self.sync(data['since'])
+        self.assertEqual(data['deleted'], [])
+
+    def test_pages_with_limit(self):
+        for i in range(5):
+            Task.objects.create(user=self.user1, assigned_to=self.user2, title=f'Tarefa {i}')
+        since, seen, calls = None, [], 0
+        while True:
+            data = self.sync(since, limit=2)
+            seen += [item['id'] for item in data['changed']]
+            since = data['since']
+            calls += 1
+            if not data['has_more']:
+                break
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+        self.assertEqual(calls, 4)
+
+    def test_invalid_and_expired_tokens(self):
+        response = self.client.get('/api/tasks/changes/', {'since': 'invalido'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        from tasks.sync import encode_token
+        old = encode_token(None, ['2000-01-01T00:00:00+00:00', 0])
+        response = self.client.get('/api/tasks/changes/', {'since': old})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+        # Sem a posição das exclusões
+        response = self.client.get('/api/tasks/changes/', {'since': encode_token(None, None)})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_write_shows_up_shortly_after_commit(self):
+        from datetime import timedelta
+        from unittest import mock
+        from django.utils import timezone
+        from config import settings as project_settings
+
+        # A janela padrão cobre uma transação, não a espera pela trava
+        settle = project_settings.TASK_SYNC_SETTLE_SECONDS
+        self.assertLessEqual(settle, 2)
+        with self.settings(TASK_SYNC_SETTLE_SECONDS=settle):
+            since = self.sync()['since']
+            response = self.client.post(
+                f'/api/tasks/bulk-transition/?assigned_to={self.user1.id}', {'status': 'completed'}
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            later = timezone.now() + timedelta(seconds=settle + 0.1)
+            with mock.patch('tasks.sync.timezone.now', return_value=later):
+                data = self.sync(since)
+        self.assertIn(self.mine.id, [item['id'] for item in data['changed']])
+
+
+class TaskEventsTestCase(TestCase):
+    """
+    Testes das notificações em tempo real (broker e stream SSE).
+    """
+
+    def setUp(self):
+        from tasks.events import get_broker
+
+        get_broker.cache_clear()
+        self.broker = get_broker()
+        self.user1 = User.objects.create_user(
+            username='testuser1',
+            email='test1@example.com',
+            password='testpass123'
+        )
+        self.user2 = User.objects.create_user(
+            username='testuser2',
+            email='test2@example.com',
+            password='testpass123'
+        )
+        self.user3 = User.objects.create_user(
+            username='testuser3',
+            email='test3@example.com',
+            password='testpass123'
+        )
+
+    def test_creator_and_assignee_are_notified(self):
+        import asyncio
+
+        async def subscribe():
+            return [self.broker.subscribe(user.pk) for user in (self.user1, self.user2, self.user3)]
+
+        async def drain(subscriptions):
+            received = []
+            for subscription in subscriptions:
+                events = []
+                while (event := await subscription.get(timeout=0.1)) is not None:
+                    events.append(event['type'])
+                received.append(events)
+                subscription.close()
+            return received
+
+        loop = asyncio.new_event_loop()
+        try:
+            subscriptions = loop.run_until_complete(subscribe())
+            # As escritas rodam fora do loop, como nas views síncronas; o
+            # on_commit só roda ao fim da transação, aqui executamos na hora
+            with self.captureOnCommitCallbacks(execute=True):
+                task = Task.objects.create(user=self.user1, assigned_to=self.user2, title='Nova')
+            with self.captureOnCommitCallbacks(execute=True):
+                task.status = 'completed'
+                task.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                task.status = 'pending'
+                task.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                task.title = 'Editada'
+                task.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                task.delete()
+            received = loop.run_until_complete(drain(subscriptions))
+        finally:
+            loop.close()
+
+        expected = ['created', 'completed', 'reopened', 'updated', 'deleted']
+        self.assertEqual(received, [expected, expected, []])
+        self.assertEqual(self.broker.connection_count(), 0)
+
+    def test_slow_subscriber_gets_resync_flag(self):
+        import asyncio
+
+        async def scenario():
+            subscription = self.broker.subscribe(self.user1.pk)
+            for i in range(self.broker.max_queue + 1):
+                self.broker.publish([self.user1.pk], {'type': 'updated', 'task': {'id': i}})
+            await asyncio.sleep(0)
+            subscription.close()
+            return subscription
+
+        subscription = asyncio.run(scenario())
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(subscription.queue.qsize(), self.broker.max_queue)
+
+    def test_stream_requires_valid_token(self):
+        response = self.client.get('/api/tasks/events/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/api/tasks/events/?token=invalido')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stream_needs_asgi(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = str(AccessToken.for_user(self.user2))
+        response = self.client.get('/api/tasks/events/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+        self.assertIn('ASGI', response.json()['detail'])
+
+    async def test_stream_delivers_events(self):
+        from asgiref.sync import sync_to_async
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = str(AccessToken.for_user(self.user2))
+        response = await self.async_client.get(
+            '/api/tasks/events/', headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertIn(b'retry:', await anext(chunks))
+
+        def create_task():
+            with self.captureOnCommitCallbacks(execute=True):
+                return Task.objects.create(user=self.user1, assigned_to=self.user2, title='Para você')
+        task = await sync_to_async(create_task)()
+
+        chunk = (await anext(chunks)).decode()
+        self.assertTrue(chunk.startswith('event: created\n'))
+        self.assertIn(f'"id": {task.pk}', chunk)
+        await chunks.aclose()
+
+    # Importar config.asgi liga as threads de fundo; aqui não queremos o
+    # flusher do last_login escrevendo fora da transação do teste
+    @override_settings(LAST_LOGIN_FLUSH_SECONDS=0)
+    async def test_asgi_app_streams_and_stops_on_disconnect(self):
+        import asyncio
+        from asgiref.sync import sync_to_async
+        from rest_framework_simplejwt.tokens import AccessToken
+        from config.asgi import application
+
+        token = str(AccessToken.for_user(self.user1))
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/api/tasks/events/',
+            'query_string': f'token={token}'.encode(), 'headers': [(b'origin', b'http://localhost:3000')],
+        }
+        disconnected = asyncio.Event()
+        messages = asyncio.Queue()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        connection = asyncio.ensure_future(application(scope, receive, messages.put))
+        start = await asyncio.wait_for(messages.get(), 5)
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        self.assertIn((b'access-control-allow-origin', b'http://localhost:3000'), start['headers'])
+        self.assertIn(b'retry:', (await asyncio.wait_for(messages.get(), 5))['body'])
+
+        def create_task():
+            with self.captureOnCommitCallbacks(execute=True):
+                return Task.objects.create(user=self.user1, assigned_to=self.user1, title='Minha')
+        task = await sync_to_async(create_task)()
+        body = (await asyncio.wait_for(messages.get(), 5))['body'].decode()
+        self.assertTrue(body.startswith('event: created\n'))
+        self.assertIn(f'"id": {task.pk}', body)
+
+        disconnected.set()
+        await asyncio.wait_for(connection, 5)
+        self.assertEqual(self.broker.connection_count(), 0)
+
+    # Importar config.asgi liga as threads de fundo; aqui não queremos o
+    # flusher do last_login escrevendo fora da transação do teste
+    @override_settings(LAST_LOGIN_FLUSH_SECONDS=0)
+    async def test_asgi_app_requires_valid_token(self):
+        import asyncio
+        from config.asgi import application
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/tasks/events/', 'query_string': b'', 'headers': []}
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        await asyncio.wait_for(application(scope, receive, send), 5)
+        self.assertEqual(messages[0]['status'], 401)
+
+    def test_ticket_opens_stream_without_token_in_url(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        from tasks.streams import ticket_seconds
+
+        token = str(AccessToken.for_user(self.user2))
+        response = self.client.post('/api/tasks/events/ticket/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['expires_in'], ticket_seconds())
+        ticket = response.json()['ticket']
+
+        # No WSGI o ticket autentica e a resposta é o 501 de sempre
+        response = self.client.get('/api/tasks/events/', {'ticket': ticket})
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+        for bad in (ticket[:-2] + 'xx', 'invalido'):
+            response = self.client.get('/api/tasks/events/', {'ticket': bad})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Vencido: a validade é conferida na abertura do stream
+        with override_settings(TASK_EVENTS_TICKET_SECONDS=-1):
+            response = self.client.get('/api/tasks/events/', {'ticket': ticket})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    # Importar config.asgi liga as threads de fundo; aqui não queremos o
+    # flusher do last_login escrevendo fora da transação do teste
+    @override_settings(LAST_LOGIN_FLUSH_SECONDS=0)
+    async def test_asgi_app_answers_503_when_user_lookup_fails(self):
+        import asyncio
+        from unittest import mock
+        from django.db import OperationalError
+        from rest_framework_simplejwt.tokens import AccessToken
+        from config.asgi import application
+
+        token = str(AccessToken.for_user(self.user1))
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/api/tasks/events/', 'query_string': b'',
+            'headers': [(b'authorization', f'Bearer {token}'.encode())],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        with mock.patch('tasks.streams._load_user', side_effect=OperationalError('database is locked')), \
+                self.assertLogs('tasks.streams', 'ERROR'):
+            await asyncio.wait_for(application(scope, receive, send), 5)
+        self.assertEqual(messages[0]['status'], 503)
+        self.assertIn((b'retry-after', b'5'), messages[0]['headers'])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Perfil do SQLite')
+class SQLiteProfileTestCase(TransactionTestCase):
+    """
+    Testes do perfil do SQLite (settings.SQLITE_PRAGMAS, config/database.py).
+
+    TransactionTestCase: a repetição só acontece fora de uma transação aberta.
+    """
+
+    def test_connection_gets_profile_pragmas(self):
+        from django.conf import settings
+        from config.database import pragma_status
+
+        status_ = pragma_status()
+        self.assertEqual(status_['synchronous'], 1)  # NORMAL
+        self.assertEqual(status_['busy_timeout'], settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(status_['cache_size'], settings.SQLITE_PRAGMAS['cache_size'])
+
+    @override_settings(SQLITE_BUSY_RETRIES=3, SQLITE_BUSY_RETRY_DELAY=0)
+    def test_busy_write_is_retried(self):
+        from django.db import OperationalError
+        from config.database import retry_on_busy
+
+        calls = []
+
+        @retry_on_busy
+        def write():
+            calls.append(connection.in_atomic_block)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(write(), 'ok')
+        self.assertEqual(calls, [True, True, True])
+
+    @override_settings(SQLITE_BUSY_RETRIES=2, SQLITE_BUSY_RETRY_DELAY=0)
+    def test_retry_gives_up_and_ignores_other_errors(self):
+        from django.db import OperationalError, transaction
+        from config.database import retry_on_busy
+
+        calls = []
+
+        @retry_on_busy
+        def write(message):
+            calls.append(message)
+            raise OperationalError(message)
+
+        with self.assertRaises(OperationalError):
+            write('database is locked')
+        self.assertEqual(len(calls), 3)
+
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            write('no such table: x')
+        self.assertEqual(len(calls), 1)
+
+        # Dentro de uma transação aberta quem repete é quem a abriu
+        calls.clear()
+        with self.assertRaises(OperationalError), transaction.atomic():
+            write('database is locked')
+        self.assertEqual(len(calls), 1)
+
+    @override_settings(SQLITE_BUSY_RETRIES=2, SQLITE_BUSY_RETRY_DELAY=0)
+    def test_retry_uses_the_given_alias(self):
+        from unittest import mock
+        from django.db import OperationalError, transaction
+        from config.database import retry_on_busy
+
+        calls = []
+
+        @retry_on_busy(using='outro')
+        def write():
+            calls.append(None)
+            if len(calls) < 2:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        other = mock.Mock(vendor='sqlite', in_atomic_block=False)
+        atomic = mock.MagicMock()
+        # A transação aberta no default não impede a repetição no outro banco
+        with transaction.atomic(), \
+                mock.patch('config.database.connections', {'outro': other}), \
+                mock.patch('config.database.transaction.atomic', atomic):
+            self.assertEqual(write(), 'ok')
+        self.assertEqual(len(calls), 2)
+        atomic.assert_called_with(using='outro')
+
+    def test_maintenance_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('sqlite_maintenance', stdout=out)
+        self.assertIn('ANALYZE', out.getvalue())
+        self.assertIn('Manutenção concluída', out.getvalue())
+
+
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaRoutingTestCase(TestCase):
+    """
+    Testes do roteamento de leituras para réplicas (config/routers.py).
+
+    O próprio 'default' faz papel de réplica: o roteador devolve o alias da
+    réplica quando libera a leitura e None quando deixa no primário.
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user1', email='user1@test.com', password='pass123')
+        self.task = Task.objects.create(user=self.user, assigned_to=self.user, title='Tarefa')
+
+    def capture_reads(self):
+        """Context manager que junta (model, banco) de cada leitura roteada."""
+        from unittest import mock
+        from config.routers import ReplicaRouter
+
+        reads = []
+        original = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            db = original(router, model, **hints)
+            reads.append((model.__name__, db))
+            return db
+        return reads, mock.patch.object(ReplicaRouter, 'db_for_read', spy)
+
+    def test_task_reads_go_to_replica_but_auth_stays_on_primary(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        reads, spy = self.capture_reads()
+        with spy:
+            response = self.client.get('/api/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(('User', None), reads)  # autenticação
+        self.assertIn(('Task', 'default'), reads)
+
+    def test_client_reads_own_writes_from_primary(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(f'/api/tasks/{self.task.pk}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        reads, spy = self.capture_reads()
+        with spy:
+            self.client.get('/api/tasks/')
+        self.assertTrue(reads)
+        self.assertEqual({db for _, db in reads}, {None})
+
+        # Outro usuário não é afetado pela escrita deste
+        other = User.objects.create_user(username='user2', email='user2@test.com', password='pass123')
+        self.client.force_authenticate(user=other)
+        reads, spy = self.capture_reads()
+        with spy:
+            self.client.get('/api/tasks/')
+        self.assertIn(('Task', 'default'), reads)
+
+    def test_window_expires(self):
+        from django.core.cache import cache
+        from config.routers import STICKY_KEY
+
+        self.client.force_authenticate(user=self.user)
+        self.client.post(f'/api/tasks/{self.task.pk}/reopen/')
+        self.assertTrue(cache.get(STICKY_KEY.format(f'user:{self.user.pk}')))
+        cache.delete(STICKY_KEY.format(f'user:{self.user.pk}'))
+
+        reads, spy = self.capture_reads()
+        with spy:
+            self.client.get(f'/api/tasks/{self.task.pk}/')
+        self.assertIn(('Task', 'default'), reads)
+
+    def test_user_directory_page_is_built_from_primary(self):
+        from unittest import mock
+
+        self.client.force_authenticate(user=self.user)
+        reads, spy = self.capture_reads()
+        with spy, mock.patch('users.directory.cache_is_shared', return_value=True):
+            self.client.get('/api/auth/users/')
+        self.assertNotIn(('User', 'default'), reads)
+
+        # O seletor não tem cache: lê da réplica
+        reads, spy = self.capture_reads()
+        with spy:
+            self.client.get('/api/auth/users/picker/?q=us')
+        self.assertIn(('User', 'default'), reads)
+
+    def test_replicas_are_not_migrated(self):
+        from config.routers import ReplicaRouter
+
+        with override_settings(DATABASE_REPLICAS=['replica1']):
+            self.assertIs(ReplicaRouter().allow_migrate('replica1', 'tasks'), False)
+            self.assertIsNone(ReplicaRouter().allow_migrate('default', 'tasks'))
+
+
+class EndpointBenchmarkTestCase(TestCase):
+    """
+    Testes do benchmark das rotas (tasks/endpoint_benchmark.py).
+    """
+
+    def test_every_route_has_a_scenario(self):
+        from tasks.endpoint_benchmark import EXCLUDED_ROUTES, SCENARIOS, ClientState, Context, api_routes
+
+        user = User.objects.create_user(username='bench0', email='bench0@example.com', password='x')
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        state = ClientState(0, user, Context([user.pk], admin))
+
+        covered = {scenario.route(state) for scenario in SCENARIOS}
+        self.assertEqual(api_routes() - set(EXCLUDED_ROUTES) - covered, set())
+        self.assertEqual(len({scenario.name for scenario in SCENARIOS}), len(SCENARIOS))
+
+    def test_seed_progress_every_n_tasks(self):
+        from tasks.benchmark import seed_dataset
+
+        messages = []
+        seed_dataset(users=3, tasks=25, batch_size=5, log=messages.append, log_every=10)
+        self.assertEqual(messages, ['10/25 tarefas', '20/25 tarefas', '25/25 tarefas'])
+        self.assertEqual(Task.objects.count(), 25)
+
+    def test_compare_flags_regressions(self):
+        from tasks.endpoint_benchmark import compare
+
+        base = {'p50_ms': 10.0, 'p95_ms': 20.0, 'p99_ms': 30.0, 'rps': 100.0, 'queries_per_request': 3.0}
+        baseline = {'lista': base, 'detalhe': base, 'stats': base}
+        current = {
+            'lista': {**base, 'p95_ms': 30.0, 'p99_ms': 90.0},  # p95 50% pior
+            'detalhe': {**base, 'queries_per_request': 4.0, 'p99_ms': 90.0},  # uma consulta a mais
+            'stats': {**base, 'p50_ms': 11.0, 'rps': 90.0, 'p99_ms': 90.0},  # dentro da tolerância
+            'novo': base,  # sem base: ignorado
+        }
+        self.assertEqual(compare(baseline, current, threshold=0.25), [
+            ('lista', 'p95_ms', 20.0, 30.0),
+            ('detalhe', 'queries_per_request', 3.0, 4.0),
+        ])
+
+
+class GenerateDataTestCase(TestCase):
+    """
+    Testes do comando generate_data (tasks/synthetic.py).
+    """
+
+    def generate(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('generate_data', stdout=out, **options)
+        return out.getvalue()
+
+    def task_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tasks_task' AND sql IS NOT NULL"
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_demo_preset_is_idempotent(self):
+        self.generate(preset='demo')
+        out = self.generate(preset='demo')
+
+        self.assertIn('Usuario ja existe: joao', out)
+        self.assertTrue(User.objects.get(username='admin').is_superuser)
+        self.assertTrue(User.objects.get(username='maria').check_password('senha123'))
+        self.assertEqual(Task.objects.filter(user__username='joao').count(), 5)
+        self.assertEqual(Task.objects.count(), 9)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Índices e FTS5 recriados só no SQLite')
+    def test_synthetic_load_is_deterministic(self):
+        from tasks.search import get_search_backend
+
+        indexes = self.task_indexes()
+        options = {'users': 15, 'tasks': 300, 'chunk_size': 70, 'seed': 7, 'until': '2025-06-30', 'no_demo': True}
+        out = self.generate(prefix='a', **options)
+        self.generate(prefix='b', **options)
+
+        self.assertIn('300/300 tarefas (100%)', out)
+        self.assertIn('linhas/s', out)
+
+        def dataset(prefix):
+            users = User.objects.filter(username__startswith=prefix).order_by('id')
+            index = {user.pk: user.username[len(prefix):] for user in users}
+            rows = Task.objects.filter(user__in=users).order_by('id').values_list(
+                'user_id', 'assigned_to_id', 'title', 'status', 'created_at',
+            )
+            return [(index[u], index[a], title, st, created) for u, a, title, st, created in rows], users
+
+        first, first_users = dataset('a')
+        second, _ = dataset('b')
+        self.assertEqual(len(first), 300)
+        self.assertEqual(first, second)
+        # Um único hash para todos os usuários
+        self.assertEqual(len({user.password for user in first_users}), 1)
+        self.assertTrue(first_users[0].check_password('senha123'))
+
+        # Índices, busca e contadores recriados depois da carga
+        self.assertEqual(self.task_indexes(), indexes)
+        self.assertIsNotNone(get_search_backend())
+        task = Task.objects.filter(user__in=first_users).order_by('id').first()
+        client = APIClient()
+        client.force_authenticate(user=task.user)
+        response = client.get('/api/tasks/', {'search': task.title.split()[0], 'page_size': 100})
+        self.assertIn(task.pk, [item['id'] for item in response.data['results']])
+        for user_id, fields in count_tasks().items():
+            counter = TaskCounter.objects.get(user_id=user_id)
+            self.assertEqual({field: getattr(counter, field) for field in fields}, fields)
+
+    def test_existing_prefix_is_rejected(self):
+        from django.core.management.base import CommandError
+
+        self.generate(users=2, tasks=0, prefix='x', no_demo=True)
+        with self.assertRaises(CommandError):
+            self.generate(users=2, tasks=0, prefix='x', no_demo=True)
+
+
+class BackfillTestCase(TestCase):
+    """
+    Testes dos backfills em lotes (tasks/backfill.py).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='backfill', email='backfill@example.com', password='x')
+        Task.objects.bulk_create([
+            Task(user=self.user, assigned_to=self.user, title=f'Tarefa {i}', status='completed')
+            for i in range(25)
+        ])
+        self.ids = list(Task.objects.order_by('id').values_list('id', flat=True))
+
+    def test_resumes_from_checkpoint(self):
+        from django.db.models import F
+        from tasks.backfill import Checkpoint, run_backfill
+
+        batches = []
+
+        def apply(tasks):
+            if len(batches) == 2:
+                raise RuntimeError('queda no meio do backfill')
+            batches.append(sorted(tasks.values_list('id', flat=True)))
+            return tasks.update(completed_at=F('updated_at'))
+
+        queryset = Task.objects.filter(completed_at__isnull=True)
+        with self.assertRaises(RuntimeError):
+            run_backfill(queryset, apply, name='teste', batch_size=10)
+        self.assertEqual(batches, [self.ids[:10], self.ids[10:20]])
+        self.assertEqual(Checkpoint('teste').load(), (self.ids[19], 20, False))
+
+        batches.append(None)  # deixa de falhar
+        self.assertEqual(run_backfill(queryset, apply, name='teste', batch_size=10), 25)
+        self.assertEqual(batches[-1], self.ids[20:])
+        self.assertFalse(queryset.exists())
+
+        # Concluído: não roda de novo, a não ser com reset
+        Task.objects.update(completed_at=None)
+        self.assertEqual(run_backfill(queryset, apply, name='teste', batch_size=10), 25)
+        self.assertEqual(queryset.count(), 25)
+        self.assertEqual(run_backfill(queryset, apply, name='teste', batch_size=10, reset=True), 25)
+        self.assertFalse(queryset.exists())
+
+    def test_completed_at_command(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        Task.objects.filter(id=self.ids[0]).update(status='pending', completed_at=timezone.now())
+        out = StringIO()
+        call_command('backfill_tasks', 'completed_at', batch_size=7, stdout=out)
+
+        self.assertIn('25 tarefas corrigidas', out.getvalue())
+        self.assertIsNone(Task.objects.get(id=self.ids[0]).completed_at)
+        self.assertFalse(Task.objects.filter(status='completed', completed_at__isnull=True).exists())
+
+        out = StringIO()
+        call_command('backfill_tasks', status=True, stdout=out)
+        self.assertIn('tasks.completed_at: concluído, 25 linhas', out.getvalue())
+
+
+class TaskExportTestCase(TestCase):
+    """
+    Testes da exportação em streaming (GET /api/tasks/export/).
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser1', email='test1@example.com', password='x')
+        self.other = User.objects.create_user(username='testuser2', email='test2@example.com', password='x')
+        self.own = Task.objects.create(
+            user=self.user, assigned_to=self.user, title='Relatório mensal', description='Enviar, "hoje"',
+        )
+        self.assigned = Task.objects.create(
+            user=self.other, assigned_to=self.user, title='Reunião', status='completed',
+        )
+        self.hidden = Task.objects.create(user=self.other, assigned_to=self.other, title='Relatório de outro')
+        self.client.force_authenticate(user=self.user)
+
+    def export(self, query=''):
+        response = self.client.get(f'/api/tasks/export/{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_matches_list(self):
+        import csv
+
+        response, content = self.export()
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="tarefas-', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(content.splitlines()))
+        listed = self.client.get('/api/tasks/').data['results']
+        self.assertEqual([row['id'] for row in rows], [str(item['id']) for item in listed])
+        for row, item in zip(rows, listed):
+            expected = {key: '' if value is None else str(value) for key, value in item.items()}
+            self.assertEqual(row, expected)
+
+    def test_ndjson_applies_filters_and_search(self):
+        import json
+
+        response, content = self.export('?output=ndjson&status=completed')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(lines, [self.client.get(f'/api/tasks/{self.assigned.id}/').data])
+
+        _, content = self.export('?output=ndjson&search=relatorio')
+        self.assertEqual([json.loads(line)['id'] for line in content.splitlines()], [self.own.id])
+
+        # Admin vê todas
+        self.client.force_authenticate(user=User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+        _, content = self.export('?output=ndjson&search=relatorio')
+        self.assertEqual(sorted(json.loads(line)['id'] for line in content.splitlines()),
+                         [self.own.id, self.hidden.id])
+
+    def test_streams_in_chunks(self):
+        from unittest import mock
+
+        Task.objects.bulk_create([
+            Task(user=self.user, assigned_to=self.user, title=f'Tarefa {i}') for i in range(9)
+        ])
+        with mock.patch('tasks.export.LINES_PER_WRITE', 4):
+            response = self.client.get('/api/tasks/export/')
+            chunks = list(response.streaming_content)
+        # Cabeçalho + 11 linhas em blocos de 4
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual(chunks[0].decode().strip(), ','.join(TaskSerializer.Meta.fields))
+
+    def test_formula_cells_are_escaped(self):
+        Task.objects.filter(pk=self.own.pk).update(title='=HYPERLINK("http://x")')
+        _, content = self.export()
+        self.assertIn('"\'=HYPERLINK(""http://x"")"', content)
+
+    def test_invalid_output_and_anonymous(self):
+        response = self.client.get('/api/tasks/export/?output=xlsx')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('output', response.data)
+
+        self.client.force_authenticate(user=None)
+        response = self.client.get('/api/tasks/export/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -10,10 +10,19 @@ Todas as rotas de tarefas são geradas automaticamente pelo ViewSet:
 - DELETE /api/tasks/{id}/       - Deletar tarefa
 - POST   /api/tasks/{id}/complete/ - Marcar como concluída
 - POST   /api/tasks/{id}/reopen/   - Reabrir tarefa
+- GET    /api/tasks/stats/     - Totais de tarefas pendentes/concluídas
+- GET    /api/tasks/changes/?since=<token> - Mudanças desde a última sincronização
+- GET    /api/tasks/events/    - Stream (SSE) com as mudanças em tempo real
+- POST   /api/tasks/events/ticket/ - Ticket para abrir o stream sem o token na URL
+- POST   /api/tasks/bulk-create/   - Criar várias tarefas
+- POST   /api/tasks/bulk-update/   - Editar várias tarefas
+- POST   /api/tasks/bulk-complete/ - Concluir várias tarefas
+- POST   /api/tasks/bulk-delete/   - Deletar várias tarefas
+- POST   /api/tasks/bulk-transition/?<filtros> - Concluir/reabrir pelos filtros
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TaskViewSet
+from .views import TaskViewSet, task_events
 
 app_name = 'tasks'
 
@@ -22,5 +31,7 @@ router = DefaultRouter()
 router.register(r'', TaskViewSet, basename='task')
 
 urlpatterns = [
+    # Antes do router, senão 'events' seria lido como o id de uma tarefa
+    path('events/', task_events, name='task-events'),
     path('', include(router.urls)),  # Inclui todas as rotas geradas pelo router
 ]
@@ -1,18 +1,49 @@
-from rest_framework import viewsets, filters, status
+from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, AuthenticationFailed, ValidationError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db import models
+from django.core.handlers.asgi import ASGIRequest
+from django.db import models, router
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from config.database import retry_on_busy
+from config.routers import ReplicaReadMixin
+from users.authentication import CachedJWTAuthentication
+from users.throttling import TaskRateThrottle
 import logging
-from .models import Task
+import time
+from .bulk import TaskBulkMixin
+from .conditional import list_metadata, make_etag, not_modified_response, set_validators
+from .counters import get_counters
+from .export import CONTENT_TYPES, export_stream
+from .models import Task, TaskCounter
+from .streams import authenticate, error_detail, event_stream, issue_ticket, raw_token_from, stream_headers, ticket_seconds
 from .serializers import TaskSerializer, TaskCreateSerializer, TaskUpdateSerializer
-from .filters import TaskFilter
+from .filters import TaskFilter, TaskSearchFilter, TaskOrderingFilter
+from .pagination import TaskPagination
+from .querysets import TaskUnion, visibility_branches
+from .sync import decode_token, get_changes
 
 logger = logging.getLogger(__name__)
 
+# Tamanho padrão e máximo de cada resposta de /api/tasks/changes/
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 1000
 
-class TaskViewSet(viewsets.ModelViewSet):
+# Colunas da tarefa carregadas nas listagens e detalhes
+TASK_FIELDS = [
+    'id', 'user', 'assigned_to', 'title', 'description', 'status',
+    'created_at', 'updated_at', 'completed_at',
+]
+
+
+class TaskViewSet(ReplicaReadMixin, TaskBulkMixin, viewsets.ModelViewSet):
     """
     Gerencia todas as operações de tarefas (CRUD completo).
     
@@ -24,14 +55,40 @@ class TaskViewSet(viewsets.ModelViewSet):
     - DELETE /api/tasks/{id}/ - Deleta uma tarefa
     - POST /api/tasks/{id}/complete/ - Marca como concluída
     - POST /api/tasks/{id}/reopen/ - Reabre uma tarefa concluída
+    - GET /api/tasks/stats/ - Totais de pendentes/concluídas do usuário
+    - GET /api/tasks/changes/?since=<token> - O que mudou desde a última sincronização
+    - GET /api/tasks/export/?output=csv|ndjson - Exporta as tarefas da listagem
+      (mesmos filtros e busca) em streaming
+    - POST /api/tasks/bulk-create/, bulk-update/, bulk-complete/, bulk-delete/
+      - Operações em lote (veja tasks/bulk.py)
+    - POST /api/tasks/bulk-transition/?<filtros> - Muda o status de todas as
+      tarefas que batem com os filtros
+    
+    A listagem aceita ?pagination=cursor para paginar por cursor (sem COUNT/OFFSET).
+    Listagem e detalhe enviam ETag/Last-Modified e respondem 304 quando nada mudou.
+    Leituras e escritas têm limites por usuário (tasks_read/tasks_write).
+    Leituras podem ir para uma réplica do banco (config/routers.py).
     """
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    throttle_classes = [TaskRateThrottle]
+    pagination_class = TaskPagination
+    filter_backends = [DjangoFilterBackend, TaskSearchFilter, TaskOrderingFilter]
     filterset_class = TaskFilter
     search_fields = ['title', 'description']
     ordering_fields = ['created_at', 'updated_at', 'status']
     ordering = ['-created_at']
 
+    def get_base_queryset(self):
+        """
+        Queryset de tarefas sem filtro de visibilidade.
+        
+        Traz o username do criador e do designado no mesmo SELECT,
+        assim o serializer não faz uma consulta extra por linha.
+        """
+        return Task.objects.select_related('user', 'assigned_to').only(
+            *TASK_FIELDS, 'user__username', 'assigned_to__username'
+        )
+
     def get_queryset(self):
         """
         Filtra as tarefas baseado nas permissões do usuário.
@@ -45,21 +102,36 @@ class TaskViewSet(viewsets.ModelViewSet):
         
         try:
             user = self.request.user
+            queryset = self.get_base_queryset()
             
             if user.is_staff or user.is_superuser:
-                queryset = Task.objects.all()
                 logger.debug(f"Admin {user.username} acessando todas as tarefas")
             else:
-                queryset = Task.objects.filter(
+                queryset = queryset.filter(
                     models.Q(user=user) | models.Q(assigned_to=user)
                 )
-                logger.debug(f"Usuário {user.username} visualizando {queryset.count()} tarefas")
+                logger.debug(f"Usuário {user.username} visualizando suas tarefas")
             
             return queryset
         except Exception as e:
             logger.error(f"Erro ao buscar tarefas para usuário {self.request.user.username}: {str(e)}", exc_info=True)
             return Task.objects.none()
 
+    def get_list_queryset(self):
+        """
+        Queryset da listagem, já com filtros, busca e ordenação.
+        
+        Para usuários normais, troca o OR da visibilidade por um UNION ALL de
+        dois ramos (criadas por ele / designadas pra ele), cada um usando seu
+        índice composto. Veja tasks/querysets.py.
+        """
+        user = self.request.user
+        if not user.is_authenticated or user.is_staff or user.is_superuser:
+            return self.filter_queryset(self.get_queryset())
+        
+        branches = visibility_branches(self.get_base_queryset(), user)
+        return TaskUnion([self.filter_queryset(branch) for branch in branches])
+
     def get_serializer_class(self):
         """
         Escolhe qual serializer usar dependendo da operação.
@@ -75,7 +147,40 @@ class TaskViewSet(viewsets.ModelViewSet):
         Lista as tarefas com tratamento de erros.
         """
         try:
-            return super().list(request, *args, **kwargs)
+            queryset = self.get_list_queryset()
+            
+            # Validadores (ETag/Last-Modified) calculados antes de serializar.
+            # Veja tasks/conditional.py.
+            if self.paginator.is_cursor_mode(request):
+                # Modo cursor não faz COUNT: o ETag sai das linhas da página
+                page = self.paginate_queryset(queryset)
+                last_modified = None
+                etag = make_etag(
+                    request, self.paginator.has_next, self.paginator.has_previous,
+                    *((task.pk, task.updated_at.isoformat()) for task in page)
+                )
+            else:
+                # Maior updated_at + total; o total é reaproveitado pela paginação
+                last_modified, total = list_metadata(queryset)
+                etag = make_etag(request, last_modified, total)
+                self.paginator.known_count = total
+                page = None
+            
+            not_modified = not_modified_response(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+            
+            if page is None:
+                page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                response = self.get_paginated_response(serializer.data)
+            else:
+                serializer = self.get_serializer(queryset, many=True)
+                response = Response(serializer.data)
+            return set_validators(response, etag, last_modified)
+        except APIException:
+            raise
         except Exception as e:
             logger.error(f"Erro ao listar tarefas: {str(e)}", exc_info=True)
             return Response(
@@ -83,37 +188,165 @@ class TaskViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Detalhes de uma tarefa, com ETag e Last-Modified.
+        
+        Responde 304 para If-None-Match/If-Modified-Since sem serializar.
+        """
+        task = self.get_object()
+        etag = make_etag(request, task.pk, task.updated_at.isoformat())
+        not_modified = not_modified_response(request, etag, task.updated_at)
+        if not_modified is not None:
+            return not_modified
+        
+        serializer = self.get_serializer(task)
+        return set_validators(Response(serializer.data), etag, task.updated_at)
+
     def get_object(self):
         """
         Verifica se o usuário tem permissão pra acessar essa tarefa.
         Admin pode ver qualquer tarefa, usuário normal só vê as suas ou as designadas pra ele.
+        
+        A busca é feita só pela chave primária (sem o OR da visibilidade) e a
+        permissão é conferida depois, comparando os ids. Tarefas de outros
+        usuários continuam retornando 404, como se não existissem.
         """
-        obj = super().get_object()
+        if not self.request.user or not self.request.user.is_authenticated:
+            raise Http404
+        
+        queryset = self.filter_queryset(self.get_base_queryset())
+        obj = get_object_or_404(queryset, pk=self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        self.check_object_permissions(self.request, obj)
         
         if self.request.user.is_staff or self.request.user.is_superuser:
             return obj
         
-        is_creator = obj.user == self.request.user
-        is_assigned = obj.assigned_to == self.request.user
+        # Compara pelos ids para não carregar os usuários relacionados
+        is_creator = obj.user_id == self.request.user.id
+        is_assigned = obj.assigned_to_id == self.request.user.id
         
         if not (is_creator or is_assigned):
-            from rest_framework.exceptions import PermissionDenied
-            raise PermissionDenied("Você não tem permissão para acessar esta tarefa.")
+            raise Http404
         
         return obj
 
+    @retry_on_busy
     def perform_create(self, serializer):
         """
         Define automaticamente quem criou a tarefa como o usuário logado.
         """
         serializer.save(user=self.request.user)
 
+    @retry_on_busy
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @retry_on_busy
+    def perform_destroy(self, instance):
+        instance.delete()
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        Totais de tarefas pendentes e concluídas do usuário logado.
+        
+        Lê a linha de contadores do usuário (TaskCounter), então o custo não
+        depende de quantas tarefas ele tem. Para administradores, 'visible'
+        soma os contadores de todos os usuários (eles veem todas as tarefas).
+        """
+        counter = get_counters(request.user.id)
+        created = {'pending': counter.created_pending, 'completed': counter.created_completed}
+        assigned = {'pending': counter.assigned_pending, 'completed': counter.assigned_completed}
+        
+        if request.user.is_staff or request.user.is_superuser:
+            totals = TaskCounter.objects.aggregate(
+                pending=Coalesce(Sum('created_pending'), 0),
+                completed=Coalesce(Sum('created_completed'), 0),
+            )
+            visible = {'pending': totals['pending'], 'completed': totals['completed']}
+        else:
+            visible = {
+                'pending': created['pending'] + assigned['pending'],
+                'completed': created['completed'] + assigned['completed'],
+            }
+        visible['total'] = visible['pending'] + visible['completed']
+        
+        return Response({'created': created, 'assigned': assigned, 'visible': visible})
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Sincronização incremental: o que mudou desde ?since=<token>.
+        
+        Retorna as tarefas criadas/editadas e os ids das apagadas, mais o
+        token para a próxima chamada. Veja tasks/sync.py.
+        """
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = decode_token(since)
+            except ValueError:
+                raise ValidationError({'since': ['Token de sincronização inválido.']})
+        
+        try:
+            limit = min(int(request.query_params.get('limit', SYNC_PAGE_SIZE)), SYNC_MAX_PAGE_SIZE)
+        except ValueError:
+            limit = SYNC_PAGE_SIZE
+        
+        changes = get_changes(self.get_base_queryset(), request.user, since or None, max(limit, 1))
+        changes['changed'] = TaskSerializer(changes['changed'], many=True).data
+        return Response(changes)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporta as tarefas visíveis em CSV (?output=csv, padrão) ou NDJSON
+        (?output=ndjson), com os mesmos filtros, busca e ordenação da listagem.
+        
+        A resposta sai em streaming, com memória constante (veja tasks/export.py).
+        """
+        output = request.query_params.get('output', 'csv')
+        if output not in CONTENT_TYPES:
+            raise ValidationError({'output': [f"Formato inválido. Use: {', '.join(CONTENT_TYPES)}."]})
+        
+        # As linhas são lidas depois que a view retorna, fora do roteamento
+        # da requisição: fixa aqui o banco escolhido (réplica ou primário)
+        queryset = self.get_list_queryset().using(router.db_for_read(Task))
+        response = StreamingHttpResponse(export_stream(queryset, output), content_type=CONTENT_TYPES[output])
+        response['Content-Disposition'] = f'attachment; filename="tarefas-{timezone.now():%Y%m%d-%H%M%S}.{output}"'
+        response['Cache-Control'] = 'no-store'
+        # Desliga o buffer do nginx, senão o arquivo só sai no fim
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='events/ticket')
+    def events_ticket(self, request):
+        """
+        Ticket de curta duração para abrir o stream de eventos
+        (GET /api/tasks/events/?ticket=<ticket>) sem pôr o token de acesso
+        na URL. Veja tasks/streams.py.
+        """
+        # Sem token (force_authenticate), o stream dura o de um token novo
+        expires_at = request.auth['exp'] if request.auth is not None else int(
+            time.time() + jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        )
+        return Response({
+            'ticket': issue_ticket(request.user.pk, expires_at),
+            'expires_in': ticket_seconds(),
+        })
+
+    @retry_on_busy
+    def set_status(self, task, new_status):
+        """Grava o novo status (repetindo se o SQLite estiver ocupado)."""
+        task.status = new_status
+        task.save(update_fields=['status', 'completed_at', 'updated_at'])
+
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
         """Marca uma tarefa como concluída."""
         task = self.get_object()
-        task.status = 'completed'
-        task.save()
+        self.set_status(task, 'completed')
         serializer = self.get_serializer(task)
         return Response(serializer.data)
 
@@ -121,7 +354,48 @@ class TaskViewSet(viewsets.ModelViewSet):
     def reopen(self, request, pk=None):
         """Reabre uma tarefa que estava concluída."""
         task = self.get_object()
-        task.status = 'pending'
-        task.save()
+        self.set_status(task, 'pending')
         serializer = self.get_serializer(task)
         return Response(serializer.data)
+
+
+async def task_events(request):
+    """
+    Stream de eventos das tarefas do usuário (Server-Sent Events).
+    
+    GET /api/tasks/events/ com o token de acesso no cabeçalho
+    (Authorization: Bearer <token>), com ?ticket=<ticket> (pedido em
+    POST /api/tasks/events/ticket/) ou em ?token=<token>, que fica nos
+    logs de acesso.
+    
+    Cada mudança numa tarefa que o usuário criou ou que foi designada pra
+    ele chega como:
+    
+        event: completed
+        data: {"type": "completed", "task": {"id": 7, ...}}
+    
+    Só funciona num servidor ASGI (ex.: uvicorn config.asgi:application):
+    no WSGI (runserver, gunicorn) o StreamingHttpResponse junta o iterador
+    assíncrono inteiro numa lista antes de enviar o primeiro byte, e um
+    stream que não termina nunca sairia. Por isso no WSGI a resposta é 501.
+    Em produção a rota é atendida por streams.events_app, que não prende
+    uma thread por conexão; esta view serve o ASGIHandler do Django e os
+    testes.
+    """
+    try:
+        raw_token = raw_token_from(CachedJWTAuthentication().get_header(request), request.GET.get('token'))
+        user, expires_at = await authenticate(raw_token, request.GET.get('ticket'))
+    except AuthenticationFailed as exc:
+        return JsonResponse(error_detail(exc), status=status.HTTP_401_UNAUTHORIZED)
+    
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'O stream de eventos precisa de um servidor ASGI '
+                       '(ex.: uvicorn config.asgi:application).'},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    
+    response = StreamingHttpResponse(event_stream(user.pk, expires_at))
+    for name, value in stream_headers():
+        response[name] = value
+    return response
@@ -0,0 +1,152 @@
+"""
+Autenticação JWT com cache do usuário.
+
+O JWTAuthentication do SimpleJWT busca o usuário no banco (pelo claim
+user_id) em toda requisição. O CachedJWTAuthentication guarda o usuário
+carregado num cache local do processo:
+- LRU limitado a AUTH_USER_CACHE_SIZE usuários
+- cada entrada vale no máximo AUTH_USER_CACHE_SECONDS segundos
+
+Para que mudanças valham na hora em todos os processos, cada usuário tem
+uma "geração" no cache do Django (settings.CACHES). Uma entrada local só
+é usada se foi carregada na geração atual, e a geração muda a cada save()
+ou exclusão do usuário (users/signals.py). Assim troca de senha (ChangePasswordSerializer,
+ResetPasswordSerializer), desativação e mudança de is_staff derrubam o
+cache na próxima requisição.
+
+A geração só é vista por todos os processos com um cache compartilhado
+(Redis ou Memcached, veja config/cache.py). Com o LocMemCache padrão cada
+worker teria a sua, e uma senha trocada num worker continuaria valendo
+nos outros até o TTL; por isso, sem cache compartilhado, o LRU não é
+usado e o usuário é lido do banco a cada requisição.
+
+Cada requisição recebe uma cópia do usuário em cache, para que alterações
+feitas numa view não vazem para outras requisições.
+"""
+import copy
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from config.cache import cache_is_shared
+
+GENERATION_KEY = 'auth:user:{}:generation'
+
+
+class UserSnapshotCache:
+    """LRU local (por processo) de usuários, com TTL e geração."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, generation):
+        """Usuário em cache na geração informada, ou None."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, entry_generation, expires_at = entry
+            if entry_generation != generation or expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def put(self, user_id, user, generation):
+        with self._lock:
+            self._entries[user_id] = (user, generation, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+user_cache = UserSnapshotCache(
+    max_size=getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'AUTH_USER_CACHE_SECONDS', 60),
+)
+
+
+def current_generation(user_id):
+    """Geração atual do usuário; cria uma se o cache não tiver."""
+    key = GENERATION_KEY.format(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, secrets.token_hex(8), None)
+        generation = cache.get(key)
+    return generation
+
+
+def invalidate_user(user_id):
+    """Descarta o usuário do cache de todos os processos."""
+    cache.set(GENERATION_KEY.format(user_id), secrets.token_hex(8), None)
+
+
+def invalidate_user_after_write(user_id):
+    """
+    Invalida já e de novo depois do COMMIT.
+
+    A primeira troca vale mesmo se a escrita nunca for confirmada (testes,
+    transação desfeita); a segunda descarta o que outro processo tenha
+    carregado do banco antes do COMMIT.
+    """
+    invalidate_user(user_id)
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication que evita a consulta do usuário a cada requisição.
+
+    As mesmas verificações do SimpleJWT (usuário ativo, senha trocada)
+    rodam também sobre o usuário em cache.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not cache_is_shared():
+            # Sem usuário no token o SimpleJWT levanta o erro; sem cache
+            # compartilhado a invalidação não chegaria aos outros processos
+            return super().get_user(validated_token)
+        # O claim vem como texto (SimpleJWT 5.5+) ou número (tokens antigos)
+        user_id = str(user_id)
+
+        # A geração é lida antes do banco: uma invalidação no meio do
+        # caminho deixa a entrada nova já vencida
+        generation = current_generation(user_id)
+        user = user_cache.get(user_id, generation)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.put(user_id, user, generation)
+        else:
+            self.check_user(user, validated_token)
+        return copy.copy(user)
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code='password_changed'
+                )
@@ -0,0 +1,88 @@
+"""
+Cache do diretório de usuários (GET /api/auth/users/).
+
+As telas de nova tarefa e de usuários pedem a lista toda vez que abrem, e
+ela quase nunca muda. Cada página já serializada fica no cache do Django
+(settings.CACHES), numa chave que leva a
+versão atual do diretório e a URL completa (página, filtros).
+
+A versão é trocada (bump_version) depois do COMMIT de qualquer escrita que
+mude o diretório: cadastro, edição, desativação (inclusive a exclusão
+lógica de UserListViewSet.destroy) e exclusão. As páginas da versão antiga
+simplesmente deixam de ser lidas e expiram sozinhas.
+
+Escritas que não passam pelos sinais (QuerySet.update()) precisam chamar
+bump_version() por conta própria.
+
+A versão só vale para todos os processos com um cache compartilhado
+(Redis ou Memcached, veja config/cache.py). Com o LocMemCache padrão, um
+worker não veria a versão trocada por outro e serviria a página velha até
+ela expirar; nesse caso a listagem não usa o cache (enabled()).
+"""
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from config.cache import cache_is_shared
+
+VERSION_KEY = 'users:directory:version'
+
+# Campos que aparecem no diretório (UserSerializer) ou decidem quem entra nele
+DIRECTORY_FIELDS = {
+    'username', 'email', 'first_name', 'last_name', 'created_at',
+    'is_staff', 'is_superuser', 'is_active',
+}
+
+
+def enabled():
+    """Se as páginas podem ir para o cache (só com cache compartilhado)."""
+    return cache_is_shared()
+
+
+def cache_timeout():
+    return getattr(settings, 'USER_DIRECTORY_CACHE_SECONDS', 300)
+
+
+def current_version():
+    """Versão atual do diretório; cria uma se o cache não tiver."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # add() não sobrescreve a versão gravada por outro processo
+        cache.add(VERSION_KEY, secrets.token_hex(8), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """
+    Invalida todas as páginas em cache.
+
+    A versão nova é aleatória: mesmo que a chave tenha sido descartada pelo
+    cache, uma versão antiga nunca volta a valer.
+    """
+    cache.set(VERSION_KEY, secrets.token_hex(8), None)
+
+
+def bump_version_on_commit():
+    transaction.on_commit(bump_version)
+
+
+def changes_directory(update_fields):
+    """Se um save() com esses update_fields pode mudar o diretório."""
+    return update_fields is None or bool(DIRECTORY_FIELDS.intersection(update_fields))
+
+
+def page_key(request):
+    """
+    Chave da página pedida, na versão atual.
+
+    A view deve calcular a chave antes de consultar o banco: se uma escrita
+    trocar a versão no meio, a página é gravada na versão antiga, que já não
+    é lida.
+    """
+    url = hashlib.sha1(request.build_absolute_uri().encode('utf-8')).hexdigest()
+    return f'users:directory:{current_version()}:{url}'
+
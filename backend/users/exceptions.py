@@ -0,0 +1,29 @@
+"""
+Tratamento de exceções da API (REST_FRAMEWORK['EXCEPTION_HANDLER']).
+
+Erros de camadas que não conhecem o DRF viram respostas da API aqui; o
+resto segue para o exception_handler do DRF:
+- PasswordHashingUnavailable (users/hashers.py): 503 com Retry-After
+"""
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from .hashers import PasswordHashingUnavailable
+
+
+class ServerBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Servidor ocupado. Tente novamente em instantes.'
+    default_code = 'password_hashing_unavailable'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        # O exception handler do DRF transforma em Retry-After
+        self.wait = wait
+
+
+def exception_handler(exc, context):
+    if isinstance(exc, PasswordHashingUnavailable):
+        exc = ServerBusy(exc.retry_after)
+    return drf_exception_handler(exc, context)
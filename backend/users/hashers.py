@@ -0,0 +1,185 @@
+"""
+Hash de senhas fora do worker da requisição.
+
+O PBKDF2 do Django (1 milhão de iterações) ocupa a CPU por centenas de
+milissegundos a cada login, cadastro, troca ou reset de senha. Numa rajada
+de logins isso tira CPU das requisições de tarefas do mesmo servidor.
+
+O PooledPBKDF2PasswordHasher gera exatamente o mesmo hash (mesmo algoritmo
+pbkdf2_sha256, senhas existentes continuam valendo), mas o cálculo roda
+num pool de processos limitado (HashingPool):
+- PASSWORD_HASHING_WORKERS processos (0 = calcula na própria thread)
+- no máximo PASSWORD_HASHING_MAX_PENDING cálculos em andamento ou na fila;
+  acima disso o pedido é recusado na hora
+- cada cálculo espera no máximo PASSWORD_HASHING_TIMEOUT segundos
+
+A recusa levanta PasswordHashingUnavailable, uma exceção comum (o hasher
+roda também fora da API: admin, comandos). Na API ela vira 503 +
+Retry-After (users/exceptions.py).
+
+As métricas do pool (fila, recusas, latência) saem em
+GET /api/auth/hashing-metrics/ (apenas admin), por processo.
+"""
+import base64
+import collections
+import hashlib
+import multiprocessing
+import statistics
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.encoding import force_bytes
+
+RETRY_AFTER_SECONDS = 2
+
+
+class PasswordHashingUnavailable(Exception):
+    """O pool está cheio ou o cálculo passou do timeout."""
+    retry_after = RETRY_AFTER_SECONDS
+
+
+def pbkdf2_hash(password, salt, iterations, digest_name):
+    """Calcula o hash (em base64); roda dentro dos processos do pool."""
+    hash = hashlib.pbkdf2_hmac(digest_name, force_bytes(password), force_bytes(salt), iterations)
+    return base64.b64encode(hash).decode('ascii').strip()
+
+
+class HashingPool:
+    """
+    Pool de processos com limite de pedidos pendentes e métricas.
+
+    Com workers=0 o cálculo roda na thread que chamou (sem pool), mas as
+    métricas continuam valendo.
+    """
+    latency_window = 1000
+
+    def __init__(self, workers, max_pending, timeout):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._latencies = collections.deque(maxlen=self.latency_window)
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn: o servidor tem threads, e fork com threads é frágil
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                )
+            return self._executor
+
+    def run(self, fn, *args):
+        """Executa fn(*args) no pool; levanta PasswordHashingUnavailable se cheio."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHashingUnavailable()
+        started = time.perf_counter()
+        with self._lock:
+            self._pending += 1
+        if not self.workers:
+            try:
+                return fn(*args)
+            finally:
+                self._release(started)
+
+        future = self.executor().submit(fn, *args)
+        # A vaga só é liberada quando o cálculo termina de fato, mesmo que
+        # quem pediu já tenha desistido pelo timeout
+        future.add_done_callback(lambda _: self._release(started))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            raise PasswordHashingUnavailable()
+
+    def _release(self, started):
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+            self._latencies.append(time.perf_counter() - started)
+        self._slots.release()
+
+    def stats(self):
+        """Métricas do pool neste processo (latências em milissegundos)."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            pending = self._pending
+            completed, rejected, timeouts = self.completed, self.rejected, self.timeouts
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)
+
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'pending': pending,
+            'completed': completed,
+            'rejected': rejected,
+            'timeouts': timeouts,
+            'latency_ms': {
+                'mean': round(statistics.fmean(latencies) * 1000, 1) if latencies else None,
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99),
+            },
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Pool do processo atual, criado na primeira senha."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(
+                workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', 2),
+                max_pending=getattr(settings, 'PASSWORD_HASHING_MAX_PENDING', 16),
+                timeout=getattr(settings, 'PASSWORD_HASHING_TIMEOUT', 5),
+            )
+        return _pool
+
+
+@receiver(setting_changed)
+def reset_pool(setting, **kwargs):
+    global _pool
+    if setting.startswith('PASSWORD_HASHING_'):
+        with _pool_lock:
+            pool, _pool = _pool, None
+        if pool is not None:
+            pool.shutdown()
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2PasswordHasher com o cálculo no HashingPool."""
+
+    def encode(self, password, salt, iterations=None):
+        self._check_encode_args(password, salt)
+        iterations = iterations or self.iterations
+        hash = get_pool().run(pbkdf2_hash, password, salt, iterations, self.digest().name)
+        return '%s$%d$%s$%s' % (self.algorithm, iterations, salt, hash)
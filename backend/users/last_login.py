@@ -0,0 +1,219 @@
+"""
+Gravação agrupada do last_login.
+
+Com o UPDATE_LAST_LOGIN do SimpleJWT, todo login grava a linha do usuário
+na hora. No SQLite isso é uma trava de escrita por login, que numa rajada
+de logins disputa com as escritas de tarefas.
+
+Aqui o login só anota o horário num buffer do processo (LastLoginBuffer), e
+um LastLoginFlusher grava o buffer inteiro num único UPDATE a cada
+LAST_LOGIN_FLUSH_SECONDS segundos. Esse intervalo é o atraso máximo do
+last_login no banco (e um buffer com LAST_LOGIN_MAX_PENDING usuários é
+gravado antes). Na saída do processo o que sobrou no buffer é gravado.
+
+config/wsgi.py e config/asgi.py só habilitam o flusher (start_flusher). A
+thread sobe no primeiro login de cada processo (get_flusher): o Gunicorn
+com --preload e o uWSGI importam a aplicação no processo mestre e criam
+os workers com fork, que não copia threads.
+
+O admin mostra o last_login com precisão de minutos, então um login a
+menos de LAST_LOGIN_RESOLUTION_SECONDS do último gravado nem entra no
+buffer.
+
+Sem o flusher rodando (LAST_LOGIN_FLUSH_SECONDS = 0, testes, comandos) a
+gravação é feita na hora, como antes.
+"""
+import atexit
+import logging
+import os
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 500
+
+
+def write_last_logins(entries, batch_size=FLUSH_BATCH_SIZE):
+    """
+    Grava {user_id: horário} em UPDATEs de até `batch_size` usuários.
+
+    Um horário nunca substitui outro mais novo (gravado por outro processo).
+    Retorna o número de linhas alteradas.
+    """
+    User = get_user_model()
+    items = sorted(entries.items())
+    updated = 0
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        whens = [
+            When(Q(pk=user_id) & (Q(last_login__isnull=True) | Q(last_login__lt=when)), then=Value(when))
+            for user_id, when in batch
+        ]
+        with transaction.atomic():
+            updated += User.objects.filter(pk__in=[user_id for user_id, _ in batch]).update(
+                last_login=Case(*whens, default=F('last_login')),
+            )
+    return updated
+
+
+class LastLoginBuffer:
+    """Último horário de login de cada usuário, ainda não gravado."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, user_id, when):
+        """Anota o login; retorna quantos usuários estão pendentes."""
+        with self._lock:
+            previous = self._entries.get(user_id)
+            if previous is None or previous < when:
+                self._entries[user_id] = when
+            return len(self._entries)
+
+    def drain(self):
+        with self._lock:
+            entries, self._entries = self._entries, {}
+            return entries
+
+    def restore(self, entries):
+        """Devolve entradas que não foram gravadas (sem perder as mais novas)."""
+        for user_id, when in entries.items():
+            self.add(user_id, when)
+
+    def flush(self):
+        """Grava o buffer no banco; retorna o número de linhas alteradas."""
+        entries = self.drain()
+        if not entries:
+            return 0
+        try:
+            return write_last_logins(entries)
+        except Exception:
+            self.restore(entries)
+            raise
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class LastLoginFlusher:
+    """
+    Grava o buffer a cada `interval` segundos numa thread daemon, ou antes
+    se ele passar de `max_pending` usuários.
+    """
+
+    def __init__(self, buffer, interval, max_pending):
+        self.buffer = buffer
+        self.interval = interval
+        self.max_pending = max_pending
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.pid = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is None:
+            self.pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='last-login-flush', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Para a thread e grava o que sobrou."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def notify(self, pending):
+        if pending >= self.max_pending:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            close_old_connections()
+            try:
+                self.buffer.flush()
+            except Exception:
+                logger.exception('Erro ao gravar last_login')
+            finally:
+                close_old_connections()
+            if self._stop.is_set():
+                break
+
+
+buffer = LastLoginBuffer()
+_enabled = False
+_flusher = None
+_flusher_lock = threading.Lock()
+
+
+def start_flusher():
+    """
+    Habilita a gravação em lote se settings.LAST_LOGIN_FLUSH_SECONDS estiver
+    definido. A thread só sobe no primeiro login (get_flusher).
+    """
+    global _enabled
+    _enabled = bool(getattr(settings, 'LAST_LOGIN_FLUSH_SECONDS', 60))
+
+
+def get_flusher():
+    """Flusher deste processo, ligado no primeiro uso; None se desabilitado."""
+    global _flusher, buffer
+    flusher = _flusher
+    if flusher is not None and flusher.pid == os.getpid():
+        return flusher
+    if not _enabled:
+        return None
+    with _flusher_lock:
+        if _flusher is None or _flusher.pid != os.getpid():
+            # Num worker recém-criado o flusher e o buffer herdados são do
+            # processo pai, que grava o que estava pendente
+            buffer = LastLoginBuffer()
+            _flusher = LastLoginFlusher(
+                buffer, getattr(settings, 'LAST_LOGIN_FLUSH_SECONDS', 60),
+                max_pending=getattr(settings, 'LAST_LOGIN_MAX_PENDING', 1000),
+            )
+            _flusher.start()
+        return _flusher
+
+
+@atexit.register
+def flush_at_exit():
+    """Para o flusher deste processo, gravando o que sobrou no buffer."""
+    flusher = _flusher
+    if flusher is not None and flusher.pid == os.getpid():
+        flusher.stop()
+
+
+def record_login(user, now=None):
+    """
+    Registra o login do usuário (substitui o update_last_login do Django).
+
+    Atualiza user.last_login na hora; a gravação no banco fica para o
+    flusher, ou é feita aqui se ele não estiver rodando.
+    """
+    now = now or timezone.now()
+    resolution = timedelta(seconds=getattr(settings, 'LAST_LOGIN_RESOLUTION_SECONDS', 60))
+    if user.last_login is not None and now - user.last_login < resolution:
+        return
+    user.last_login = now
+    flusher = get_flusher()
+    if flusher is not None and flusher.running:
+        flusher.notify(flusher.buffer.add(user.pk, now))
+    else:
+        write_last_logins({user.pk: now})
@@ -0,0 +1,128 @@
+"""
+Mede a latência da listagem de tarefas durante uma rajada de logins.
+
+Três rodadas de --seconds segundos cada, num banco de teste descartável:
+- base: só leitores (GET /api/tasks/)
+- inline: leitores + rajada de logins com o PBKDF2 na thread da requisição
+  (PASSWORD_HASHING_WORKERS=0, sem limite de fila)
+- pool: a mesma rajada com o pool limitado (users/hashers.py)
+
+Para cada rodada mostra p50/p95/p99 dos leitores e quantos logins
+passaram, foram recusados (503) ou falharam.
+
+Execute com: python manage.py benchmark_login_flood --flood 8 --readers 4
+"""
+import statistics
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from tasks.benchmark import benchmark_database, seed_dataset, unthrottled
+from users.hashers import get_pool
+
+User = get_user_model()
+PASSWORD = 'SenhaDoBenchmark123'
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+class Command(BaseCommand):
+    help = 'Mede a latência da API de tarefas durante uma rajada de logins (inline vs pool).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--readers', type=int, default=4, help='Threads lendo /api/tasks/')
+        parser.add_argument('--flood', type=int, default=8, help='Threads fazendo login sem parar')
+        parser.add_argument('--workers', type=int, default=1, help='Processos do pool na rodada "pool"')
+        parser.add_argument('--max-pending', type=int, default=4, help='Limite de fila na rodada "pool"')
+        parser.add_argument('--tasks', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        with benchmark_database(on_disk=True), override_settings(ALLOWED_HOSTS=['*']), unthrottled():
+            user_ids = seed_dataset(users=200, tasks=options['tasks'])
+            User.objects.update(password=make_password(PASSWORD))
+            usernames = list(User.objects.order_by('id').values_list('username', flat=True))
+            readers = list(User.objects.filter(id__in=user_ids[1:options['readers'] + 1]))
+            connection.close()
+
+            rounds = [
+                ('base', 0, {}),
+                ('inline', options['flood'], {'PASSWORD_HASHING_WORKERS': 0, 'PASSWORD_HASHING_MAX_PENDING': 10000}),
+                ('pool', options['flood'], {
+                    'PASSWORD_HASHING_WORKERS': options['workers'],
+                    'PASSWORD_HASHING_MAX_PENDING': options['max_pending'],
+                }),
+            ]
+            for label, flood, hashing in rounds:
+                with override_settings(**hashing):
+                    if hashing.get('PASSWORD_HASHING_WORKERS'):
+                        # Sobe os processos do pool antes de medir
+                        make_password(PASSWORD)
+                    result = self.run_round(readers, usernames, flood, options['seconds'])
+                    stats = get_pool().stats()
+                self.report(label, result, stats if flood else None)
+
+    def run_round(self, readers, usernames, flood, seconds):
+        stop = threading.Event()
+        latencies, logins = [], {'ok': 0, 'rejected': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        def read(user):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    client.get('/api/tasks/')
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        latencies.append(elapsed)
+            finally:
+                connection.close()
+
+        def login(offset):
+            client = APIClient()
+            i = offset
+            try:
+                while not stop.is_set():
+                    response = client.post('/api/auth/login/', {
+                        'username': usernames[i % len(usernames)], 'password': PASSWORD,
+                    })
+                    key = {200: 'ok', 503: 'rejected'}.get(response.status_code, 'failed')
+                    with lock:
+                        logins[key] += 1
+                    i += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=read, args=(user,)) for user in readers]
+        threads += [threading.Thread(target=login, args=(i * 7,)) for i in range(flood)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return sorted(latencies), logins
+
+    def report(self, label, result, stats):
+        latencies, logins = result
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+        self.stdout.write(
+            f'  /api/tasks/: {len(latencies)} req, '
+            f'p50 {percentile(latencies, 0.50):.1f}ms, p95 {percentile(latencies, 0.95):.1f}ms, '
+            f'p99 {percentile(latencies, 0.99):.1f}ms, média {statistics.fmean(latencies or [0]):.1f}ms'
+        )
+        if stats is not None:
+            self.stdout.write(
+                f"  logins: {logins['ok']} ok, {logins['rejected']} recusados (503), {logins['failed']} falhas; "
+                f"hash p50 {stats['latency_ms']['p50']}ms p99 {stats['latency_ms']['p99']}ms"
+            )
@@ -0,0 +1,97 @@
+"""
+Mede o custo de uma verificação dos limites de requisições (users/throttling.py).
+
+Para cada throttle roda --checks chamadas de allow_request() com o cache
+configurado (settings.CACHES) e mostra p50/p99 e a média por verificação.
+Os clientes se alternam entre --clients IPs/usuários, como num servidor
+com tráfego de vários clientes. O RefreshRateThrottle inclui a
+verificação da assinatura do refresh token.
+
+Execute com: python manage.py benchmark_throttle --checks 20000
+"""
+import statistics
+import time
+
+from django.core.cache import cache, caches
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.throttling import AuthRateThrottle, RefreshRateThrottle, TaskRateThrottle
+
+
+def percentile(samples, p):
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+class AnonymousClient:
+    is_authenticated = False
+
+
+class Client:
+    is_authenticated = True
+
+    def __init__(self, pk):
+        self.pk = pk
+
+
+class Command(BaseCommand):
+    help = 'Mede o custo de cada verificação dos limites de requisições.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=20000, help='Verificações por throttle')
+        parser.add_argument('--clients', type=int, default=100, help='IPs/usuários diferentes')
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        clients = range(options['clients'])
+        refresh_tokens = [self.refresh_token(pk) for pk in clients]
+
+        def auth_request(i):
+            request = Request(factory.post('/api/auth/login/', REMOTE_ADDR=f'10.0.{i // 250}.{i % 250}'))
+            request.user = AnonymousClient()
+            return request
+
+        def refresh_request(i):
+            request = Request(
+                factory.post('/api/auth/token/refresh/', {'refresh': refresh_tokens[i]}, format='json'),
+                parsers=[JSONParser()],
+            )
+            request.user = AnonymousClient()
+            return request
+
+        def task_request(i):
+            request = Request(factory.get('/api/tasks/'))
+            request.user = Client(i)
+            return request
+
+        scenarios = [
+            ('auth (IP)', AuthRateThrottle, auth_request),
+            ('refresh (usuário do token)', RefreshRateThrottle, refresh_request),
+            ('tasks_read (usuário)', TaskRateThrottle, task_request),
+        ]
+        self.stdout.write(f"Cache: {type(caches['default']).__name__}, {options['checks']} verificações por throttle")
+        for label, throttle_class, build in scenarios:
+            requests = [build(i) for i in clients]
+            cache.clear()
+            samples = []
+            for i in range(options['checks']):
+                request = requests[i % len(requests)]
+                start = time.perf_counter()
+                throttle_class().allow_request(request, None)
+                samples.append((time.perf_counter() - start) * 1000)
+            samples.sort()
+            self.stdout.write(
+                f'  {label}: p50 {percentile(samples, 0.50):.3f}ms, p99 {percentile(samples, 0.99):.3f}ms, '
+                f'média {statistics.fmean(samples or [0]):.3f}ms'
+            )
+        cache.clear()
+
+    def refresh_token(self, user_id):
+        # Sem o for_user(), que grava o token na blacklist do banco
+        token = RefreshToken()
+        token[jwt_settings.USER_ID_CLAIM] = str(user_id)
+        return str(token)
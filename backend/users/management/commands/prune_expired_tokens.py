@@ -0,0 +1,51 @@
+"""
+Apaga os tokens JWT expirados (OutstandingToken e BlacklistedToken).
+
+Diferente do `flushexpiredtokens` do SimpleJWT, que apaga tudo numa
+transação só, apaga em lotes pequenos e mostra as linhas e o tempo de
+cada lote (veja users/token_pruning.py).
+
+Execute com: python manage.py prune_expired_tokens
+Para repetir a cada hora: python manage.py prune_expired_tokens --every 3600
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from users.token_pruning import PRUNE_BATCH_SIZE, PRUNE_PAUSE_SECONDS, prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Apaga em lotes os tokens JWT expirados e os registros de blacklist deles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE,
+                            help='Tokens apagados por transação')
+        parser.add_argument('--pause', type=float, default=PRUNE_PAUSE_SECONDS,
+                            help='Pausa entre os lotes, em segundos')
+        parser.add_argument('--every', type=float, default=None,
+                            help='Repete a limpeza a cada N segundos (até ser interrompido)')
+
+    def handle(self, *args, **options):
+        while True:
+            self.prune(options['batch_size'], options['pause'])
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+            close_old_connections()
+
+    def prune(self, batch_size, pause):
+        start = time.perf_counter()
+
+        def log(batch):
+            self.stdout.write(
+                f"Lote {batch['number']}: {batch['outstanding']} tokens, "
+                f"{batch['blacklisted']} na blacklist, {batch['seconds'] * 1000:.1f}ms"
+            )
+
+        outstanding, blacklisted = prune_expired_tokens(batch_size, pause, log=log)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'{outstanding} tokens expirados apagados ({blacklisted} na blacklist) em {elapsed:.2f}s.'
+        ))
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:48, com o preenchimento das colunas
+
+import unicodedata
+
+from django.db import migrations, models
+
+import users.models
+
+SEARCH_COLUMNS = {
+    'username': 'username_search',
+    'first_name': 'first_name_search',
+    'last_name': 'last_name_search',
+}
+
+
+def search_key(value):
+    # Cópia congelada de users.models.search_key
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def populate_search_columns(apps, schema_editor):
+    """Preenche as colunas de busca dos usuários existentes, em lotes."""
+    User = apps.get_model('users', 'User')
+    users = User.objects.using(schema_editor.connection.alias).only('pk', *SEARCH_COLUMNS).order_by('pk')
+    batch = []
+    for user in users.iterator(chunk_size=1000):
+        for field, column in SEARCH_COLUMNS.items():
+            setattr(user, column, search_key(getattr(user, field)))
+        batch.append(user)
+        if len(batch) == 1000:
+            User.objects.using(schema_editor.connection.alias).bulk_update(batch, list(SEARCH_COLUMNS.values()))
+            batch = []
+    if batch:
+        User.objects.using(schema_editor.connection.alias).bulk_update(batch, list(SEARCH_COLUMNS.values()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_user_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', users.models.UserManager()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_username_lower_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_first_name_lower_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_last_name_lower_idx',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='first_name_search',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_name_search',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='username_search',
+            field=models.CharField(blank=True, default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(populate_search_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['username_search'], name='user_username_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['first_name_search'], name='user_first_name_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['last_name_search'], name='user_last_name_search_idx'),
+        ),
+    ]
@@ -1,10 +1,37 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
 import secrets
+import unicodedata
 from datetime import timedelta
 from django.utils import timezone
 
 
+def search_key(value):
+    """
+    Forma do nome usada na busca por prefixo (users/picker.py): sem acentos
+    e sem diferenciar maiúsculas, em qualquer alfabeto ('Élida' -> 'elida').
+    """
+    decomposed = unicodedata.normalize('NFKD', value or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+# Campo do nome -> coluna com a forma de busca dele
+SEARCH_COLUMNS = {
+    'username': 'username_search',
+    'first_name': 'first_name_search',
+    'last_name': 'last_name_search',
+}
+
+
+class UserManager(BaseUserManager):
+    def bulk_create(self, objs, *args, **kwargs):
+        # O bulk_create não passa pelo save()
+        objs = list(objs)
+        for user in objs:
+            user.sync_search_fields()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
 class User(AbstractUser):
     """
     Modelo de usuário personalizado do sistema.
@@ -15,19 +42,48 @@ class User(AbstractUser):
     - Futuras extensões específicas do nosso app
     
     Todos os usuários (admin, staff, comuns) usam este modelo.
+    
+    As colunas *_search guardam username, first_name e last_name em
+    search_key() e são mantidas pelo save() e pelo bulk_create() do
+    manager. Um QuerySet.update() dos nomes precisa gravar as colunas por
+    conta própria (sync_search_fields()).
     """
     email = models.EmailField(unique=True, verbose_name='E-mail')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='Data de Atualização')
+    username_search = models.CharField(max_length=150, blank=True, default='', editable=False)
+    first_name_search = models.CharField(max_length=150, blank=True, default='', editable=False)
+    last_name_search = models.CharField(max_length=150, blank=True, default='', editable=False)
+
+    objects = UserManager()
 
     class Meta:
         verbose_name = 'Usuário'
         verbose_name_plural = 'Usuários'
         ordering = ['-created_at']
+        indexes = [
+            # Busca por prefixo sem acentos nem maiúsculas (users/picker.py)
+            models.Index(fields=['username_search'], name='user_username_search_idx'),
+            models.Index(fields=['first_name_search'], name='user_first_name_search_idx'),
+            models.Index(fields=['last_name_search'], name='user_last_name_search_idx'),
+        ]
 
     def __str__(self):
         return self.username
 
+    def sync_search_fields(self):
+        for field, column in SEARCH_COLUMNS.items():
+            setattr(self, column, search_key(getattr(self, field)))
+
+    def save(self, *args, **kwargs):
+        self.sync_search_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            columns = [column for field, column in SEARCH_COLUMNS.items() if field in update_fields]
+            if columns:
+                kwargs['update_fields'] = {*update_fields, *columns}
+        super().save(*args, **kwargs)
+
 
 class PasswordResetToken(models.Model):
     """
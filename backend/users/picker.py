@@ -0,0 +1,87 @@
+"""
+Busca de usuários para o seletor de designação (GET /api/auth/users/picker/).
+
+O seletor só precisa de id e username. A busca é por prefixo, sem
+diferenciar maiúsculas nem acentos, em username, first_name e last_name.
+Cada campo tem uma coluna com a forma de busca dele (search_key() em
+users/models.py: 'Élida' -> 'elida'), indexada e mantida pelo User.save().
+Todo prefixo passa pela mesma forma e vira um intervalo no índice:
+
+    campo_search >= 'eli' AND campo_search < 'eli' || U+10FFFF
+
+Cada campo é uma consulta que percorre só o pedaço do índice que começa
+com o prefixo e para no limite; o resultado junta primeiro quem bate pelo
+username, depois pelo nome e pelo sobrenome. Nada passa por serializer:
+as linhas saem do banco como dicts (values()).
+
+Um prefixo sem acentos casa com nomes com ou sem acento ('joa' acha
+'João'). Se o prefixo tem acentos, o intervalo traz também as variantes
+sem acento e a última filtragem, no Python (prefix_matches), fica só com
+os nomes que têm os mesmos acentos ('JOÃ' acha 'João', não 'Joana').
+"""
+import unicodedata
+
+from django.contrib.auth import get_user_model
+
+from users.models import SEARCH_COLUMNS, search_key
+
+PICKER_FIELDS = ['id', 'username']
+SEARCH_FIELDS = ['username', 'first_name', 'last_name']
+PICKER_LIMIT = 20
+PICKER_MAX_LIMIT = 50
+
+# Maior code point: todo texto que começa com o prefixo fica abaixo dele
+_MAX_CHAR = '\U0010ffff'
+
+
+def prefix_filter(queryset, field, prefix):
+    """Filtra o queryset pelo prefixo do campo, pelo índice da coluna de busca."""
+    column = SEARCH_COLUMNS[field]
+    key = search_key(prefix)
+    return queryset.filter(**{
+        f'{column}__gte': key,
+        f'{column}__lt': key + _MAX_CHAR,
+    }).order_by(column)
+
+
+def fold(value):
+    """Forma comparável sem diferenciar maiúsculas, mantendo os acentos."""
+    return unicodedata.normalize('NFC', value or '').casefold()
+
+
+def prefix_matches(queryset, field, prefix, limit):
+    """Até `limit` linhas {id, username} cujo campo começa com o prefixo."""
+    candidates = prefix_filter(queryset, field, prefix)
+    wanted = fold(prefix)
+    if wanted == search_key(prefix):
+        return list(candidates.values(*PICKER_FIELDS)[:limit])
+
+    rows = []
+    for row in candidates.values(*dict.fromkeys([*PICKER_FIELDS, field])).iterator(chunk_size=limit):
+        if fold(row[field]).startswith(wanted):
+            rows.append({name: row[name] for name in PICKER_FIELDS})
+            if len(rows) >= limit:
+                break
+    return rows
+
+
+def search_users(prefix='', limit=PICKER_LIMIT):
+    """
+    Retorna até `limit` usuários ativos como dicts {id, username}.
+
+    Sem prefixo, os primeiros por username.
+    """
+    User = get_user_model()
+    active = User.objects.filter(is_active=True)
+    if not prefix:
+        return list(active.order_by('username').values(*PICKER_FIELDS)[:limit])
+
+    results, seen = [], set()
+    for field in SEARCH_FIELDS:
+        for row in prefix_matches(active, field, prefix, limit):
+            if row['id'] not in seen:
+                seen.add(row['id'])
+                results.append(row)
+        if len(results) >= limit:
+            break
+    return results[:limit]
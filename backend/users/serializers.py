@@ -1,6 +1,12 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.core.cache import cache
+import hashlib
+import time
+from .last_login import record_login
 from .models import PasswordResetToken
 
 User = get_user_model()
@@ -173,3 +179,79 @@ class ResetPasswordSerializer(serializers.Serializer):
         token_obj.save()
         
         return user
+
+
+class GraceTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh com janela de tolerância para pedidos repetidos.
+    
+    Com ROTATE_REFRESH_TOKENS e BLACKLIST_AFTER_ROTATION, um refresh token
+    só vale uma vez. Quando o app dispara vários refreshes em paralelo (um
+    por requisição que levou 401), só o primeiro passaria e os outros
+    obrigariam um novo login.
+    
+    Aqui o primeiro pedido faz a rotação normal e guarda o par novo no cache
+    por JWT_REFRESH_GRACE_SECONDS segundos (padrão 10), numa chave tirada do
+    hash do refresh token usado. Quem mandar o mesmo token nessa janela
+    recebe o mesmo par, sem nova rotação nem nova escrita na blacklist.
+    Pedidos simultâneos esperam a rotação do primeiro terminar.
+    
+    O cache só é gravado depois que o token passou por toda a validação,
+    então só quem tem o token exato recebe o par.
+    
+    O par e a trava ficam no cache padrão, que precisa ser compartilhado
+    entre os workers (config/cache.py). Com o LocMemCache a janela vale só
+    dentro de cada processo: um pedido repetido que cai em outro worker
+    recebe 401, como sem a janela. Com o DummyCache é o refresh comum.
+    Nunca se aceita um token a mais por causa disso, então não há
+    desligamento como no cache da autenticação.
+    """
+    # Quanto um pedido simultâneo espera pela rotação em andamento
+    wait_seconds = 3
+    poll_interval = 0.02
+    
+    def validate(self, attrs):
+        digest = hashlib.sha256(attrs['refresh'].encode('utf-8')).hexdigest()
+        result_key = f'auth:refresh:{digest}'
+        lock_key = f'auth:refresh:{digest}:lock'
+        
+        data = cache.get(result_key)
+        if data is not None:
+            return data
+        
+        if not cache.add(lock_key, True, self.wait_seconds):
+            # Outro pedido com o mesmo token está rotacionando
+            data = self.wait_for_rotation(result_key)
+            if data is not None:
+                return data
+            # A rotação dele falhou: validamos do zero (e recebemos o mesmo erro)
+            return super().validate(attrs)
+        try:
+            data = super().validate(attrs)
+            cache.set(result_key, data, getattr(settings, 'JWT_REFRESH_GRACE_SECONDS', 10))
+            return data
+        finally:
+            cache.delete(lock_key)
+    
+    def wait_for_rotation(self, result_key):
+        deadline = time.monotonic() + self.wait_seconds
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            data = cache.get(result_key)
+            if data is not None:
+                return data
+        return None
+
+
+class BufferedLastLoginTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Login (POST /api/auth/login/) com o last_login gravado em lote.
+    
+    Usado com SIMPLE_JWT['UPDATE_LAST_LOGIN'] desligado: em vez de um
+    UPDATE por login, o horário vai para o buffer de users/last_login.py.
+    """
+    
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        record_login(self.user)
+        return data
@@ -0,0 +1,62 @@
+"""
+Sinais do app de usuários.
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user_after_write
+from .directory import bump_version_on_commit, changes_directory
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def invalidate_directory_on_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """
+    Cadastro, edição ou desativação mudam o diretório (users/directory.py).
+
+    Saves que só mexem em campos fora dele (ex.: last_login no login) não
+    invalidam nada.
+    """
+    if raw or not changes_directory(update_fields):
+        return
+    bump_version_on_commit()
+
+
+@receiver(post_delete, sender=User)
+def invalidate_directory_on_delete(sender, instance, **kwargs):
+    bump_version_on_commit()
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_on_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """
+    Tira o usuário do cache da autenticação (users/authentication.py).
+
+    Cobre troca de senha, desativação e mudança de is_staff; o save() do
+    last_login no login não invalida. Usuários novos também trocam a
+    geração, para não herdar uma entrada de um id reaproveitado.
+    """
+    if raw:
+        return
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_user_after_write(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_cached_user_on_delete(sender, instance, **kwargs):
+    invalidate_user_after_write(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_cached_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    """Grupos e permissões também fazem parte do usuário em cache."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_user_after_write(instance.pk)
+    elif pk_set:
+        # Mudança feita pelo lado do grupo/permissão: pk_set são os usuários
+        for user_id in pk_set:
+            invalidate_user_after_write(user_id)
@@ -1,4 +1,8 @@
-from django.test import TestCase
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -236,3 +240,685 @@ class UserAPITestCase(TestCase):
         """
         response = self.client.get('/api/auth/users/')
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UserDirectoryCacheTestCase(TestCase):
+    """
+    Testes do cache da listagem de usuários (users/directory.py).
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        # O LocMemCache dos testes faz papel de cache compartilhado: há um
+        # processo só
+        patcher = mock.patch('users.directory.cache_is_shared', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123', is_staff=True
+        )
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def usernames(self):
+        response = self.client.get('/api/auth/users/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [user['username'] for user in response.data['results']]
+
+    def test_repeat_reads_skip_database(self):
+        first = self.client.get('/api/auth/users/').data
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/auth/users/').data
+        self.assertEqual(first, second)
+
+    def test_local_cache_is_not_used(self):
+        self.client.get('/api/auth/users/')
+        with mock.patch('users.directory.cache_is_shared', return_value=False), \
+                self.assertNumQueries(2):
+            self.client.get('/api/auth/users/')
+
+    def test_new_user_invalidates_directory(self):
+        self.assertEqual(self.usernames(), ['admin', 'testuser'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/auth/register/', {
+                'username': 'novo', 'email': 'novo@example.com',
+                'password': 'SenhaForte123!', 'password_confirm': 'SenhaForte123!',
+            })
+        self.assertEqual(self.usernames(), ['admin', 'novo', 'testuser'])
+
+    def test_profile_edit_invalidates_directory(self):
+        self.usernames()
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/auth/profile/', {'first_name': 'Maria'})
+        response = self.client.get('/api/auth/users/')
+        names = {user['username']: user['first_name'] for user in response.data['results']}
+        self.assertEqual(names['testuser'], 'Maria')
+
+    def test_soft_delete_invalidates_directory(self):
+        self.usernames()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/auth/users/{self.user.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.usernames(), ['admin'])
+
+    def test_login_does_not_invalidate_directory(self):
+        from users.directory import current_version
+
+        version = current_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/login/', {'username': 'testuser', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(current_version(), version)
+
+
+class UserPickerTestCase(TestCase):
+    """
+    Testes da busca do seletor de designação (users/picker.py).
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        User.objects.create_user(username='mariana', email='m1@example.com', first_name='Mariana')
+        User.objects.create_user(username='joao', email='j@example.com', first_name='João', last_name='Marques')
+        User.objects.create_user(username='marcos', email='m2@example.com', is_active=False)
+        User.objects.create_user(username='ana', email='a@example.com', first_name='Ana')
+        self.client.force_authenticate(user=self.user)
+
+    def test_prefix_search_is_case_insensitive_on_all_name_fields(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/auth/users/picker/', {'q': 'MAR'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Primeiro quem bate pelo username, depois pelo sobrenome; inativos ficam de fora
+        self.assertEqual([user['username'] for user in response.data], ['mariana', 'joao'])
+        self.assertEqual(set(response.data[0]), {'id', 'username'})
+
+    def test_accented_prefix_ignores_case(self):
+        User.objects.create_user(username='elida', email='e@example.com', first_name='Élida')
+        User.objects.create_user(username='ines', email='i@example.com', last_name='ÁVILA')
+        # O LOWER() do SQLite não converte 'Ã', 'É' nem 'Á'
+        response = self.client.get('/api/auth/users/picker/', {'q': 'JOÃ'})
+        self.assertEqual([user['username'] for user in response.data], ['joao'])
+        response = self.client.get('/api/auth/users/picker/', {'q': 'éli'})
+        self.assertEqual([user['username'] for user in response.data], ['elida'])
+        response = self.client.get('/api/auth/users/picker/', {'q': 'ávi'})
+        self.assertEqual([user['username'] for user in response.data], ['ines'])
+
+    def test_prefix_without_accents_matches_accented_names(self):
+        User.objects.create_user(username='elida', email='e@example.com', first_name='Élida')
+        response = self.client.get('/api/auth/users/picker/', {'q': 'ELI'})
+        self.assertEqual([user['username'] for user in response.data], ['elida'])
+        # Com acento, só os nomes com o mesmo acento
+        response = self.client.get('/api/auth/users/picker/', {'q': 'Jo'})
+        self.assertEqual([user['username'] for user in response.data], ['joao'])
+        response = self.client.get('/api/auth/users/picker/', {'q': 'Joá'})
+        self.assertEqual(response.data, [])
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plano de consulta específico do SQLite')
+    def test_non_ascii_prefix_uses_index(self):
+        from users.picker import prefix_filter
+
+        # Sem trecho ASCII no começo, o prefixo ainda vira um intervalo no índice
+        plan = prefix_filter(User.objects.all(), 'first_name', 'Éli').explain()
+        self.assertIn('user_first_name_search_idx', plan)
+
+    def test_search_columns_follow_name_changes(self):
+        user = User.objects.get(username='ana')
+        user.first_name = 'Ângela'
+        user.save(update_fields=['first_name'])
+        user.refresh_from_db()
+        self.assertEqual(user.first_name_search, 'angela')
+        response = self.client.get('/api/auth/users/picker/', {'q': 'ang'})
+        self.assertEqual([row['username'] for row in response.data], ['ana'])
+
+    def test_without_query_lists_first_users_by_username(self):
+        response = self.client.get('/api/auth/users/picker/', {'limit': 2})
+        self.assertEqual([user['username'] for user in response.data], ['ana', 'joao'])
+
+    def test_limit_is_capped(self):
+        from users.picker import PICKER_MAX_LIMIT
+
+        User.objects.bulk_create([
+            User(username=f'extra{i}', email=f'extra{i}@example.com') for i in range(PICKER_MAX_LIMIT + 5)
+        ])
+        response = self.client.get('/api/auth/users/picker/', {'q': 'extra', 'limit': 1000})
+        self.assertEqual(len(response.data), PICKER_MAX_LIMIT)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Plano de consulta específico do SQLite')
+    def test_search_uses_search_column_index(self):
+        from users.picker import prefix_filter
+
+        plan = prefix_filter(User.objects.all(), 'last_name', 'mar').explain()
+        self.assertIn('user_last_name_search_idx', plan)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get('/api/auth/users/picker/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachedJWTAuthenticationTestCase(TestCase):
+    """
+    Testes do cache de usuários da autenticação (users/authentication.py).
+    """
+
+    def setUp(self):
+        from users.authentication import user_cache
+
+        user_cache.clear()
+        # O LocMemCache dos testes faz papel de cache compartilhado: há um
+        # processo só
+        patcher = mock.patch('users.authentication.cache_is_shared', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123', is_staff=True
+        )
+
+    def login(self, user):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def test_repeat_requests_skip_user_query(self):
+        self.login(self.user)
+        self.client.get('/api/auth/profile/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.data['username'], 'testuser')
+
+    def test_local_cache_is_not_used(self):
+        from config.cache import cache_is_shared
+
+        # O cache padrão (LocMemCache) é de cada processo
+        self.assertFalse(cache_is_shared())
+        self.login(self.user)
+        self.client.get('/api/auth/profile/')
+        with mock.patch('users.authentication.cache_is_shared', return_value=False), \
+                self.assertNumQueries(1):
+            self.client.get('/api/auth/profile/')
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.login(self.user)
+        self.client.get('/api/auth/profile/')
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_change_takes_effect_immediately(self):
+        self.login(self.admin)
+        response = self.client.delete(f'/api/auth/users/{self.user.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.admin.is_staff = False
+        self.admin.save()
+        response = self.client.delete(f'/api/auth/users/{self.user.id}/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_password_change_revokes_cached_user(self):
+        from rest_framework_simplejwt.settings import api_settings
+
+        # O SimpleJWT lê SIMPLE_JWT uma vez só, então override_settings não serve
+        patcher = mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.login(self.user)
+        self.client.get('/api/auth/profile/')
+        response = self.client.post('/api/auth/change-password/', {
+            'old_password': 'testpass123',
+            'new_password': 'NovaSenha456!',
+            'new_password_confirm': 'NovaSenha456!',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_does_not_invalidate_cached_user(self):
+        self.login(self.user)
+        self.client.get('/api/auth/profile/')
+        APIClient().post('/api/auth/login/', {'username': 'testuser', 'password': 'testpass123'})
+        with self.assertNumQueries(0):
+            self.client.get('/api/auth/profile/')
+
+    def test_view_changes_do_not_leak_into_cache(self):
+        from users.authentication import user_cache, current_generation
+
+        self.login(self.user)
+        self.client.get('/api/auth/profile/')
+        cached = user_cache.get(str(self.user.pk), current_generation(self.user.pk))
+        self.client.patch('/api/auth/profile/', {'first_name': 'Outro'})
+        self.assertEqual(cached.first_name, '')
+
+
+class PruneExpiredTokensTestCase(TestCase):
+    """
+    Testes da limpeza dos tokens JWT expirados (users/token_pruning.py).
+    """
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        now = timezone.now()
+        for i in range(5):
+            token = OutstandingToken.objects.create(
+                user=self.user, jti=f'expirado{i}', token='x', expires_at=now - timedelta(days=1)
+            )
+            if i % 2 == 0:
+                BlacklistedToken.objects.create(token=token)
+        valid = OutstandingToken.objects.create(
+            user=self.user, jti='valido', token='x', expires_at=now + timedelta(days=1)
+        )
+        BlacklistedToken.objects.create(token=valid)
+
+    def test_prunes_expired_tokens_in_batches(self):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+        from users.token_pruning import prune_expired_tokens
+
+        batches = []
+        totals = prune_expired_tokens(batch_size=2, pause=0, log=batches.append)
+
+        self.assertEqual(totals, (5, 3))
+        self.assertEqual([batch['outstanding'] for batch in batches], [2, 2, 1])
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['valido'])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+    def test_command_reports_each_batch(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('prune_expired_tokens', '--batch-size', '3', '--pause', '0', stdout=out)
+        output = out.getvalue()
+        self.assertIn('Lote 1: 3 tokens', output)
+        self.assertIn('Lote 2: 2 tokens', output)
+        self.assertIn('5 tokens expirados apagados (3 na blacklist)', output)
+
+    def test_scheduler_starts_per_process_and_one_prunes_per_interval(self):
+        import os
+        from django.core.cache import cache
+        from users import token_pruning
+
+        cache.delete(token_pruning.PRUNE_LOCK_KEY)
+        with override_settings(TOKEN_PRUNE_INTERVAL_SECONDS=3600), \
+                mock.patch.object(token_pruning, '_scheduler', None):
+            scheduler = token_pruning.ensure_scheduler()
+            self.addCleanup(scheduler.stop)
+            self.assertEqual(scheduler.pid, os.getpid())
+            self.assertIs(token_pruning.ensure_scheduler(), scheduler)
+
+            # Num worker criado por fork o agendador herdado não tem thread
+            scheduler.pid = -1
+            child = token_pruning.ensure_scheduler()
+            self.addCleanup(child.stop)
+            self.assertIsNot(child, scheduler)
+
+        # Só um processo pega a limpeza do intervalo
+        self.assertTrue(child.acquire())
+        self.assertFalse(scheduler.acquire())
+        cache.delete(token_pruning.PRUNE_LOCK_KEY)
+
+
+class GraceTokenRefreshTestCase(TestCase):
+    """
+    Testes da janela de tolerância do refresh (GraceTokenRefreshSerializer).
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        response = self.client.post('/api/auth/login/', {'username': 'testuser', 'password': 'testpass123'})
+        self.refresh = response.data['refresh']
+
+    def test_reused_refresh_token_gets_same_pair(self):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+        first = self.client.post('/api/auth/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        outstanding = OutstandingToken.objects.count()
+
+        with self.assertNumQueries(0):
+            second = self.client.post('/api/auth/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(OutstandingToken.objects.count(), outstanding)
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+    def test_reuse_after_grace_window_is_rejected(self):
+        from django.core.cache import cache
+
+        self.client.post('/api/auth/token/refresh/', {'refresh': self.refresh})
+        cache.clear()  # Simula o fim da janela
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_without_cache_refresh_rotates_once(self):
+        # Sem cache não há janela, mas também nenhum token a mais aceito
+        first = self.client.post('/api/auth/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        second = self.client.post('/api/auth/token/refresh/', {'refresh': self.refresh})
+        self.assertEqual(second.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_is_not_cached(self):
+        for _ in range(2):
+            response = self.client.post('/api/auth/token/refresh/', {'refresh': 'invalido'})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_concurrent_request_waits_for_rotation(self):
+        import hashlib
+        from django.core.cache import cache
+        from users.serializers import GraceTokenRefreshSerializer
+
+        digest = hashlib.sha256(self.refresh.encode('utf-8')).hexdigest()
+        cache.set(f'auth:refresh:{digest}:lock', True)
+        pair = {'access': 'a', 'refresh': 'r'}
+        serializer = GraceTokenRefreshSerializer()
+
+        def finish_rotation(seconds):
+            cache.set(f'auth:refresh:{digest}', pair)
+
+        with mock.patch('users.serializers.time.sleep', side_effect=finish_rotation):
+            self.assertEqual(serializer.validate({'refresh': self.refresh}), pair)
+
+
+class PooledPasswordHasherTestCase(TestCase):
+    """
+    Testes do hash de senhas no pool limitado (users/hashers.py).
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+
+    def test_hash_matches_django_pbkdf2(self):
+        from django.contrib.auth.hashers import PBKDF2PasswordHasher
+        from users.hashers import PooledPBKDF2PasswordHasher
+
+        pooled = PooledPBKDF2PasswordHasher().encode('segredo', 'salt1234', 1000)
+        self.assertEqual(pooled, PBKDF2PasswordHasher().encode('segredo', 'salt1234', 1000))
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=0, PASSWORD_HASHING_MAX_PENDING=1)
+    def test_saturated_pool_rejects_login_fast(self):
+        from django.contrib.auth.hashers import make_password
+        from rest_framework.exceptions import APIException
+        from users.hashers import PasswordHashingUnavailable, get_pool
+
+        pool = get_pool()
+        pool._slots.acquire()  # Ocupa a única vaga
+        try:
+            response = self.client.post('/api/auth/login/', {'username': 'testuser', 'password': 'testpass123'})
+            # Fora da API (admin, comandos) é uma exceção comum, sem o DRF
+            with self.assertRaises(PasswordHashingUnavailable) as raised:
+                make_password('segredo')
+            self.assertNotIsInstance(raised.exception, APIException)
+        finally:
+            pool._slots.release()
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], str(PasswordHashingUnavailable.retry_after))
+        self.assertEqual(response.data['detail'].code, 'password_hashing_unavailable')
+        self.assertEqual(pool.stats()['rejected'], 2)
+
+        response = self.client.post('/api/auth/login/', {'username': 'testuser', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_metrics_are_admin_only(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/auth/hashing-metrics/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/auth/hashing-metrics/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data),
+            {'workers', 'max_pending', 'pending', 'completed', 'rejected', 'timeouts', 'latency_ms'},
+        )
+
+
+THROTTLE_RATES = {'auth': '3/min', 'refresh': '2/min', 'reset': '2/hour', 'tasks_read': '4/min', 'tasks_write': '2/min'}
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': THROTTLE_RATES,
+})
+class ThrottlingTestCase(TestCase):
+    """
+    Testes dos limites de requisições (users/throttling.py).
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+
+    def test_login_is_limited_per_ip(self):
+        data = {'username': 'testuser', 'password': 'errada'}
+        for _ in range(3):
+            response = self.client.post('/api/auth/login/', data)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post('/api/auth/login/', data)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+
+        # Outro IP tem o seu próprio limite
+        response = self.client.post('/api/auth/login/', data, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_is_limited_per_user(self):
+        User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        refresh = self.client.post(
+            '/api/auth/login/', {'username': 'testuser', 'password': 'testpass123'}
+        ).data['refresh']
+        for _ in range(2):
+            response = self.client.post('/api/auth/token/refresh/', {'refresh': refresh})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            refresh = response.data['refresh']
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Outro usuário no mesmo IP tem o seu próprio limite, e os refreshes
+        # não gastaram o limite do login
+        refresh = self.client.post(
+            '/api/auth/login/', {'username': 'other', 'password': 'testpass123'}
+        ).data['refresh']
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Token inválido conta pelo IP
+        for _ in range(2):
+            response = self.client.post('/api/auth/token/refresh/', {'refresh': 'invalido'})
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': 'invalido'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_benchmark_command_reports_each_throttle(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('benchmark_throttle', '--checks', '50', '--clients', '5', stdout=out)
+        output = out.getvalue()
+        self.assertIn('LocMemCache', output)
+        for label in ('auth (IP)', 'refresh (usuário do token)', 'tasks_read (usuário)'):
+            self.assertIn(label, output)
+
+    def test_password_reset_has_its_own_scope(self):
+        for _ in range(2):
+            response = self.client.post('/api/auth/request-password-reset/', {'email': 'test@example.com'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post('/api/auth/request-password-reset/', {'email': 'test@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(PasswordResetToken.objects.filter(user=self.user).count(), 2)
+
+    def test_task_reads_and_writes_are_limited_per_user(self):
+        self.client.force_authenticate(user=self.user)
+        for _ in range(2):
+            response = self.client.post('/api/tasks/', {'title': 'Tarefa', 'assigned_to': self.user.id})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post('/api/tasks/', {'title': 'Tarefa', 'assigned_to': self.user.id})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Leituras têm o seu próprio contador
+        for _ in range(4):
+            self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # O limite é por usuário, não por IP
+        other = User.objects.create_user(username='other', email='other@example.com', password='x')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get('/api/tasks/').status_code, status.HTTP_200_OK)
+
+    def test_previous_window_counts_with_decaying_weight(self):
+        from users.throttling import AuthRateThrottle
+
+        now = [600.0]  # início de uma janela de 60s
+        data = {'username': 'testuser', 'password': 'errada'}
+        with mock.patch.object(AuthRateThrottle, 'timer', lambda self: now[0]):
+            for _ in range(3):
+                self.client.post('/api/auth/login/', data)
+            # Um quarto da janela seguinte: 3 * 0.75 + 1 = 3.25 > 3
+            now[0] = 675.0
+            response = self.client.post('/api/auth/login/', data)
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertEqual(response['Retry-After'], '5')
+            # Perto do fim da janela o peso da anterior quase sumiu
+            now[0] = 715.0
+            response = self.client.post('/api/auth/login/', data)
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class LastLoginTestCase(TestCase):
+    """
+    Testes da gravação do last_login em lote (users/last_login.py).
+    """
+
+    def setUp(self):
+        from users import last_login
+        last_login.buffer.drain()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', email='test@example.com', password='testpass123'
+        )
+        self.credentials = {'username': 'testuser', 'password': 'testpass123'}
+
+    def test_login_without_flusher_writes_once_per_resolution(self):
+        response = self.client.post('/api/auth/login/', self.credentials)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        first = self.user.last_login
+        self.assertIsNotNone(first)
+
+        # Novo login dentro de LAST_LOGIN_RESOLUTION_SECONDS não grava
+        self.client.post('/api/auth/login/', self.credentials)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, first)
+
+    def test_login_with_flusher_is_buffered(self):
+        import os
+        from users import last_login
+
+        flusher = last_login.LastLoginFlusher(last_login.buffer, interval=3600, max_pending=1)
+        flusher.pid = os.getpid()
+        with mock.patch.object(last_login, '_flusher', flusher), \
+                mock.patch.object(last_login.LastLoginFlusher, 'running', True):
+            response = self.client.post('/api/auth/login/', self.credentials)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+        self.assertEqual(len(last_login.buffer), 1)
+        # Buffer cheio acorda o flusher antes do intervalo
+        self.assertTrue(flusher._wake.is_set())
+
+        self.assertEqual(last_login.buffer.flush(), 1)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertEqual(len(last_login.buffer), 0)
+
+    @override_settings(LAST_LOGIN_FLUSH_SECONDS=3600)
+    def test_flusher_starts_on_first_login_of_each_process(self):
+        import os
+        from users import last_login
+
+        with mock.patch.object(last_login, '_enabled', True), \
+                mock.patch.object(last_login, '_flusher', None), \
+                mock.patch.object(last_login, 'buffer', last_login.buffer):
+            # Habilitado, mas sem thread até o primeiro login
+            self.assertIsNone(last_login._flusher)
+            self.client.post('/api/auth/login/', self.credentials)
+            flusher = last_login._flusher
+            self.addCleanup(flusher.stop)
+            self.assertTrue(flusher.running)
+            self.assertEqual(flusher.pid, os.getpid())
+            self.assertEqual(len(flusher.buffer), 1)
+            self.user.refresh_from_db()
+            self.assertIsNone(self.user.last_login)
+
+            # Num worker criado por fork o flusher herdado não tem thread
+            flusher.pid = -1
+            child = last_login.get_flusher()
+            self.addCleanup(child.stop)
+            self.assertIsNot(child, flusher)
+            self.assertEqual(child.pid, os.getpid())
+            self.assertEqual(len(child.buffer), 0)
+
+            # Na saída só o flusher do próprio processo é parado (e grava o
+            # que sobrou)
+            last_login._flusher = flusher
+            last_login.flush_at_exit()
+            self.assertTrue(flusher.running)
+            last_login._flusher = child
+            last_login.flush_at_exit()
+            self.assertFalse(child.running)
+
+    def test_flush_is_one_update_and_keeps_newer_values(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from users.last_login import LastLoginBuffer
+
+        other = User.objects.create_user(username='other', email='other@example.com', password='x')
+        now = timezone.now()
+        User.objects.filter(pk=other.pk).update(last_login=now)
+
+        buffer = LastLoginBuffer()
+        buffer.add(self.user.pk, now - timedelta(minutes=5))
+        buffer.add(self.user.pk, now - timedelta(minutes=1))
+        buffer.add(other.pk, now - timedelta(hours=1))  # mais velho que o do banco
+        # SAVEPOINT, UPDATE, RELEASE (dentro do TestCase)
+        with self.assertNumQueries(3):
+            buffer.flush()
+
+        self.user.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.user.last_login, now - timedelta(minutes=1))
+        self.assertEqual(other.last_login, now)
@@ -0,0 +1,152 @@
+"""
+Limites de requisições por usuário/IP (throttling do DRF).
+
+Os escopos e taxas ficam em REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']:
+- auth: login, cadastro e troca de senha, por IP
+- refresh: renovação do token, pelo usuário do refresh token (RefreshRateThrottle)
+- reset: pedido e uso de token de recuperação de senha, por IP
+- tasks_read / tasks_write: leituras e escritas na API de tarefas, por
+  usuário (TaskRateThrottle escolhe o escopo pelo método)
+
+O SimpleRateThrottle do DRF guarda a lista de horários de cada cliente e
+regrava a lista inteira a cada requisição (get + set, sem atomicidade:
+pedidos simultâneos se sobrescrevem). Aqui cada cliente tem um contador por
+janela de tempo, incrementado com cache.incr(), que é atômico no Redis e
+no Memcached. Com o LocMemCache padrão o incr() também é atômico, mas o
+contador é de cada processo: com N workers o limite real fica até N vezes
+maior. Em produção os limites precisam de um cache compartilhado (veja
+config/cache.py). A janela é deslizante por aproximação: o contador da janela
+anterior entra com o peso do pedaço dela que ainda está dentro do período.
+
+    estimativa = anterior * (1 - fração já passada da janela atual) + atual
+
+Quando a estimativa passa do limite a resposta é 429 com Retry-After.
+Pedidos recusados também contam: quem insiste continua bloqueado.
+
+O IP vem do REMOTE_ADDR, ou do X-Forwarded-For se NUM_PROXIES (proxies
+confiáveis na frente do servidor) estiver configurado.
+
+O custo de cada verificação com o cache configurado é medido por
+`python manage.py benchmark_throttle`.
+"""
+import math
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.state import token_backend
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """Throttle por janela deslizante com contadores atômicos no cache."""
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def get_rate(self):
+        # Lido a cada requisição (e não na definição da classe, como no DRF)
+        # para respeitar mudanças em REST_FRAMEWORK
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def get_ident_for(self, request):
+        """Usuário logado ou IP; subclasses escolhem."""
+        return self.get_ident(request)
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident_for(request)}
+
+    def increment(self, key):
+        """Incrementa o contador da janela, criando se preciso."""
+        # add() não sobrescreve o contador criado por outro processo; o
+        # contador vive duas janelas, o bastante para servir de "anterior"
+        self.cache.add(key, 0, self.duration * 2)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expirou entre o add() e o incr()
+            self.cache.set(key, 1, self.duration * 2)
+            return 1
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        elapsed = (self.now % self.duration) / self.duration
+        current = self.increment(f'{key}:{window}')
+        previous = self.cache.get(f'{key}:{window - 1}', 0)
+        self.previous, self.elapsed = previous, elapsed
+        self.estimate = previous * (1 - elapsed) + current
+        return self.estimate <= self.num_requests
+
+    def wait(self):
+        """Segundos até a estimativa voltar para dentro do limite."""
+        remaining = self.duration * (1 - self.elapsed)
+        if self.previous <= 0:
+            # Só a janela atual conta: libera quando ela virar
+            return math.ceil(remaining)
+        # O peso da janela anterior cai linearmente até o fim da atual
+        excess = self.estimate - self.num_requests
+        seconds = excess / self.previous * self.duration
+        return max(1, math.ceil(min(seconds, remaining)))
+
+
+class IPRateThrottle(SlidingWindowRateThrottle):
+    """Limite por IP (rotas usadas sem login)."""
+
+
+class AuthRateThrottle(IPRateThrottle):
+    scope = 'auth'
+
+
+class PasswordResetRateThrottle(IPRateThrottle):
+    scope = 'reset'
+
+
+class RefreshRateThrottle(SlidingWindowRateThrottle):
+    """
+    Limite do refresh por usuário: atrás de um NAT ou proxy muitos usuários
+    dividem o IP, e o refresh é automático no app, então um limite por IP
+    junto com o login barraria gente que só está usando o app.
+
+    O usuário sai do refresh token enviado, com a assinatura verificada
+    (sem isso qualquer um escolheria a chave do contador); sem um token
+    válido o limite é por IP.
+    """
+    scope = 'refresh'
+
+    def get_ident_for(self, request):
+        raw_token = request.data.get('refresh') if hasattr(request.data, 'get') else None
+        if isinstance(raw_token, str):
+            try:
+                payload = token_backend.decode(raw_token, verify=True)
+            except TokenBackendError:
+                payload = {}
+            user_id = payload.get(jwt_settings.USER_ID_CLAIM)
+            if user_id is not None:
+                return f'user:{user_id}'
+        return self.get_ident(request)
+
+
+class TaskRateThrottle(SlidingWindowRateThrottle):
+    """
+    Limite da API de tarefas por usuário: tasks_read para GET/HEAD/OPTIONS,
+    tasks_write para o resto.
+    """
+    scope = 'tasks_read'
+
+    def allow_request(self, request, view):
+        self.scope = 'tasks_read' if request.method in SAFE_METHODS else 'tasks_write'
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_ident_for(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return self.get_ident(request)
@@ -0,0 +1,162 @@
+"""
+Limpeza dos tokens JWT expirados (token_blacklist do SimpleJWT).
+
+Com ROTATE_REFRESH_TOKENS e BLACKLIST_AFTER_ROTATION ligados, cada
+refresh grava um OutstandingToken e um BlacklistedToken, e nada apaga essas
+linhas. Um token expirado já é recusado pela validação do JWT, então as
+linhas dele não servem mais para nada.
+
+prune_expired_tokens() apaga em lotes pequenos, cada um na sua transação:
+a trava de escrita dura só o lote, e entre um lote e outro há uma pausa
+para os refreshes em andamento passarem. Os lotes seguem a ordem do id
+(a chave primária), sem varrer de novo o que já foi visto.
+
+Para rodar periodicamente:
+- `python manage.py prune_expired_tokens --every 3600` (processo próprio)
+- ou settings.TOKEN_PRUNE_INTERVAL_SECONDS, que liga o TokenPruneScheduler
+  dentro do servidor (config/wsgi.py e config/asgi.py)
+
+O agendador sobe na primeira requisição de cada processo (e não no import
+da aplicação, que o Gunicorn com --preload e o uWSGI fazem no processo
+mestre antes de criar os workers com fork, que não copia threads). Cada
+worker tem o seu, mas a cada intervalo só um deles limpa: quem pega a
+trava no cache (cache.add). A trava só vale entre os processos com um
+cache compartilhado (config/cache.py); sem ele cada worker faz a sua
+limpeza, o que só custa consultas a mais. Com muitos workers, prefira o
+comando no cron ou num processo próprio.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+logger = logging.getLogger(__name__)
+
+PRUNE_BATCH_SIZE = 500
+PRUNE_PAUSE_SECONDS = 0.05
+PRUNE_LOCK_KEY = 'users:token_prune:lock'
+
+
+def prune_expired_tokens(batch_size=PRUNE_BATCH_SIZE, pause=PRUNE_PAUSE_SECONDS, now=None, log=None):
+    """
+    Apaga os tokens expirados (e os registros de blacklist deles) em lotes.
+
+    `log(batch)` é chamado a cada lote com um dict {number, outstanding,
+    blacklisted, seconds}. Retorna o total de (outstanding, blacklisted)
+    apagados.
+    """
+    now = now or timezone.now()
+    blacklisted_label = BlacklistedToken._meta.label
+    outstanding_label = OutstandingToken._meta.label
+    last_id = 0
+    totals = [0, 0]
+    number = 0
+    while True:
+        started = time.perf_counter()
+        ids = list(
+            OutstandingToken.objects
+            .filter(id__gt=last_id, expires_at__lte=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        # Só o DELETE fica dentro da transação (e da trava de escrita)
+        with transaction.atomic():
+            _, deleted = OutstandingToken.objects.filter(id__in=ids).delete()
+        number += 1
+        last_id = ids[-1]
+        batch = {
+            'number': number,
+            'outstanding': deleted.get(outstanding_label, 0),
+            'blacklisted': deleted.get(blacklisted_label, 0),
+            'seconds': time.perf_counter() - started,
+        }
+        totals[0] += batch['outstanding']
+        totals[1] += batch['blacklisted']
+        if log:
+            log(batch)
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return tuple(totals)
+
+
+class TokenPruneScheduler:
+    """
+    Roda prune_expired_tokens() a cada `interval` segundos numa thread
+    daemon do próprio processo, se nenhum outro processo tiver rodado no
+    mesmo intervalo (PRUNE_LOCK_KEY).
+    """
+
+    def __init__(self, interval, batch_size=PRUNE_BATCH_SIZE):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread = None
+        self.pid = None
+
+    def start(self):
+        if self._thread is None:
+            self.pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='token-prune', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def acquire(self):
+        """Pega a limpeza deste intervalo; False se outro processo já pegou."""
+        # A trava expira sozinha: sobra no máximo uma limpeza por intervalo
+        return cache.add(PRUNE_LOCK_KEY, self.pid, max(int(self.interval) - 1, 1))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.acquire():
+                continue
+            close_old_connections()
+            try:
+                outstanding, blacklisted = prune_expired_tokens(self.batch_size)
+                if outstanding:
+                    logger.info('Tokens expirados apagados: %s (%s na blacklist)', outstanding, blacklisted)
+            except Exception:
+                logger.exception('Erro ao apagar tokens expirados')
+            finally:
+                close_old_connections()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler():
+    """
+    Habilita o agendador se settings.TOKEN_PRUNE_INTERVAL_SECONDS estiver
+    definido. A thread só sobe na primeira requisição de cada processo.
+    """
+    if getattr(settings, 'TOKEN_PRUNE_INTERVAL_SECONDS', None):
+        request_started.connect(ensure_scheduler, dispatch_uid='users.token_pruning')
+
+
+def ensure_scheduler(**kwargs):
+    """Agendador deste processo, ligado no primeiro uso."""
+    global _scheduler
+    scheduler = _scheduler
+    if scheduler is not None and scheduler.pid == os.getpid():
+        return scheduler
+    with _scheduler_lock:
+        if _scheduler is None or _scheduler.pid != os.getpid():
+            _scheduler = TokenPruneScheduler(settings.TOKEN_PRUNE_INTERVAL_SECONDS)
+            _scheduler.start()
+        return _scheduler
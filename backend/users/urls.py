@@ -7,8 +7,10 @@ from .views import (
     ChangePasswordView, 
     UserListViewSet,
     RequestPasswordResetView,
-    ResetPasswordView
+    ResetPasswordView,
+    HashingMetricsView
 )
+from .throttling import AuthRateThrottle, RefreshRateThrottle
 
 app_name = 'users'
 
@@ -17,8 +19,8 @@ router.register(r'users', UserListViewSet, basename='user')
 
 urlpatterns = [
     # 🔐 Autenticação via JWT (tokens)
-    path('login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),  # Login - retorna access e refresh token
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),  # Renova o access token
+    path('login/', TokenObtainPairView.as_view(throttle_classes=[AuthRateThrottle]), name='token_obtain_pair'),  # Login - retorna access e refresh token
+    path('token/refresh/', TokenRefreshView.as_view(throttle_classes=[RefreshRateThrottle]), name='token_refresh'),  # Renova o access token
     
     # 👤 Registro e perfil do usuário
     path('register/', UserRegistrationView.as_view(), name='register'),  # Cadastro de novos usuários
@@ -29,6 +31,9 @@ urlpatterns = [
     path('request-password-reset/', RequestPasswordResetView.as_view(), name='request_password_reset'),  # Solicitar token de reset
     path('reset-password/', ResetPasswordView.as_view(), name='reset_password'),  # Redefinir senha com token
     
+    # 📊 Métricas do hash de senhas (apenas admin)
+    path('hashing-metrics/', HashingMetricsView.as_view(), name='hashing_metrics'),
+    
     # 📋 Lista de usuários (usado no seletor de designação de tarefas)
     path('', include(router.urls)),  # GET /api/auth/users/
 ]
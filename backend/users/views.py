@@ -1,11 +1,16 @@
 from rest_framework import generics, status
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 import logging
+from config.routers import ReplicaReadMixin, use_primary
+from . import directory
+from .picker import PICKER_LIMIT, PICKER_MAX_LIMIT, search_users
 from .serializers import (
     UserSerializer, 
     UserRegistrationSerializer, 
@@ -13,7 +18,9 @@ from .serializers import (
     RequestPasswordResetSerializer,
     ResetPasswordSerializer
 )
+from .hashers import get_pool
 from .models import PasswordResetToken
+from .throttling import AuthRateThrottle, PasswordResetRateThrottle
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -28,6 +35,7 @@ class UserRegistrationView(generics.CreateAPIView):
     """
     queryset = User.objects.all()
     permission_classes = [AllowAny]
+    throttle_classes = [AuthRateThrottle]
     serializer_class = UserRegistrationSerializer
 
     def create(self, request, *args, **kwargs):
@@ -59,6 +67,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
 class ChangePasswordView(APIView):
     """Permite que o usuário logado altere sua própria senha."""
     permission_classes = [IsAuthenticated]
+    throttle_classes = [AuthRateThrottle]
 
     def post(self, request):
         serializer = ChangePasswordSerializer(data=request.data, context={'request': request})
@@ -71,14 +80,19 @@ class ChangePasswordView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserListViewSet(ModelViewSet):
+class UserListViewSet(ReplicaReadMixin, ModelViewSet):
     """
     Lista os usuários do sistema.
     
     Endpoints:
     - GET /api/auth/users/ - Lista usuários (qualquer usuário autenticado)
+    - GET /api/auth/users/picker/?q=<prefixo> - Busca compacta para o seletor
     - DELETE /api/auth/users/{id}/ - Exclui usuário (apenas admin)
     Retorna apenas usuários ativos.
+    
+    As páginas da listagem ficam em cache até o diretório mudar
+    (veja users/directory.py). As leituras podem ir para uma réplica do
+    banco (config/routers.py).
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -93,6 +107,38 @@ class UserListViewSet(ModelViewSet):
         """Retorna apenas usuários ativos, ordenados por username."""
         return User.objects.filter(is_active=True).order_by('username')
     
+    def list(self, request, *args, **kwargs):
+        """Listagem com cache: leituras repetidas não vão ao banco."""
+        if not directory.enabled():
+            return super().list(request, *args, **kwargs)
+        key = directory.page_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        # A página fica em cache até a próxima mudança no diretório; vinda de
+        # uma réplica atrasada, ficaria velha até lá
+        use_primary()
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, directory.cache_timeout())
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def picker(self, request):
+        """
+        Busca usuários ativos para designar tarefas.
+        
+        GET /api/auth/users/picker/?q=<prefixo>&limit=<n>
+        Retorna só [{id, username}], no máximo PICKER_MAX_LIMIT itens, sem
+        paginação (veja users/picker.py).
+        """
+        prefix = request.query_params.get('q', '').strip()
+        try:
+            limit = int(request.query_params.get('limit', PICKER_LIMIT))
+        except ValueError:
+            limit = PICKER_LIMIT
+        limit = max(1, min(limit, PICKER_MAX_LIMIT))
+        return Response(search_users(prefix, limit))
+    
     def destroy(self, request, *args, **kwargs):
         """Exclui um usuário (apenas admin pode executar)."""
         instance = self.get_object()
@@ -114,6 +160,20 @@ class UserListViewSet(ModelViewSet):
         )
 
 
+class HashingMetricsView(APIView):
+    """
+    Métricas do pool de hash de senhas deste processo (apenas admin).
+    
+    Endpoint: GET /api/auth/hashing-metrics/
+    Retorna fila atual (pending), recusas (rejected), timeouts e a latência
+    dos últimos cálculos (espera na fila + hash).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_pool().stats())
+
+
 class RequestPasswordResetView(APIView):
     """
     Solicita a recuperação de senha.
@@ -121,6 +181,7 @@ class RequestPasswordResetView(APIView):
     Endpoint: POST /api/auth/request-password-reset/
     """
     permission_classes = [AllowAny]
+    throttle_classes = [PasswordResetRateThrottle]
 
     def post(self, request):
         serializer = RequestPasswordResetSerializer(data=request.data)
@@ -154,6 +215,7 @@ class ResetPasswordView(APIView):
     Endpoint: POST /api/auth/reset-password/
     """
     permission_classes = [AllowAny]
+    throttle_classes = [PasswordResetRateThrottle]
 
     def post(self, request):
         serializer = ResetPasswordSerializer(data=request.data)
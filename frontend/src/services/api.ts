@@ -1,6 +1,6 @@
 import axios from 'axios';
 import AsyncStorage from '@react-native-async-storage/async-storage';
-import type { LoginCredentials, RegisterData, AuthTokens, User, Task } from '../types';
+import type { LoginCredentials, RegisterData, AuthTokens, User, UserOption, Task, TaskChanges } from '../types';
 import { getApiUrl } from './apiConfig';
 
 let API_URL = 'http://SEU_IP_LOCAL:8000/api';
@@ -133,6 +133,11 @@ export const authAPI = {
     return Array.isArray(data) ? data : (data.results || []);
   },
   
+  searchUsers: async (query: string, limit?: number): Promise<UserOption[]> => {
+    const { data } = await api.get('/auth/users/picker/', { params: { q: query, limit } });
+    return data;
+  },
+  
   requestPasswordReset: async (email: string): Promise<{ detail: string; token?: string; expires_at?: string }> => {
     const { data } = await api.post('/auth/request-password-reset/', { email });
     return data;
@@ -170,6 +175,12 @@ export const tasksAPI = {
     return Array.isArray(data) ? data : (data.results || []);
   },
   
+  getChanges: async (since?: string): Promise<TaskChanges> => {
+    const url = since ? `/tasks/changes/?since=${encodeURIComponent(since)}` : '/tasks/changes/';
+    const { data } = await api.get(url);
+    return data;
+  },
+  
   createTask: async (task: Partial<Task>): Promise<Task> => {
     const { data } = await api.post('/tasks/', task);
     return data;
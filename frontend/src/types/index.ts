@@ -8,6 +8,11 @@ export interface User {
   is_superuser?: boolean;
 }
 
+export interface UserOption {
+  id: number;
+  username: string;
+}
+
 export interface Task {
   id: number;
   title: string;
@@ -20,6 +25,13 @@ export interface Task {
   assigned_to_username?: string; // Nome do usuário designado (para exibição)
 }
 
+export interface TaskChanges {
+  changed: Task[]; // Tarefas criadas ou editadas desde o token
+  deleted: number[]; // IDs das tarefas apagadas desde o token
+  since: string; // Token para a próxima sincronização
+  has_more: boolean; // Se true, chame de novo com o novo token
+}
+
 export interface LoginCredentials {
   username: string;
   password: string;